@@ -4,7 +4,7 @@ import os
 sys.path.insert(0, os.path.abspath("../address-geocode-international-python/SOAP"))
 
 from place_search_soap import PlaceSearch
-from helper import response_to_dict
+from soap_response import response_to_dict
 
 def place_search_soap_sdk_go(license, is_live_key):
     print("\n" + "-" * 54)
@@ -59,49 +59,43 @@ def place_search_soap_sdk_go(license, is_live_key):
             print(f'NotesDesc        : {data["SearchInfo"].get("NotesDesc", "")}')
             print(f'Warnings         : {data["SearchInfo"].get("Warnings", "")}')
             print(f'WarningDesc      : {data["SearchInfo"].get("WarningDesc", "")}')
-            idx = 0;
-            for key in data.keys():
-                if "Locations" in key:
-                    results = data[key];
-                    if results is None or len(results) == 0:
-                        print(f"Response Key: {key} has no records.");
-                        continue;
-                    idx += 1
-                    print(f"Location #{idx}")
-                    print(f'\tPrecisionLevel                : {data[key].get("PrecisionLevel", "")}')
-                    print(f'\tType                          : {data[key].get("Type", "")}')
-                    print(f'\tLatitude                      : {data[key].get("Latitude", "")}')
-                    print(f'\tLongitude                     : {data[key].get("Longitude", "")}')
-                    print(f'\tPremiseNumber                 : {data[key].get("PremiseNumber", "")}')
-                    print(f'\tThoroughfare                  : {data[key].get("Thoroughfare", "")}')
-                    print(f'\tDoubleDependentLocality       : {data[key].get("DoubleDependentLocality", "")}')
-                    print(f'\tDependentLocality             : {data[key].get("DependentLocality", "")}')
-                    print(f'\tLocality                      : {data[key].get("Locality", "")}')
-                    print(f'\tAdministrativeArea1           : {data[key].get("AdministrativeArea1", "")}')
-                    print(f'\AdministrativeArea1Abbreviation: {data[key].get("AdministrativeArea1Abbreviation", "")}')
-                    print(f'\tAdministrativeArea2           : {data[key].get("AdministrativeArea2", "")}')
-                    print(f'\AdministrativeArea2Abbreviation: {data[key].get("AdministrativeArea2Abbreviation", "")}')
-                    print(f'\tAdministrativeArea3           : {data[key].get("AdministrativeArea3", "")}')
-                    print(f'\AdministrativeArea3Abbreviation: {data[key].get("AdministrativeArea3Abbreviation", "")}')
-                    print(f'\tAdministrativeArea4           : {data[key].get("AdministrativeArea4", "")}')
-                    print(f'\AdministrativeArea4Abbreviation: {data[key].get("AdministrativeArea4Abbreviation", "")}')
-                    print(f'\tPostalCode                    : {data[key].get("PostalCode", "")}')
-                    print(f'\tCountry                       : {data[key].get("Country", "")}')
-                    print(f'\tCountryISO2                   : {data[key].get("CountryISO2", "")}')
-                    print(f'\tCountryISO3                   : {data[key].get("CountryISO3", "")}')
-                    print(f'\tPlaceName                     : {data[key].get("PlaceName", "")}')
-                    print(f'\tGoogleMapsURL                 : {data[key].get("GoogleMapsURL", "")}')
-                    print(f'\tIsUnincorporated              : {data[key].get("IsUnincorporated", "")}')
-                    print(f'\tStateFIPS                     : {data[key].get("StateFIPS", "")}')
-                    print(f'\tCountyFIPS                    : {data[key].get("CountyFIPS", "")}')
-                    print(f'\tCensusTract                   : {data[key].get("CensusTract", "")}')
-                    print(f'\tCensusBlock                   : {data[key].get("CensusBlock", "")}')
-                    print(f'\tCensusGeoID                   : {data[key].get("CensusGeoID", "")}')
-                    print(f'\tClassFP                       : {data[key].get("ClassFP", "")}')
-                    print(f'\tCongressCode                  : {data[key].get("CongressCode", "")}')
-                    print(f'\tSLDUST                        : {data[key].get("SLDUST", "")}')
-                    print(f'\tSLDLST                        : {data[key].get("SLDLST", "")}')
-                    print(f'\tTimeZoneUTC                   : {data[key].get("TimeZone_UTC", "")}')
+            for idx, loc in enumerate(data.get("Locations", []), start=1):
+                print(f"Location #{idx}")
+                print(f'\tPrecisionLevel                 : {loc.get("PrecisionLevel", "")}')
+                print(f'\tType                           : {loc.get("Type", "")}')
+                print(f'\tLatitude                       : {loc.get("Latitude", "")}')
+                print(f'\tLongitude                      : {loc.get("Longitude", "")}')
+                address = loc.get("AddressComponents", {})
+                print(f'\tPremiseNumber                  : {address.get("PremiseNumber", "")}')
+                print(f'\tThoroughfare                   : {address.get("Thoroughfare", "")}')
+                print(f'\tDoubleDependentLocality        : {address.get("DoubleDependentLocality", "")}')
+                print(f'\tDependentLocality              : {address.get("DependentLocality", "")}')
+                print(f'\tLocality                       : {address.get("Locality", "")}')
+                print(f'\tAdministrativeArea1            : {address.get("AdministrativeArea1", "")}')
+                print(f'\tAdministrativeArea1Abbreviation: {address.get("AdministrativeArea1Abbreviation", "")}')
+                print(f'\tAdministrativeArea2            : {address.get("AdministrativeArea2", "")}')
+                print(f'\tAdministrativeArea2Abbreviation: {address.get("AdministrativeArea2Abbreviation", "")}')
+                print(f'\tAdministrativeArea3            : {address.get("AdministrativeArea3", "")}')
+                print(f'\tAdministrativeArea3Abbreviation: {address.get("AdministrativeArea3Abbreviation", "")}')
+                print(f'\tAdministrativeArea4            : {address.get("AdministrativeArea4", "")}')
+                print(f'\tAdministrativeArea4Abbreviation: {address.get("AdministrativeArea4Abbreviation", "")}')
+                print(f'\tPostalCode                     : {address.get("PostalCode", "")}')
+                print(f'\tCountry                        : {address.get("Country", "")}')
+                print(f'\tCountryISO2                    : {address.get("CountryISO2", "")}')
+                print(f'\tCountryISO3                    : {address.get("CountryISO3", "")}')
+                print(f'\tPlaceName                      : {address.get("PlaceName", "")}')
+                print(f'\tGoogleMapsURL                  : {address.get("GoogleMapsURL", "")}')
+                print(f'\tIsUnincorporated               : {address.get("IsUnincorporated", "")}')
+                print(f'\tStateFIPS                      : {address.get("StateFIPS", "")}')
+                print(f'\tCountyFIPS                     : {address.get("CountyFIPS", "")}')
+                print(f'\tCensusTract                    : {address.get("CensusTract", "")}')
+                print(f'\tCensusBlock                    : {address.get("CensusBlock", "")}')
+                print(f'\tCensusGeoID                    : {address.get("CensusGeoID", "")}')
+                print(f'\tClassFP                        : {address.get("ClassFP", "")}')
+                print(f'\tCongressCode                   : {address.get("CongressCode", "")}')
+                print(f'\tSLDUST                         : {address.get("SLDUST", "")}')
+                print(f'\tSLDLST                         : {address.get("SLDLST", "")}')
+                print(f'\tTimeZone_UTC                   : {address.get("TimeZone_UTC", "")}')
         else:
             print("\n* Error *\n")
             print(f'Type    : {data["Error"].get("Type", "")}')
@@ -0,0 +1,341 @@
+'''
+Service Objects - AGI Address Normalization
+
+This module canonicalizes PlaceSearch inputs so that the same address written different
+ways (case, whitespace, punctuation, "St" vs "Street", "US" vs "United States") maps
+to one stable key, and provides AddressDeduplicator, which batch_place_search uses
+(dedupe=True) to send one request per distinct address and fan its result out to every
+input row that shares the key.
+
+Normalization is only used to build the key; the request itself is sent with the
+original values of the first row seen for that key.
+
+Classes:
+    AddressDeduplicator(max_entries: int = 10000)
+
+Functions:
+    normalize_text(value) -> str
+    normalize_country(value) -> str
+    normalize_postal_code(value) -> str
+    normalize_address(record: dict) -> dict
+    address_key(record: dict) -> str
+'''
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+# Address fields that are normalized into the key
+ADDRESS_FIELDS = (
+    "single_line",
+    "address1",
+    "address2",
+    "address3",
+    "address4",
+    "address5",
+    "locality",
+    "administrative_area",
+    "postal_code",
+    "country",
+)
+# Search options that change the result and are kept verbatim in the key
+OPTION_FIELDS = ("boundaries", "max_results", "search_type", "extras")
+
+# Canonical (abbreviated) forms of common street suffixes, directionals and unit designators.
+# "Saint" is kept as a word, since "st" is the street suffix; a written "St" is read as
+# one or the other by position (see _expand_st).
+ABBREVIATIONS = {
+    "street": "st", "str": "st",
+    "avenue": "ave", "av": "ave", "aven": "ave", "avenu": "ave",
+    "boulevard": "blvd", "boul": "blvd",
+    "road": "rd",
+    "drive": "dr", "driv": "dr",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "square": "sq",
+    "terrace": "ter",
+    "parkway": "pkwy", "pky": "pkwy",
+    "highway": "hwy",
+    "expressway": "expy",
+    "freeway": "fwy",
+    "circle": "cir",
+    "crescent": "cres",
+    "trail": "trl",
+    "alley": "aly",
+    "center": "ctr", "centre": "ctr",
+    "heights": "hts",
+    "mount": "mt",
+    "fort": "ft",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+    "apartment": "apt",
+    "suite": "ste",
+    "building": "bldg",
+    "floor": "fl",
+    "room": "rm",
+}
+
+# ISO 3166-1 alpha-2, alpha-3 and short name of every country
+_COUNTRIES = """
+AD AND Andorra|AE ARE United Arab Emirates|AF AFG Afghanistan|AG ATG Antigua and Barbuda|AI AIA Anguilla
+AL ALB Albania|AM ARM Armenia|AO AGO Angola|AQ ATA Antarctica|AR ARG Argentina|AS ASM American Samoa
+AT AUT Austria|AU AUS Australia|AW ABW Aruba|AX ALA Aland Islands|AZ AZE Azerbaijan
+BA BIH Bosnia and Herzegovina|BB BRB Barbados|BD BGD Bangladesh|BE BEL Belgium|BF BFA Burkina Faso
+BG BGR Bulgaria|BH BHR Bahrain|BI BDI Burundi|BJ BEN Benin|BL BLM Saint Barthelemy|BM BMU Bermuda
+BN BRN Brunei Darussalam|BO BOL Bolivia|BQ BES Bonaire, Sint Eustatius and Saba|BR BRA Brazil
+BS BHS Bahamas|BT BTN Bhutan|BV BVT Bouvet Island|BW BWA Botswana|BY BLR Belarus|BZ BLZ Belize
+CA CAN Canada|CC CCK Cocos (Keeling) Islands|CD COD Democratic Republic of the Congo
+CF CAF Central African Republic|CG COG Congo|CH CHE Switzerland|CI CIV Cote d'Ivoire|CK COK Cook Islands
+CL CHL Chile|CM CMR Cameroon|CN CHN China|CO COL Colombia|CR CRI Costa Rica|CU CUB Cuba|CV CPV Cabo Verde
+CW CUW Curacao|CX CXR Christmas Island|CY CYP Cyprus|CZ CZE Czechia|DE DEU Germany|DJ DJI Djibouti
+DK DNK Denmark|DM DMA Dominica|DO DOM Dominican Republic|DZ DZA Algeria|EC ECU Ecuador|EE EST Estonia
+EG EGY Egypt|EH ESH Western Sahara|ER ERI Eritrea|ES ESP Spain|ET ETH Ethiopia|FI FIN Finland|FJ FJI Fiji
+FK FLK Falkland Islands|FM FSM Micronesia|FO FRO Faroe Islands|FR FRA France|GA GAB Gabon
+GB GBR United Kingdom|GD GRD Grenada|GE GEO Georgia|GF GUF French Guiana|GG GGY Guernsey|GH GHA Ghana
+GI GIB Gibraltar|GL GRL Greenland|GM GMB Gambia|GN GIN Guinea|GP GLP Guadeloupe|GQ GNQ Equatorial Guinea
+GR GRC Greece|GS SGS South Georgia and the South Sandwich Islands|GT GTM Guatemala|GU GUM Guam
+GW GNB Guinea-Bissau|GY GUY Guyana|HK HKG Hong Kong|HM HMD Heard Island and McDonald Islands
+HN HND Honduras|HR HRV Croatia|HT HTI Haiti|HU HUN Hungary|ID IDN Indonesia|IE IRL Ireland|IL ISR Israel
+IM IMN Isle of Man|IN IND India|IO IOT British Indian Ocean Territory|IQ IRQ Iraq|IR IRN Iran
+IS ISL Iceland|IT ITA Italy|JE JEY Jersey|JM JAM Jamaica|JO JOR Jordan|JP JPN Japan|KE KEN Kenya
+KG KGZ Kyrgyzstan|KH KHM Cambodia|KI KIR Kiribati|KM COM Comoros|KN KNA Saint Kitts and Nevis
+KP PRK North Korea|KR KOR South Korea|KW KWT Kuwait|KY CYM Cayman Islands|KZ KAZ Kazakhstan|LA LAO Laos
+LB LBN Lebanon|LC LCA Saint Lucia|LI LIE Liechtenstein|LK LKA Sri Lanka|LR LBR Liberia|LS LSO Lesotho
+LT LTU Lithuania|LU LUX Luxembourg|LV LVA Latvia|LY LBY Libya|MA MAR Morocco|MC MCO Monaco|MD MDA Moldova
+ME MNE Montenegro|MF MAF Saint Martin|MG MDG Madagascar|MH MHL Marshall Islands|MK MKD North Macedonia
+ML MLI Mali|MM MMR Myanmar|MN MNG Mongolia|MO MAC Macao|MP MNP Northern Mariana Islands|MQ MTQ Martinique
+MR MRT Mauritania|MS MSR Montserrat|MT MLT Malta|MU MUS Mauritius|MV MDV Maldives|MW MWI Malawi
+MX MEX Mexico|MY MYS Malaysia|MZ MOZ Mozambique|NA NAM Namibia|NC NCL New Caledonia|NE NER Niger
+NF NFK Norfolk Island|NG NGA Nigeria|NI NIC Nicaragua|NL NLD Netherlands|NO NOR Norway|NP NPL Nepal
+NR NRU Nauru|NU NIU Niue|NZ NZL New Zealand|OM OMN Oman|PA PAN Panama|PE PER Peru|PF PYF French Polynesia
+PG PNG Papua New Guinea|PH PHL Philippines|PK PAK Pakistan|PL POL Poland|PM SPM Saint Pierre and Miquelon
+PN PCN Pitcairn|PR PRI Puerto Rico|PS PSE Palestine|PT PRT Portugal|PW PLW Palau|PY PRY Paraguay
+QA QAT Qatar|RE REU Reunion|RO ROU Romania|RS SRB Serbia|RU RUS Russia|RW RWA Rwanda|SA SAU Saudi Arabia
+SB SLB Solomon Islands|SC SYC Seychelles|SD SDN Sudan|SE SWE Sweden|SG SGP Singapore|SH SHN Saint Helena
+SI SVN Slovenia|SJ SJM Svalbard and Jan Mayen|SK SVK Slovakia|SL SLE Sierra Leone|SM SMR San Marino
+SN SEN Senegal|SO SOM Somalia|SR SUR Suriname|SS SSD South Sudan|ST STP Sao Tome and Principe
+SV SLV El Salvador|SX SXM Sint Maarten|SY SYR Syria|SZ SWZ Eswatini|TC TCA Turks and Caicos Islands
+TD TCD Chad|TF ATF French Southern Territories|TG TGO Togo|TH THA Thailand|TJ TJK Tajikistan|TK TKL Tokelau
+TL TLS Timor-Leste|TM TKM Turkmenistan|TN TUN Tunisia|TO TON Tonga|TR TUR Turkey|TT TTO Trinidad and Tobago
+TV TUV Tuvalu|TW TWN Taiwan|TZ TZA Tanzania|UA UKR Ukraine|UG UGA Uganda
+UM UMI United States Minor Outlying Islands|US USA United States|UY URY Uruguay|UZ UZB Uzbekistan
+VA VAT Holy See|VC VCT Saint Vincent and the Grenadines|VE VEN Venezuela|VG VGB British Virgin Islands
+VI VIR US Virgin Islands|VN VNM Viet Nam|VU VUT Vanuatu|WF WLF Wallis and Futuna|WS WSM Samoa|YE YEM Yemen
+YT MYT Mayotte|ZA ZAF South Africa|ZM ZMB Zambia|ZW ZWE Zimbabwe
+"""
+
+# Common alternative country names, mapped to ISO alpha-3
+_COUNTRY_ALIASES = {
+    "united states of america": "USA", "america": "USA", "u s": "USA", "u s a": "USA",
+    "great britain": "GBR", "britain": "GBR", "uk": "GBR", "england": "GBR", "scotland": "GBR",
+    "wales": "GBR", "northern ireland": "GBR",
+    "russian federation": "RUS",
+    "republic of korea": "KOR", "korea": "KOR", "korea republic of": "KOR",
+    "democratic people s republic of korea": "PRK",
+    "czech republic": "CZE",
+    "vietnam": "VNM",
+    "turkiye": "TUR",
+    "holland": "NLD", "the netherlands": "NLD",
+    "ivory coast": "CIV",
+    "cape verde": "CPV",
+    "swaziland": "SWZ",
+    "macedonia": "MKD",
+    "burma": "MMR",
+    "east timor": "TLS",
+    "vatican": "VAT", "vatican city": "VAT",
+    "iran islamic republic of": "IRN",
+    "syrian arab republic": "SYR",
+    "lao people s democratic republic": "LAO",
+    "tanzania united republic of": "TZA",
+    "bolivia plurinational state of": "BOL",
+    "venezuela bolivarian republic of": "VEN",
+    "moldova republic of": "MDA",
+    "republic of the congo": "COG", "congo brazzaville": "COG",
+    "drc": "COD", "dr congo": "COD", "congo kinshasa": "COD",
+    "uae": "ARE",
+    "the bahamas": "BHS",
+    "the gambia": "GMB",
+}
+
+# Canonical words after which a written "St" is a street suffix and before which it is not
+_DIRECTIONALS = frozenset(("n", "s", "e", "w", "ne", "nw", "se", "sw"))
+_UNITS = frozenset(("apt", "ste", "bldg", "fl", "rm", "unit"))
+
+_PUNCTUATION = re.compile(r"[\W_]+")
+_POSTAL_SEPARATORS = re.compile(r"[\s.]+")
+
+
+def _has_digit(word: str) -> bool:
+    return any(ch.isdigit() for ch in word)
+
+
+def _expand_st(words: list, i: int) -> str:
+    """
+    Return "saint" or "st" (street) for a written "St" at words[i], given the canonical
+    words around it. It reads as Saint when it leads a name: at the start of the field or
+    after a house number or directional, and followed by a word that is not a directional,
+    unit designator or number ("St Paul Ave", "12 St Marks Pl", "N St Marys Rd"). Anywhere
+    else it is the street suffix ("Main St", "Main St New York", "1 E St NW").
+    """
+    before = words[i - 1] if i else None
+    after = words[i + 1] if i + 1 < len(words) else None
+    leading = before is None or before in _DIRECTIONALS or _has_digit(before)
+    named = after is not None and after not in _DIRECTIONALS and after not in _UNITS and not _has_digit(after)
+    return "saint" if leading and named else "st"
+
+
+def normalize_text(value) -> str:
+    """
+    Return a canonical form of a free-text address field: Unicode-normalized, accents
+    removed, casefolded, punctuation (including "#") dropped, whitespace collapsed and common street
+    words abbreviated, with a written "St" read as Saint or Street by its position.
+    """
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    words = text.split()
+    canonical = [ABBREVIATIONS.get(word, word) for word in words]
+    if "st" in words:
+        for i, word in enumerate(words):
+            if word == "st":
+                canonical[i] = _expand_st(canonical, i)
+    return " ".join(canonical)
+
+
+def _build_countries() -> dict:
+    countries = {}
+    for entry in _COUNTRIES.replace("\n", "|").split("|"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        iso2, iso3, name = entry.split(" ", 2)
+        countries[iso2.casefold()] = iso3
+        countries[iso3.casefold()] = iso3
+        countries[" ".join(_PUNCTUATION.sub(" ", name.casefold()).split())] = iso3
+    countries.update(_COUNTRY_ALIASES)
+    return countries
+
+
+_COUNTRY_CODES = _build_countries()
+
+
+def normalize_country(value) -> str:
+    """
+    Return the ISO 3166-1 alpha-3 code for a country given as an ISO-2 or ISO-3 code or
+    a common name; anything unrecognized is returned as normalized text.
+    """
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = " ".join(_PUNCTUATION.sub(" ", text).split())
+    return _COUNTRY_CODES.get(text) or _COUNTRY_CODES.get(text.replace(" ", "")) or text
+
+
+def normalize_postal_code(value) -> str:
+    """
+    Return a postal code uppercased with spaces and dots removed ("sw1a 1aa" -> "SW1A1AA").
+    """
+    if value is None:
+        return ""
+    return _POSTAL_SEPARATORS.sub("", str(value)).upper()
+
+
+def normalize_address(record: dict) -> dict:
+    """
+    Return the normalized address fields of a place_search record dict.
+    """
+    out = {}
+    for field in ADDRESS_FIELDS:
+        value = record.get(field)
+        if field == "country":
+            out[field] = normalize_country(value)
+        elif field == "postal_code":
+            out[field] = normalize_postal_code(value)
+        else:
+            out[field] = normalize_text(value)
+    return out
+
+
+def address_key(record: dict) -> str:
+    """
+    Return a stable key for a place_search record dict: its normalized address fields
+    plus its search options, hashed.
+    """
+    normalized = normalize_address(record)
+    parts = [normalized[field] for field in ADDRESS_FIELDS]
+    parts.extend("" if record.get(field) is None else str(record.get(field)).strip() for field in OPTION_FIELDS)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AddressDeduplicator:
+    """
+    Thread-safe memo of results by address key: the first row with a key makes the
+    request, concurrent rows with the same key wait for it, and later rows reuse its
+    result. Failed requests are not remembered, so a later duplicate retries.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the deduplicator.
+
+        Parameters:
+            max_entries (int): Maximum results remembered, least recently used evicted first,
+                as in ResponseCache; None remembers every distinct address in the batch.
+        """
+        self.max_entries = max_entries
+
+        self._results = OrderedDict()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._requests = 0
+        self._evictions = 0
+
+    def call(self, key: str, fn):
+        """
+        Return the result for key, calling fn() only if no row with this key has
+        succeeded yet (and none is in flight).
+        """
+        with self._lock:
+            self._calls += 1
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        def fetch():
+            # Re-check under the flight: an earlier leader may have just stored the result
+            with self._lock:
+                if key in self._results:
+                    return self._results[key]
+                self._requests += 1
+            result = fn()
+            with self._lock:
+                self._results[key] = result
+                while self.max_entries is not None and len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+                    self._evictions += 1
+            return result
+
+        return self._flight.do(key, fetch)
+
+    def stats(self) -> dict:
+        """
+        Return the number of rows seen, upstream requests made, rows served without a request,
+        and results remembered and evicted.
+        """
+        with self._lock:
+            return {
+                "rows": self._calls,
+                "requests": self._requests,
+                "deduplicated": self._calls - self._requests,
+                "remembered": len(self._results),
+                "evictions": self._evictions,
+            }
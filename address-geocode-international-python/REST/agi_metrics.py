@@ -0,0 +1,196 @@
+'''
+Service Objects - AGI Call Metrics
+
+This module provides AGIMetrics, an optional, thread-safe metrics collector for AGI
+calls. Pass one instance as metrics= to AGIRestClient, AsyncAGIRestClient or the SOAP
+PlaceSearch / ReverseSearch classes (they may all share it) to record:
+
+    agi_request_duration_seconds  histogram {endpoint, phase}   phase: connect, ttfb, total
+    agi_calls_total               counter   {operation, outcome}
+    agi_errors_total              counter   {endpoint, type_code}
+    agi_in_flight_requests        gauge     {endpoint}
+
+Outcomes are primary_success, backup_fallback, hedge_win, failure, trial_success and
+trial_error, plus retry (one per retry a RetryPolicy made) and deadline_exceeded. Error type codes are the AGI Error.TypeCode values, plus "network" for
+connection, timeout and HTTP failures ("fault" for SOAP faults). Endpoints are labelled
+by host name.
+
+Metrics can be read with to_prometheus() (Prometheus text format), served over HTTP
+with start_http_server(), or forwarded to another system with add_hook().
+
+Classes:
+    AGIMetrics(buckets: tuple = DEFAULT_BUCKETS)
+'''
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from circuit_breaker import endpoint_key
+
+# Latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class AGIMetrics:
+    """
+    Thread-safe latency histograms, outcome/error counters and in-flight gauges.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """
+        Initialize the metrics collector.
+
+        Parameters:
+            buckets (tuple): Ascending latency histogram bucket upper bounds in seconds.
+        """
+        self.buckets = tuple(sorted(buckets))
+
+        self._histograms = {}
+        self._calls = {}
+        self._errors = {}
+        self._in_flight = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook) -> None:
+        """
+        Register hook(event, labels, value), called after each recorded event.
+        Events are "latency", "call", "error" and "in_flight".
+        """
+        self._hooks.append(hook)
+
+    def _emit(self, event: str, labels: dict, value) -> None:
+        for hook in self._hooks:
+            hook(event, labels, value)
+
+    def observe(self, url: str, phase: str, seconds: float) -> None:
+        """
+        Record the duration of a request phase (connect, ttfb or total) against an endpoint.
+        """
+        key = (endpoint_key(url), phase)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(self.buckets, seconds)] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+        if self._hooks:
+            self._emit("latency", {"endpoint": key[0], "phase": phase}, seconds)
+
+    def record_call(self, operation: str, outcome: str) -> None:
+        """
+        Count how a call was answered (primary_success, backup_fallback, hedge_win,
+        failure, trial_success or trial_error), or a retry / deadline_exceeded event.
+        """
+        key = (operation, outcome)
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+        if self._hooks:
+            self._emit("call", {"operation": operation, "outcome": outcome}, 1)
+
+    def record_error(self, url: str, type_code) -> None:
+        """
+        Count an error returned by an endpoint: an Error.TypeCode, or "network".
+        """
+        key = (endpoint_key(url), str(type_code))
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+        if self._hooks:
+            self._emit("error", {"endpoint": key[0], "type_code": key[1]}, 1)
+
+    def in_flight(self, url: str, delta: int) -> None:
+        """
+        Adjust the number of requests in flight against an endpoint.
+        """
+        key = endpoint_key(url)
+        with self._lock:
+            value = self._in_flight[key] = self._in_flight.get(key, 0) + delta
+        if self._hooks:
+            self._emit("in_flight", {"endpoint": key}, value)
+
+    def snapshot(self) -> dict:
+        """
+        Return a copy of all metrics as plain dicts keyed by label tuples.
+        """
+        with self._lock:
+            return {
+                "latency": {key: {"buckets": list(h[0]), "sum": h[1], "count": h[2]}
+                            for key, h in self._histograms.items()},
+                "calls": dict(self._calls),
+                "errors": dict(self._errors),
+                "in_flight": dict(self._in_flight),
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Return all metrics in the Prometheus text exposition format.
+        """
+        snap = self.snapshot()
+        lines = [
+            "# HELP agi_request_duration_seconds AGI request latency by endpoint and phase.",
+            "# TYPE agi_request_duration_seconds histogram",
+        ]
+        for (endpoint, phase), h in sorted(snap["latency"].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), h["buckets"]):
+                cumulative += count
+                labels = _labels(("endpoint", "phase", "le"), (endpoint, phase, _number(bound)))
+                lines.append(f"agi_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(("endpoint", "phase"), (endpoint, phase))
+            lines.append(f"agi_request_duration_seconds_sum{labels} {_number(h['sum'])}")
+            lines.append(f"agi_request_duration_seconds_count{labels} {h['count']}")
+
+        lines.append("# HELP agi_calls_total AGI calls by operation and outcome.")
+        lines.append("# TYPE agi_calls_total counter")
+        for (operation, outcome), count in sorted(snap["calls"].items()):
+            lines.append(f"agi_calls_total{_labels(('operation', 'outcome'), (operation, outcome))} {count}")
+
+        lines.append("# HELP agi_errors_total AGI errors by endpoint and Error.TypeCode.")
+        lines.append("# TYPE agi_errors_total counter")
+        for (endpoint, type_code), count in sorted(snap["errors"].items()):
+            lines.append(f"agi_errors_total{_labels(('endpoint', 'type_code'), (endpoint, type_code))} {count}")
+
+        lines.append("# HELP agi_in_flight_requests AGI requests currently in flight by endpoint.")
+        lines.append("# TYPE agi_in_flight_requests gauge")
+        for endpoint, value in sorted(snap["in_flight"].items()):
+            lines.append(f"agi_in_flight_requests{_labels(('endpoint',), (endpoint,))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int, addr: str = "") -> ThreadingHTTPServer:
+        """
+        Serve to_prometheus() at /metrics from a daemon thread. Returns the server;
+        call shutdown() on it to stop.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, name="agi-metrics", daemon=True).start()
+        return server
@@ -0,0 +1,239 @@
+'''
+Service Objects - AGI Response Model
+
+Compact, __slots__-based result classes for AGI PlaceSearch / ReverseSearch responses,
+shared by both transports: build them from a REST JSON dict with from_dict, or from a
+SOAP (suds) response object with from_soap. Every field is copied into slots when the
+object is built, so no reference to the raw response is kept and a batch of results
+takes less memory than the dicts it was built from. A location's address components are
+packed into one tuple of the values present and decoded into AddressComponents on first
+access, so code that only reads coordinates never builds them.
+
+Classes:
+    SearchInfo, AddressComponents, LocationInfo, Error, PSResponse, RSResponse
+'''
+
+# Location-level fields; every other field of a flat SOAP location is an address component
+LOCATION_FIELDS = ("PrecisionLevel", "Type", "Latitude", "Longitude")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Model:
+    __slots__ = ()
+
+    def _fields(self):
+        for klass in reversed(type(self).__mro__):
+            for name in getattr(klass, "__slots__", ()):
+                if not name.startswith("_"):
+                    yield name
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self._fields()}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+
+class SearchInfo(_Model):
+    __slots__ = ("Status", "NumberOfLocations", "Notes", "NotesDesc", "Warnings", "WarningDesc")
+
+    def __init__(self, data: dict = None):
+        data = data or {}
+        self.Status = data.get("Status")
+        self.NumberOfLocations = _to_int(data.get("NumberOfLocations"))
+        self.Notes = data.get("Notes")
+        self.NotesDesc = data.get("NotesDesc")
+        self.Warnings = data.get("Warnings")
+        self.WarningDesc = data.get("WarningDesc")
+
+
+class AddressComponents(_Model):
+    __slots__ = (
+        "PremiseNumber",
+        "Thoroughfare",
+        "DoubleDependentLocality",
+        "DependentLocality",
+        "Locality",
+        "AdministrativeArea1",
+        "AdministrativeArea1Abbreviation",
+        "AdministrativeArea2",
+        "AdministrativeArea2Abbreviation",
+        "AdministrativeArea3",
+        "AdministrativeArea3Abbreviation",
+        "AdministrativeArea4",
+        "AdministrativeArea4Abbreviation",
+        "PostalCode",
+        "Country",
+        "CountryISO2",
+        "CountryISO3",
+        "GoogleMapsURL",
+        "PlaceName",
+        "IsUnincorporated",
+        "StateFIPS",
+        "CountyFIPS",
+        "CensusTract",
+        "CensusBlock",
+        "CensusGeoID",
+        "ClassFP",
+        "CongressCode",
+        "SLDUST",
+        "SLDLST",
+        "TimeZone_UTC",
+    )
+
+    def __init__(self, data: dict = None):
+        get = (data or {}).get
+        for name in self.__slots__:
+            setattr(self, name, get(name))
+
+    @classmethod
+    def pack(cls, data: dict) -> tuple:
+        """
+        Return (presence bitmask, *values present) for the component fields of a dict, in
+        slot order, or None when none is set.
+        """
+        mask = 0
+        values = []
+        for bit, name in enumerate(cls.__slots__):
+            value = data.get(name)
+            if value is not None:
+                mask |= 1 << bit
+                values.append(value)
+        return (mask, *values) if mask else None
+
+    @classmethod
+    def unpack(cls, packed: tuple) -> "AddressComponents":
+        """
+        Build the components from a tuple returned by pack.
+        """
+        components = cls.__new__(cls)
+        mask = packed[0]
+        values = iter(packed[1:])
+        for bit, name in enumerate(cls.__slots__):
+            setattr(components, name, next(values) if mask >> bit & 1 else None)
+        return components
+
+
+class LocationInfo(_Model):
+    __slots__ = ("PrecisionLevel", "Type", "Latitude", "Longitude", "_packed", "_components")
+
+    def __init__(self, data: dict = None, components: dict = None):
+        """
+        Build a location from its fields; components holds the address component fields
+        when they are not nested under data["AddressComponents"]. They are packed now, so
+        the raw dict is not kept alive, and decoded on first access of AddressComponents.
+        """
+        data = data or {}
+        self.PrecisionLevel = _to_int(data.get("PrecisionLevel"))
+        self.Type = data.get("Type")
+        self.Latitude = _to_float(data.get("Latitude"))
+        self.Longitude = _to_float(data.get("Longitude"))
+        components = components if components is not None else data.get("AddressComponents")
+        self._packed = AddressComponents.pack(components) if components else None
+        self._components = None
+
+    @property
+    def AddressComponents(self) -> AddressComponents:
+        if self._components is None and self._packed is not None:
+            self._components = AddressComponents.unpack(self._packed)
+            self._packed = None
+        return self._components
+
+    def _fields(self):
+        yield from super()._fields()
+        yield "AddressComponents"
+
+    def to_dict(self) -> dict:
+        out = super().to_dict()
+        components = self.AddressComponents
+        out["AddressComponents"] = components.to_dict() if components is not None else None
+        return out
+
+    @classmethod
+    def from_flat(cls, fields: dict) -> "LocationInfo":
+        """
+        Build a location from a flat SOAP field dict mixing location and address component fields.
+        """
+        return cls(fields, {k: v for k, v in fields.items() if k not in LOCATION_FIELDS})
+
+
+class Error(_Model):
+    __slots__ = ("Type", "TypeCode", "Desc", "DescCode")
+
+    def __init__(self, data: dict = None):
+        data = data or {}
+        self.Type = data.get("Type")
+        self.TypeCode = data.get("TypeCode")
+        self.Desc = data.get("Desc")
+        self.DescCode = data.get("DescCode")
+
+
+class PSResponse(_Model):
+    """
+    PlaceSearch response.
+    """
+    __slots__ = ("SearchInfo", "Locations", "Error")
+
+    def __init__(self, search_info: SearchInfo = None, locations: list = None, error: Error = None):
+        self.SearchInfo = search_info
+        self.Locations = locations or []
+        self.Error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "SearchInfo": self.SearchInfo.to_dict() if self.SearchInfo else None,
+            "Locations": [location.to_dict() for location in self.Locations],
+            "Error": self.Error.to_dict() if self.Error else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Build the response from a parsed REST JSON response.
+        """
+        return cls(
+            SearchInfo(data["SearchInfo"]) if data.get("SearchInfo") else None,
+            [LocationInfo(location) for location in data.get("Locations") or []],
+            Error(data["Error"]) if data.get("Error") else None,
+        )
+
+    @classmethod
+    def from_soap(cls, resp_obj):
+        """
+        Build the response from a suds response object (Response -> Key/Value.Result -> Field).
+        """
+        search_info = None
+        error = None
+        locations = []
+        for resp in getattr(resp_obj, "Response", None) or []:
+            key = resp.Key
+            for field_obj in getattr(resp.Value, "Result", None) or []:
+                fields = {field.Key: field.Value for field in getattr(field_obj, "Field", None) or []}
+                if key == "SearchInfo":
+                    search_info = SearchInfo(fields)
+                elif key == "Error":
+                    error = Error(fields)
+                elif "Locations" in key:
+                    locations.append(LocationInfo.from_flat(fields))
+        return cls(search_info, locations, error)
+
+
+class RSResponse(PSResponse):
+    """
+    ReverseSearch response; same shape as PSResponse.
+    """
+    __slots__ = ()
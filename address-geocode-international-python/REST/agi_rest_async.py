@@ -0,0 +1,653 @@
+'''
+Service Objects - AGI REST Async Client
+
+This module provides asyncio equivalents of place_search and reverse_search built on
+aiohttp. Calls share one pooled keep-alive connector per event loop, are capped by a
+configurable concurrency limit per event loop, and follow the same primary-to-backup
+fallback as the synchronous functions. A client may be used from several threads, each
+running its own loop; every loop gets its own session, which is only closed on that loop.
+
+Classes:
+    AsyncAGIRestClient(max_concurrency: int = 100,
+                limit_per_host: int = 100,
+                keepalive_timeout: float = 30,
+                timeout: float = 10,
+                health: EndpointHealthTracker = None,
+                hedge: HedgePolicy = None,
+                coalesce: bool = False,
+                metrics: AGIMetrics = None,
+                rate_limiter: TokenBucket = None,
+                concurrency: AdaptiveConcurrency = None,
+                retry: RetryPolicy = None,
+                deadline_s: float = None,
+                snapshot: WarmSnapshot = None)
+
+Functions:
+    get_default_async_client() -> AsyncAGIRestClient
+    place_search_async(...) -> dict
+    reverse_search_async(...) -> dict
+'''
+
+import asyncio
+import threading
+import time
+import weakref
+
+import aiohttp
+
+from agi_metrics import AGIMetrics
+from agi_rest_client import is_fatal_error
+from circuit_breaker import EndpointHealthTracker, get_default_tracker
+from hedging import HedgePolicy
+from rate_limit import CONGESTION_STATUSES, AdaptiveConcurrency, TokenBucket
+from response_cache import cache_key
+from retry_policy import AGIResponseError, AGIUnavailableError, Deadline, DeadlineExceeded, RetryPolicy
+from single_flight import AsyncSingleFlight
+from warm_snapshot import WarmSnapshot
+import place_search_rest
+import reverse_search_rest
+
+# Errors treated as network/HTTP failures that trigger the backup endpoint; ValueError
+# (which includes aiohttp.ContentTypeError) covers a truncated or non-JSON body, as the
+# sync client does through requests' JSONDecodeError. DeadlineExceeded is a TimeoutError,
+# as asyncio.TimeoutError is on Python 3.11+, so it is re-raised before these are caught.
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+
+class AsyncAGIRestClient:
+    """
+    Async AGI REST client with a shared connection pool and a concurrency cap.
+    """
+
+    def __init__(self,
+                max_concurrency: int = 100,
+                limit_per_host: int = 100,
+                keepalive_timeout: float = 30,
+                timeout: float = 10,
+                health: EndpointHealthTracker = None,
+                hedge: HedgePolicy = None,
+                coalesce: bool = False,
+                metrics: AGIMetrics = None,
+                rate_limiter: TokenBucket = None,
+                concurrency: AdaptiveConcurrency = None,
+                retry: RetryPolicy = None,
+                deadline_s: float = None,
+                snapshot: WarmSnapshot = None):
+        """
+        Initialize the async AGI REST client.
+
+        Parameters:
+            max_concurrency (int): Maximum number of requests in flight at once on each event loop.
+            limit_per_host (int): Maximum number of pooled connections per host.
+            keepalive_timeout (float): Seconds an idle pooled connection is kept open.
+            timeout (float): Per-request timeout in seconds; shortened to fit a call's deadline.
+            health (EndpointHealthTracker): Circuit breakers used to skip an unhealthy primary;
+                defaults to the shared process-wide tracker.
+            hedge (HedgePolicy): Optional hedging policy; a slow primary is raced against
+                the backup and the losing request is cancelled.
+            coalesce (bool): Share one upstream request between concurrent identical calls.
+            metrics (AGIMetrics): Optional collector for latency, outcome, error and in-flight metrics.
+            rate_limiter (TokenBucket): Optional cap on requests per second; may be shared with
+                other clients, sync or async.
+            concurrency (AdaptiveConcurrency): Optional adaptive (AIMD) cap on requests in flight;
+                may be shared with other clients, sync or async.
+            retry (RetryPolicy): Optional policy for retrying a failed call with backoff and jitter.
+            deadline_s (float): Default total time budget per call, covering every attempt and
+                backoff; None for no deadline.
+            snapshot (WarmSnapshot): Optional pre-warmed responses answered before any request;
+                may be shared with sync clients. Stale entries are returned at once and
+                refreshed in a background task.
+        """
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.health = health or get_default_tracker()
+        self.hedge = hedge
+        self.single_flight = AsyncSingleFlight() if coalesce else None
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry
+        self.deadline_s = deadline_s
+        self.snapshot = snapshot
+
+        # (session, semaphore) per event loop; an entry goes away with its loop
+        self._sessions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._refresh_tasks = set()
+        self._closing = set()
+
+    def _bind(self) -> tuple:
+        """
+        Return the (session, semaphore) pair for the running event loop, creating it on
+        first use on that loop. Sessions left open by loops that have since been closed
+        are released; a session bound to a loop that is still running is never touched.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            bound = self._sessions.get(loop)
+            if bound is not None and not bound[0].closed:
+                return bound
+            stale = [(other, session) for other, (session, _) in self._sessions.items() if other.is_closed()]
+            for other, _ in stale:
+                del self._sessions[other]
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout,
+                                             ttl_dns_cache=300)
+            trace_configs = [self._connect_trace()] if self.metrics is not None else None
+            session = aiohttp.ClientSession(connector=connector,
+                                            timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                            trace_configs=trace_configs)
+            bound = self._sessions[loop] = (session, asyncio.Semaphore(self.max_concurrency))
+        for _, session in stale:
+            if not session.closed:
+                self._release(session)
+        return bound
+
+    def _release(self, session: aiohttp.ClientSession) -> None:
+        """
+        Close, from the running loop, a session whose own event loop is no longer running.
+        Its connections can no longer be closed on their loop, so this mostly marks the
+        session and connector closed; release_loop() before the loop ends avoids that.
+        """
+        async def close():
+            try:
+                await session.close()
+            except RuntimeError:
+                # Closing waited on the stopped loop; detach so the session is not reported unclosed
+                session.detach()
+
+        # Keep a reference so the task is not garbage collected before it finishes
+        task = asyncio.ensure_future(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _connect_trace(self) -> aiohttp.TraceConfig:
+        """
+        Return a trace config that records new connection setup time on self.metrics.
+        """
+        async def on_start(session, ctx, params):
+            ctx.connect_started = time.perf_counter()
+
+        async def on_end(session, ctx, params):
+            url = ctx.trace_request_ctx or ""
+            self.metrics.observe(url, "connect", time.perf_counter() - ctx.connect_started)
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_start.append(on_start)
+        trace.on_connection_create_end.append(on_end)
+        return trace
+
+    async def get(self, url: str, params: dict, deadline: Deadline = None) -> dict:
+        """
+        Issue a GET through the pooled session and return the parsed JSON body.
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: On network/HTTP failures.
+            ValueError: If the body is not valid JSON.
+            DeadlineExceeded: If the deadline leaves no time for the request.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        if self.concurrency is None:
+            return await self._get(url, params, deadline)
+
+        await self.concurrency.acquire_async()
+        started = time.perf_counter()
+        # A timeout, an overload status or a service-error payload from a request that was
+        # sent is congestion; a cancelled request (e.g. a hedge loser), an exhausted deadline
+        # or any other failure leaves the limit alone
+        ok = None
+        try:
+            data = await self._get(url, params, deadline)
+            ok = not is_fatal_error(data)
+            return data
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError:
+            ok = False
+            raise
+        except aiohttp.ClientResponseError as ex:
+            if ex.status in CONGESTION_STATUSES:
+                ok = False
+            raise
+        finally:
+            self.concurrency.release(time.perf_counter() - started, ok)
+
+    async def _get(self, url: str, params: dict, deadline: Deadline) -> dict:
+        """
+        Issue the GET itself, measured when metrics are configured.
+        """
+        session, semaphore = self._bind()
+        # aiohttp rejects None query values; requests drops them, so do the same
+        query = {k: str(v) for k, v in params.items() if v is not None}
+        if self.metrics is not None:
+            return await self._measured_get(session, semaphore, url, query, deadline)
+        async with semaphore:
+            async with session.get(url, params=query, timeout=self._timeout(deadline)) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def _measured_get(self,
+                        session: aiohttp.ClientSession,
+                        semaphore: asyncio.Semaphore,
+                        url: str,
+                        query: dict,
+                        deadline: Deadline) -> dict:
+        """
+        get() that records latency, errors and in-flight requests on self.metrics.
+        """
+        metrics = self.metrics
+        async with semaphore:
+            timeout = self._timeout(deadline)
+            metrics.in_flight(url, 1)
+            started = time.perf_counter()
+            try:
+                async with session.get(url, params=query, timeout=timeout, trace_request_ctx=url) as response:
+                    metrics.observe(url, "ttfb", time.perf_counter() - started)
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            except NETWORK_ERRORS:
+                metrics.record_error(url, "network")
+                raise
+            finally:
+                metrics.observe(url, "total", time.perf_counter() - started)
+                metrics.in_flight(url, -1)
+
+        error = data.get("Error") if isinstance(data, dict) else None
+        if error:
+            metrics.record_error(url, error.get("TypeCode", ""))
+        return data
+
+    def _timeout(self, deadline: Deadline):
+        """
+        Return the request timeout for an attempt, shortened to fit the deadline if there is one.
+        Called once the concurrency slot is held, so time spent queued counts against the deadline.
+        """
+        if deadline is None:
+            return aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientTimeout(total=deadline.timeout(self.timeout))
+
+    def _record_call(self, operation: str, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.record_call(operation, outcome)
+
+    async def call(self,
+                operation: str,
+                params: dict,
+                is_live: bool,
+                primary_url: str,
+                backup_url: str,
+                trial_url: str,
+                deadline: Deadline = None) -> dict:
+        """
+        Call an AGI operation with the standard primary-to-backup fallback.
+
+        Parameters:
+            deadline (Deadline): Time budget for this call; defaults to a new Deadline(self.deadline_s)
+                when deadline_s is set.
+
+        Raises:
+            RuntimeError: If both live endpoints fail, the backup returns an error
+                payload, or the trial endpoint is unreachable (AGIUnavailableError or
+                AGIResponseError), or the deadline runs out (DeadlineExceeded).
+        """
+        if self.snapshot is not None:
+            data = self._snapshot_get(operation, params, is_live, primary_url, backup_url, trial_url)
+            if data is not None:
+                return data
+        if deadline is None and self.deadline_s is not None:
+            deadline = Deadline(self.deadline_s)
+        if self.single_flight is not None:
+            key = cache_key(operation, params, is_live)
+            return await self.single_flight.do(
+                key, lambda: self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline),
+                deadline)
+        return await self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+
+    def _snapshot_get(self,
+                operation: str,
+                params: dict,
+                is_live: bool,
+                primary_url: str,
+                backup_url: str,
+                trial_url: str) -> dict:
+        """
+        Return the snapshot's response for a call, or None, also when the call's endpoint or
+        license key is not the snapshot's. A stale response is still returned, and a
+        background refresh task is started unless one is already running.
+        """
+        if not self.snapshot.accepts(params, primary_url if is_live else trial_url):
+            return None
+        key = self.snapshot.key(operation, params, is_live)
+        entry = self.snapshot.get(key)
+        if entry is None:
+            return None
+        data, stale = entry
+        if stale and self.snapshot.begin_refresh(key):
+            async def refresh():
+                fresh = None
+                try:
+                    deadline = Deadline(self.deadline_s) if self.deadline_s is not None else None
+                    fresh = await self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+                except Exception:
+                    pass
+                finally:
+                    self.snapshot.refreshed(operation, params, is_live, fresh)
+
+            # Keep a reference so the task is not garbage collected before it finishes
+            task = asyncio.ensure_future(refresh())
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return data
+
+    async def _call(self,
+                operation: str,
+                params: dict,
+                is_live: bool,
+                primary_url: str,
+                backup_url: str,
+                trial_url: str,
+                deadline: Deadline) -> dict:
+        """
+        Perform the uncoalesced call for an AGI operation, retried per self.retry.
+        """
+        try:
+            if self.retry is None:
+                return await self._call_once(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+
+            retries = 0
+            while True:
+                failure = None
+                try:
+                    data = await self._call_once(operation, params, is_live, primary_url, backup_url, trial_url,
+                                                 deadline)
+                    if not self.retry.is_retryable_response(data):
+                        return data
+                except RuntimeError as ex:
+                    if not self.retry.is_retryable_exception(ex):
+                        raise
+                    failure = ex
+
+                delay = self.retry.backoff(retries)
+                retries += 1
+                # Give up when attempts run out or the backoff would not leave time for another attempt
+                if retries >= self.retry.max_attempts or (
+                        deadline is not None and deadline.remaining() - delay < deadline.min_attempt_s):
+                    if failure is not None:
+                        raise failure
+                    return data
+                self._record_call(operation, "retry")
+                await asyncio.sleep(delay)
+        except DeadlineExceeded:
+            self._record_call(operation, "deadline_exceeded")
+            raise
+
+    async def _call_once(self,
+                operation: str,
+                params: dict,
+                is_live: bool,
+                primary_url: str,
+                backup_url: str,
+                trial_url: str,
+                deadline: Deadline) -> dict:
+        """
+        Perform one primary-to-backup (or trial) attempt for an AGI operation.
+        """
+        if not is_live:
+            try:
+                # Trial mode should not fallback; error payloads are returned as-is
+                data = await self.get(trial_url, params, deadline)
+            except DeadlineExceeded:
+                raise
+            except NETWORK_ERRORS as req_exc:
+                self._record_call(operation, "trial_error")
+                raise AGIUnavailableError(f"AGI trial error: {str(req_exc)}") from req_exc
+            self._record_call(operation, "trial_success")
+            return data
+
+        # Skip the primary entirely while its circuit is open
+        primary = self.health.breaker(primary_url)
+        if primary.allow_request():
+            if self.hedge is not None:
+                return await self._hedged_call(operation, params, primary, primary_url, backup_url, deadline)
+            data = await self._attempt(primary, primary_url, params, deadline, is_primary=True)
+            if data is not None and not is_fatal_error(data):
+                self._record_call(operation, "primary_success")
+                return data
+
+        return await self._backup_call(operation, params, backup_url, deadline)
+
+    async def _attempt(self, breaker, url: str, params: dict, deadline: Deadline = None, is_primary: bool = False):
+        """
+        Call one endpoint and record the outcome on its breaker. Returns the parsed
+        response, or None on a network/HTTP failure.
+        """
+        started = time.perf_counter()
+        try:
+            data = await self.get(url, params, deadline)
+        except DeadlineExceeded:
+            raise
+        except NETWORK_ERRORS:
+            breaker.record_failure()
+            return None
+
+        if is_fatal_error(data):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            if self.hedge is not None and is_primary:
+                self.hedge.record_latency(time.perf_counter() - started)
+        return data
+
+    async def _backup_call(self, operation: str, params: dict, backup_url: str, deadline: Deadline = None) -> dict:
+        """
+        Call the backup endpoint after the primary failed or was skipped.
+        """
+        backup = self.health.breaker(backup_url)
+        try:
+            data = await self.get(backup_url, params, deadline)
+        except DeadlineExceeded:
+            raise
+        except NETWORK_ERRORS as backup_exc:
+            backup.record_failure()
+            self._record_call(operation, "failure")
+            raise AGIUnavailableError(f"AGI {operation} unreachable on both endpoints") from backup_exc
+
+        if is_fatal_error(data):
+            backup.record_failure()
+        else:
+            backup.record_success()
+        if "Error" in data:
+            self._record_call(operation, "failure")
+            raise AGIResponseError(f"AGI {operation} backup error: {data['Error']}", data["Error"])
+        self._record_call(operation, "backup_fallback")
+        return data
+
+    async def _hedged_call(self,
+                        operation: str,
+                        params: dict,
+                        primary,
+                        primary_url: str,
+                        backup_url: str,
+                        deadline: Deadline = None) -> dict:
+        """
+        Send the request to the primary and, if it has not answered within the hedge
+        delay and budget allows, to the backup as well; the first good answer wins
+        and the other request is cancelled.
+        """
+        self.hedge.note_request()
+        started = time.perf_counter()
+        primary_task = asyncio.ensure_future(self._attempt(primary, primary_url, params, deadline, is_primary=True))
+
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge.delay())
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        if not done and self.hedge.try_acquire():
+            backup_task = asyncio.ensure_future(self._attempt(self.health.breaker(backup_url), backup_url, params,
+                                                              deadline))
+            pending = {primary_task, backup_task}
+            backup_data = None
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result = task.result()
+                        if task is backup_task:
+                            backup_data = result
+                            won = result is not None and "Error" not in result
+                        else:
+                            won = result is not None and not is_fatal_error(result)
+                        if won:
+                            if task is backup_task and not primary_task.done():
+                                # The primary is cancelled, so record its time so far as a censored
+                                # sample; learning only from fast samples would drag the delay down
+                                self.hedge.record_latency(time.perf_counter() - started)
+                            self.hedge.record_win(task is backup_task)
+                            self._record_call(operation, "hedge_win" if task is backup_task else "primary_success")
+                            return result
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            self._record_call(operation, "failure")
+            if backup_data is None:
+                raise AGIUnavailableError(f"AGI {operation} unreachable on both endpoints")
+            raise AGIResponseError(f"AGI {operation} backup error: {backup_data['Error']}", backup_data["Error"])
+
+        data = await primary_task
+        if data is not None and not is_fatal_error(data):
+            self._record_call(operation, "primary_success")
+            return data
+        return await self._backup_call(operation, params, backup_url, deadline)
+
+    async def release_loop(self) -> None:
+        """
+        Close the session bound to the running event loop, leaving those of other loops open.
+        Call it before a worker thread's loop ends when several threads share the client.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            bound = self._sessions.pop(loop, None)
+        if bound is not None and not bound[0].closed:
+            await bound[0].close()
+
+    async def close(self) -> None:
+        """
+        Close the pooled sessions and release their connections, cancelling snapshot refreshes.
+        A session bound to an event loop still running in another thread is closed on that loop.
+        """
+        loop = asyncio.get_running_loop()
+        for task in list(self._refresh_tasks):
+            if task.get_loop() is loop:
+                task.cancel()
+            elif not task.done():
+                task.get_loop().call_soon_threadsafe(task.cancel)
+        with self._lock:
+            bound = list(self._sessions.items())
+            self._sessions.clear()
+
+        closing = []
+        for other, (session, _) in bound:
+            if session.closed:
+                continue
+            if other is loop:
+                closing.append(session.close())
+            elif other.is_running():
+                closing.append(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), other)))
+            else:
+                self._release(session)
+        closing.extend(task for task in self._closing if task.get_loop() is loop)
+        if closing:
+            await asyncio.gather(*closing, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+_default_client = None
+
+
+def get_default_async_client() -> AsyncAGIRestClient:
+    """
+    Return the process-wide AsyncAGIRestClient shared by the async search functions.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncAGIRestClient()
+    return _default_client
+
+
+async def place_search_async(single_line: str,
+                address1: str,
+                address2: str,
+                address3: str,
+                address4: str,
+                address5: str,
+                locality: str,
+                administrative_area: str,
+                postal_code: str,
+                country: str,
+                boundaries: str,
+                max_results: int,
+                search_type: str,
+                extras: str,
+                license_key: str,
+                is_live: bool,
+                client: AsyncAGIRestClient = None) -> dict:
+    """
+    Async equivalent of place_search_rest.place_search.
+
+    Returns:
+        dict: Parsed JSON response from the API.
+
+    Raises:
+        RuntimeError: If the backup returns an error payload, both endpoints are
+            unreachable, or the trial endpoint fails.
+    """
+    params = place_search_rest.place_search_params(single_line, address1, address2, address3,
+                                                   address4, address5, locality, administrative_area,
+                                                   postal_code, country, boundaries, max_results,
+                                                   search_type, extras, license_key)
+
+    client = client or get_default_async_client()
+    return await client.call("PlaceSearch", params, is_live,
+                             place_search_rest.PRIMARY_URL,
+                             place_search_rest.BACKUP_URL,
+                             place_search_rest.TRIAL_URL)
+
+
+async def reverse_search_async(latitude: float,
+                longitude: float,
+                search_radius: int,
+                country: str,
+                max_results: int,
+                search_type: str,
+                license_key: str,
+                is_live: bool,
+                client: AsyncAGIRestClient = None) -> dict:
+    """
+    Async equivalent of reverse_search_rest.reverse_search.
+
+    Returns:
+        dict: Parsed JSON response with location data or error info.
+
+    Raises:
+        RuntimeError: If the backup returns an error payload, both endpoints are
+            unreachable, or the trial endpoint fails.
+    """
+    params = reverse_search_rest.reverse_search_params(latitude, longitude, search_radius, country,
+                                                       max_results, search_type, license_key)
+
+    client = client or get_default_async_client()
+    return await client.call("ReverseSearch", params, is_live,
+                             reverse_search_rest.PRIMARY_URL,
+                             reverse_search_rest.BACKUP_URL,
+                             reverse_search_rest.TRIAL_URL)
@@ -0,0 +1,534 @@
+'''
+Service Objects - AGI REST Client
+
+This module provides the AGIRestClient class, a reusable and thread-safe HTTP client
+for the AGI REST API. It keeps one pooled, keep-alive requests.Session per endpoint
+(primary, backup, trial) so repeated calls reuse established TCP/TLS connections
+instead of paying a new DNS lookup, connect and handshake for every request.
+
+Classes:
+    AGIRestClient(pool_connections: int = 10,
+                pool_maxsize: int = 10,
+                keep_alive: bool = True,
+                timeout: float = 10,
+                cache: ResponseCache = None,
+                health: EndpointHealthTracker = None,
+                hedge: HedgePolicy = None,
+                coalesce: bool = False,
+                metrics: AGIMetrics = None,
+                rate_limiter: TokenBucket = None,
+                concurrency: AdaptiveConcurrency = None,
+                retry: RetryPolicy = None,
+                deadline_s: float = None,
+                snapshot: WarmSnapshot = None)
+
+Functions:
+    get_default_client() -> AGIRestClient
+'''
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from agi_metrics import AGIMetrics
+from circuit_breaker import EndpointHealthTracker, get_default_tracker
+from hedging import HedgePolicy
+from rate_limit import CONGESTION_STATUSES, AdaptiveConcurrency, TokenBucket
+from response_cache import ResponseCache, cache_key
+from retry_policy import AGIResponseError, AGIUnavailableError, Deadline, DeadlineExceeded, RetryPolicy, http_status
+from single_flight import SingleFlight
+from warm_snapshot import WarmSnapshot
+
+# Endpoint roles used to key the pooled sessions
+PRIMARY = "primary"
+BACKUP = "backup"
+TRIAL = "trial"
+
+
+def is_fatal_error(data: dict) -> bool:
+    """
+    Return True if a parsed AGI response carries an Error with TypeCode 3,
+    which signals a service-side failure that should trigger the backup endpoint.
+    """
+    error = data.get("Error") if isinstance(data, dict) else None
+    return bool(error) and str(error.get("TypeCode", "")) == "3"
+
+
+class AGIRestClient:
+    """
+    Thread-safe AGI REST client holding a pooled keep-alive session per endpoint.
+    """
+
+    def __init__(self,
+                pool_connections: int = 10,
+                pool_maxsize: int = 10,
+                keep_alive: bool = True,
+                timeout: float = 10,
+                cache: ResponseCache = None,
+                health: EndpointHealthTracker = None,
+                hedge: HedgePolicy = None,
+                coalesce: bool = False,
+                metrics: AGIMetrics = None,
+                rate_limiter: TokenBucket = None,
+                concurrency: AdaptiveConcurrency = None,
+                retry: RetryPolicy = None,
+                deadline_s: float = None,
+                snapshot: WarmSnapshot = None):
+        """
+        Initialize the AGI REST client.
+
+        Parameters:
+            pool_connections (int): Number of host pools cached by each session.
+            pool_maxsize (int): Maximum number of connections kept per host pool.
+            keep_alive (bool): Reuse connections between calls; False sends Connection: close.
+            timeout (float): Per-request timeout in seconds; shortened to fit a call's deadline.
+            cache (ResponseCache): Optional response cache consulted before any request.
+            health (EndpointHealthTracker): Circuit breakers used to skip an unhealthy primary;
+                defaults to the shared process-wide tracker.
+            hedge (HedgePolicy): Optional hedging policy; a slow primary is raced against the backup.
+            coalesce (bool): Share one upstream request between concurrent identical calls.
+            metrics (AGIMetrics): Optional collector for latency, outcome, error and in-flight metrics.
+            rate_limiter (TokenBucket): Optional cap on requests per second; may be shared between clients.
+            concurrency (AdaptiveConcurrency): Optional adaptive (AIMD) cap on requests in flight;
+                may be shared between clients.
+            retry (RetryPolicy): Optional policy for retrying a failed call with backoff and jitter.
+            deadline_s (float): Default total time budget per call, covering every attempt and
+                backoff; None for no deadline.
+            snapshot (WarmSnapshot): Optional pre-warmed responses answered before the cache;
+                stale entries are returned at once and refreshed in the background.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.cache = cache
+        self.health = health or get_default_tracker()
+        self.hedge = hedge
+        self.single_flight = SingleFlight() if coalesce else None
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.retry = retry
+        self.deadline_s = deadline_s
+        self.snapshot = snapshot
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+        self._refresh_executor = None
+
+    def _session(self, endpoint: str) -> requests.Session:
+        """
+        Return the pooled session for an endpoint role, creating it on first use.
+        """
+        session = self._sessions.get(endpoint)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(endpoint)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                      pool_maxsize=self.pool_maxsize,
+                                      max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._sessions[endpoint] = session
+            return session
+
+    def get(self, endpoint: str, url: str, params: dict, deadline: Deadline = None) -> dict:
+        """
+        Issue a GET against an endpoint's pooled session and return the parsed JSON body.
+
+        Raises:
+            requests.RequestException: On network/HTTP failures.
+            DeadlineExceeded: If the deadline leaves no time for the request.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.concurrency is None:
+            return self._get(endpoint, url, params, deadline)
+
+        self.concurrency.acquire()
+        started = time.perf_counter()
+        # A timeout, an overload status or a service-error payload from a request that was
+        # sent is congestion; an exhausted deadline or any other failure leaves the limit alone
+        ok = None
+        try:
+            data = self._get(endpoint, url, params, deadline)
+            ok = not is_fatal_error(data)
+            return data
+        except requests.Timeout:
+            ok = False
+            raise
+        except requests.HTTPError as ex:
+            if http_status(ex) in CONGESTION_STATUSES:
+                ok = False
+            raise
+        finally:
+            self.concurrency.release(time.perf_counter() - started, ok)
+
+    def _get(self, endpoint: str, url: str, params: dict, deadline: Deadline) -> dict:
+        """
+        Issue the GET itself, measured when metrics are configured.
+        """
+        # Checked after any rate/concurrency wait, so time spent queued counts against the deadline
+        timeout = self.timeout if deadline is None else deadline.timeout(self.timeout)
+        if self.metrics is not None:
+            return self._measured_get(endpoint, url, params, timeout)
+        response = self._session(endpoint).get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _measured_get(self, endpoint: str, url: str, params: dict, timeout: float) -> dict:
+        """
+        get() that records latency, errors and in-flight requests on self.metrics.
+        requests does not expose connection setup time, so only ttfb and total are recorded.
+        """
+        metrics = self.metrics
+        metrics.in_flight(url, 1)
+        started = time.perf_counter()
+        try:
+            response = self._session(endpoint).get(url, params=params, timeout=timeout)
+            # elapsed runs from sending the request until the response headers are parsed
+            metrics.observe(url, "ttfb", response.elapsed.total_seconds())
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            metrics.record_error(url, "network")
+            raise
+        finally:
+            metrics.observe(url, "total", time.perf_counter() - started)
+            metrics.in_flight(url, -1)
+
+        error = data.get("Error") if isinstance(data, dict) else None
+        if error:
+            metrics.record_error(url, error.get("TypeCode", ""))
+        return data
+
+    def _record_call(self, operation: str, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.record_call(operation, outcome)
+
+    def call(self,
+            operation: str,
+            params: dict,
+            is_live: bool,
+            primary_url: str,
+            backup_url: str,
+            trial_url: str,
+            deadline: Deadline = None) -> dict:
+        """
+        Call an AGI operation with the standard primary-to-backup fallback.
+
+        Parameters:
+            operation (str): Operation name used in error messages (PlaceSearch, ReverseSearch).
+            params (dict): Query string parameters.
+            is_live (bool): True for live endpoints; False for trial.
+            primary_url (str): Live primary URL.
+            backup_url (str): Live backup URL.
+            trial_url (str): Trial URL.
+            deadline (Deadline): Time budget for this call; defaults to a new Deadline(self.deadline_s)
+                when deadline_s is set. May be shared by several calls made for one request.
+
+        Returns:
+            dict: Parsed JSON response from the API.
+
+        Raises:
+            RuntimeError: If both live endpoints fail, the backup returns an error
+                payload, or the trial endpoint is unreachable (AGIUnavailableError or
+                AGIResponseError), or the deadline runs out (DeadlineExceeded).
+        """
+        if self.snapshot is not None:
+            data = self._snapshot_get(operation, params, is_live, primary_url, backup_url, trial_url)
+            if data is not None:
+                return data
+        if deadline is None and self.deadline_s is not None:
+            deadline = Deadline(self.deadline_s)
+        if self.cache is None and self.single_flight is None:
+            return self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+
+        if self.cache is not None:
+            key = self.cache.key(operation, params, is_live)
+        else:
+            key = cache_key(operation, params, is_live)
+        if self.cache is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        def fetch():
+            data = self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+            # Only successful responses are cached; error payloads are retried next time
+            if self.cache is not None and "Error" not in data:
+                self.cache.put(key, data)
+            return data
+
+        if self.single_flight is not None:
+            return self.single_flight.do(key, fetch, deadline)
+        return fetch()
+
+    def _snapshot_get(self,
+            operation: str,
+            params: dict,
+            is_live: bool,
+            primary_url: str,
+            backup_url: str,
+            trial_url: str) -> dict:
+        """
+        Return the snapshot's response for a call, or None, also when the call's endpoint or
+        license key is not the snapshot's. A stale response is still returned, and a
+        background refresh is started unless one is already running.
+        """
+        if not self.snapshot.accepts(params, primary_url if is_live else trial_url):
+            return None
+        key = self.snapshot.key(operation, params, is_live)
+        entry = self.snapshot.get(key)
+        if entry is None:
+            return None
+        data, stale = entry
+        if stale and self.snapshot.begin_refresh(key):
+            def fetch():
+                deadline = Deadline(self.deadline_s) if self.deadline_s is not None else None
+                return self._call(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+
+            self._refresher().submit(self.snapshot.refresh, operation, params, is_live, fetch)
+        return data
+
+    def _call(self,
+            operation: str,
+            params: dict,
+            is_live: bool,
+            primary_url: str,
+            backup_url: str,
+            trial_url: str,
+            deadline: Deadline) -> dict:
+        """
+        Perform the uncached call for an AGI operation, retried per self.retry.
+        """
+        try:
+            if self.retry is None:
+                return self._call_once(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+
+            retries = 0
+            while True:
+                failure = None
+                try:
+                    data = self._call_once(operation, params, is_live, primary_url, backup_url, trial_url, deadline)
+                    if not self.retry.is_retryable_response(data):
+                        return data
+                except RuntimeError as ex:
+                    if not self.retry.is_retryable_exception(ex):
+                        raise
+                    failure = ex
+
+                delay = self.retry.backoff(retries)
+                retries += 1
+                # Give up when attempts run out or the backoff would not leave time for another attempt
+                if retries >= self.retry.max_attempts or (
+                        deadline is not None and deadline.remaining() - delay < deadline.min_attempt_s):
+                    if failure is not None:
+                        raise failure
+                    return data
+                self._record_call(operation, "retry")
+                time.sleep(delay)
+        except DeadlineExceeded:
+            self._record_call(operation, "deadline_exceeded")
+            raise
+
+    def _call_once(self,
+            operation: str,
+            params: dict,
+            is_live: bool,
+            primary_url: str,
+            backup_url: str,
+            trial_url: str,
+            deadline: Deadline) -> dict:
+        """
+        Perform one primary-to-backup (or trial) attempt for an AGI operation.
+        """
+        if not is_live:
+            try:
+                # Trial mode should not fallback; error payloads are returned as-is
+                data = self.get(TRIAL, trial_url, params, deadline)
+            except requests.RequestException as req_exc:
+                self._record_call(operation, "trial_error")
+                raise AGIUnavailableError(f"AGI trial error: {str(req_exc)}") from req_exc
+            self._record_call(operation, "trial_success")
+            return data
+
+        # Skip the primary entirely while its circuit is open
+        primary = self.health.breaker(primary_url)
+        if primary.allow_request():
+            if self.hedge is not None:
+                return self._hedged_call(operation, params, primary, primary_url, backup_url, deadline)
+            data = self._attempt(primary, PRIMARY, primary_url, params, deadline)
+            if data is not None and not is_fatal_error(data):
+                self._record_call(operation, "primary_success")
+                return data
+
+        return self._backup_call(operation, params, backup_url, deadline)
+
+    def _attempt(self, breaker, endpoint: str, url: str, params: dict, deadline: Deadline = None):
+        """
+        Call one endpoint and record the outcome on its breaker. Returns the parsed
+        response, or None on a network/HTTP failure.
+        """
+        started = time.perf_counter()
+        try:
+            data = self.get(endpoint, url, params, deadline)
+        except requests.RequestException:
+            breaker.record_failure()
+            return None
+
+        if is_fatal_error(data):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            if self.hedge is not None and endpoint == PRIMARY:
+                self.hedge.record_latency(time.perf_counter() - started)
+        return data
+
+    def _backup_call(self, operation: str, params: dict, backup_url: str, deadline: Deadline = None) -> dict:
+        """
+        Call the backup endpoint after the primary failed or was skipped.
+        """
+        backup = self.health.breaker(backup_url)
+        try:
+            data = self.get(BACKUP, backup_url, params, deadline)
+        except requests.RequestException as backup_exc:
+            backup.record_failure()
+            self._record_call(operation, "failure")
+            raise AGIUnavailableError(f"AGI {operation} unreachable on both endpoints") from backup_exc
+
+        if is_fatal_error(data):
+            backup.record_failure()
+        else:
+            backup.record_success()
+        if "Error" in data:
+            self._record_call(operation, "failure")
+            raise AGIResponseError(f"AGI {operation} backup error: {data['Error']}", data["Error"])
+        self._record_call(operation, "backup_fallback")
+        return data
+
+    def _executor(self) -> ThreadPoolExecutor:
+        """
+        Return the thread pool that runs hedged requests, creating it on first use.
+        """
+        if self._hedge_executor is None:
+            with self._lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(max_workers=max(32, self.pool_maxsize * 2),
+                                                              thread_name_prefix="agi-hedge")
+        return self._hedge_executor
+
+    def _refresher(self) -> ThreadPoolExecutor:
+        """
+        Return the single-thread pool that runs snapshot refreshes, creating it on first use.
+        Refreshes run one at a time on their own thread, so a burst of stale entries never
+        takes the workers that hedged calls block on.
+        """
+        if self._refresh_executor is None:
+            with self._lock:
+                if self._refresh_executor is None:
+                    self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agi-refresh")
+        return self._refresh_executor
+
+    def _hedged_call(self,
+                    operation: str,
+                    params: dict,
+                    primary,
+                    primary_url: str,
+                    backup_url: str,
+                    deadline: Deadline = None) -> dict:
+        """
+        Send the request to the primary and, if it has not answered within the hedge
+        delay and budget allows, to the backup as well; the first good answer wins.
+        """
+        self.hedge.note_request()
+        executor = self._executor()
+        primary_future = executor.submit(self._attempt, primary, PRIMARY, primary_url, params, deadline)
+
+        try:
+            data = primary_future.result(timeout=self.hedge.delay())
+        except FutureTimeout:
+            data = None
+            if not self.hedge.try_acquire():
+                data = primary_future.result()
+            else:
+                backup_future = executor.submit(self._attempt, self.health.breaker(backup_url),
+                                                BACKUP, backup_url, params, deadline)
+                pending = {primary_future, backup_future}
+                backup_data = None
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        if future is backup_future:
+                            backup_data = result
+                            won = result is not None and "Error" not in result
+                        else:
+                            won = result is not None and not is_fatal_error(result)
+                        if won:
+                            # The loser cannot be interrupted mid-request; drop its result
+                            for other in pending:
+                                other.cancel()
+                            self.hedge.record_win(future is backup_future)
+                            self._record_call(operation, "hedge_win" if future is backup_future else "primary_success")
+                            return result
+
+                self._record_call(operation, "failure")
+                if backup_data is None:
+                    raise AGIUnavailableError(f"AGI {operation} unreachable on both endpoints")
+                raise AGIResponseError(f"AGI {operation} backup error: {backup_data['Error']}",
+                                       backup_data["Error"])
+
+        if data is not None and not is_fatal_error(data):
+            self._record_call(operation, "primary_success")
+            return data
+        return self._backup_call(operation, params, backup_url, deadline)
+
+    def close(self) -> None:
+        """
+        Close all pooled sessions and release their connections.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False)
+            self._refresh_executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> AGIRestClient:
+    """
+    Return the process-wide AGIRestClient shared by place_search and reverse_search.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = AGIRestClient()
+    return _default_client
@@ -0,0 +1,246 @@
+'''
+Service Objects - AGI Batch Search
+
+This module provides batch_place_search and batch_reverse_search, which run AGI
+PlaceSearch / ReverseSearch calls for an iterable of records on a bounded worker pool.
+Records are read lazily, at most a fixed number are in flight at once, and results are
+yielded in input order. Errors are captured per record and never abort the batch.
+
+Records may be dicts keyed by the place_search / reverse_search argument names
+(e.g. {"single_line": ..., "country": ...}) or tuples/lists in argument order;
+missing fields default to "".
+
+batch_place_search(..., dedupe=True) sends one request per distinct normalized address
+(see address_normalize.py) and returns its result for every row with that address.
+
+Functions:
+    batch_place_search(records, license_key, is_live, ...) -> Iterator[BatchResult]
+    batch_reverse_search(records, license_key, is_live, ...) -> Iterator[BatchResult]
+'''
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from address_normalize import AddressDeduplicator, address_key
+from agi_rest_client import AGIRestClient
+from place_search_rest import place_search
+from reverse_search_rest import reverse_search
+
+# Input fields accepted per record, in positional order
+PLACE_SEARCH_FIELDS = (
+    "single_line",
+    "address1",
+    "address2",
+    "address3",
+    "address4",
+    "address5",
+    "locality",
+    "administrative_area",
+    "postal_code",
+    "country",
+    "boundaries",
+    "max_results",
+    "search_type",
+    "extras",
+)
+REVERSE_SEARCH_FIELDS = (
+    "latitude",
+    "longitude",
+    "search_radius",
+    "country",
+    "max_results",
+    "search_type",
+)
+
+
+class BatchResult(NamedTuple):
+    """
+    Outcome of one batch record: the parsed response, or the exception it raised.
+    """
+    index: int
+    record: object
+    response: dict
+    error: Exception
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def record_args(record, fields: tuple) -> list:
+    """
+    Return the positional arguments for a record given as a dict or a tuple/list.
+    """
+    if isinstance(record, dict):
+        return [record.get(field, "") for field in fields]
+
+    values = list(record)
+    if len(values) > len(fields):
+        raise ValueError(f"Record has {len(values)} fields; at most {len(fields)} expected")
+    return values + [""] * (len(fields) - len(values))
+
+
+def run_batch(records: Iterable,
+            call: Callable,
+            max_workers: int,
+            max_pending: int = None,
+            on_progress: Callable = None,
+            on_throughput: Callable = None,
+            progress_interval: int = 1000) -> Iterator[BatchResult]:
+    """
+    Run call(index, record) for every record on a bounded thread pool, yielding
+    BatchResult objects in input order.
+
+    Parameters:
+        records (Iterable): Input records; consumed lazily.
+        call (Callable): Function taking (index, record) and returning a response dict.
+        max_workers (int): Number of worker threads.
+        max_pending (int): Maximum records submitted but not yet yielded; defaults to 4 * max_workers.
+        on_progress (Callable): Called as on_progress(completed, failed).
+        on_throughput (Callable): Called as on_throughput(completed, elapsed_s, records_per_s).
+        progress_interval (int): Number of completed records between callback invocations.
+    """
+    max_pending = max_pending or max_workers * 4
+
+    def work(index, record):
+        try:
+            return BatchResult(index, record, call(index, record), None)
+        except Exception as ex:
+            return BatchResult(index, record, None, ex)
+
+    completed = 0
+    failed = 0
+    started = time.perf_counter()
+
+    def report():
+        if on_progress:
+            on_progress(completed, failed)
+        if on_throughput:
+            elapsed = time.perf_counter() - started
+            on_throughput(completed, elapsed, completed / elapsed if elapsed > 0 else 0.0)
+
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        records = iter(records)
+        exhausted = False
+        while True:
+            # Keep the window full without reading ahead of it
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    record = next(records)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append(executor.submit(work, completed + len(pending), record))
+
+            if not pending:
+                break
+
+            result = pending.popleft().result()
+            completed += 1
+            if result.error is not None:
+                failed += 1
+            if completed % progress_interval == 0:
+                report()
+            yield result
+
+        if completed % progress_interval != 0:
+            report()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _batch_client(client: AGIRestClient, max_workers: int):
+    """
+    Return (client, owned): the caller's client, or a new one sized for the worker pool.
+    """
+    if client is not None:
+        return client, False
+    return AGIRestClient(pool_maxsize=max_workers), True
+
+
+def batch_place_search(records: Iterable,
+                    license_key: str,
+                    is_live: bool,
+                    max_workers: int = 8,
+                    client: AGIRestClient = None,
+                    on_progress: Callable = None,
+                    on_throughput: Callable = None,
+                    progress_interval: int = 1000,
+                    dedupe=False) -> Iterator[BatchResult]:
+    """
+    Run place_search for each record and yield BatchResult objects in input order.
+
+    Parameters:
+        records (Iterable): Dicts keyed by PLACE_SEARCH_FIELDS, or tuples in that order.
+        license_key (str): AGI API key.
+        is_live (bool): True for live endpoint; False for trial.
+        max_workers (int): Number of concurrent requests.
+        client (AGIRestClient): Optional pooled client; by default one sized to max_workers is created.
+        on_progress (Callable): Called as on_progress(completed, failed).
+        on_throughput (Callable): Called as on_throughput(completed, elapsed_s, records_per_s).
+        progress_interval (int): Number of completed records between callback invocations.
+        dedupe (bool | AddressDeduplicator): True (or a deduplicator, to read its stats) makes
+            one request per distinct normalized address; rows sharing an address get the
+            same response dict.
+    """
+    client, owned = _batch_client(client, max_workers)
+    if dedupe is True:
+        dedupe = AddressDeduplicator()
+
+    def call(index, record):
+        args = record_args(record, PLACE_SEARCH_FIELDS)
+        if not dedupe:
+            return place_search(*args, license_key, is_live, client=client)
+        key = address_key(dict(zip(PLACE_SEARCH_FIELDS, args)))
+        return dedupe.call(key, lambda: place_search(*args, license_key, is_live, client=client))
+
+    try:
+        yield from run_batch(records, call, max_workers,
+                             on_progress=on_progress,
+                             on_throughput=on_throughput,
+                             progress_interval=progress_interval)
+    finally:
+        if owned:
+            client.close()
+
+
+def batch_reverse_search(records: Iterable,
+                    license_key: str,
+                    is_live: bool,
+                    max_workers: int = 8,
+                    client: AGIRestClient = None,
+                    on_progress: Callable = None,
+                    on_throughput: Callable = None,
+                    progress_interval: int = 1000) -> Iterator[BatchResult]:
+    """
+    Run reverse_search for each record and yield BatchResult objects in input order.
+
+    Parameters:
+        records (Iterable): Dicts keyed by REVERSE_SEARCH_FIELDS, or tuples in that order.
+        license_key (str): AGI API key.
+        is_live (bool): True for live endpoint; False for trial.
+        max_workers (int): Number of concurrent requests.
+        client (AGIRestClient): Optional pooled client; by default one sized to max_workers is created.
+        on_progress (Callable): Called as on_progress(completed, failed).
+        on_throughput (Callable): Called as on_throughput(completed, elapsed_s, records_per_s).
+        progress_interval (int): Number of completed records between callback invocations.
+    """
+    client, owned = _batch_client(client, max_workers)
+
+    def call(index, record):
+        return reverse_search(*record_args(record, REVERSE_SEARCH_FIELDS), license_key, is_live, client=client)
+
+    try:
+        yield from run_batch(records, call, max_workers,
+                             on_progress=on_progress,
+                             on_throughput=on_throughput,
+                             progress_interval=progress_interval)
+    finally:
+        if owned:
+            client.close()
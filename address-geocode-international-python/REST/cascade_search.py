@@ -0,0 +1,341 @@
+'''
+Service Objects - AGI Cascading Place Search
+
+This module provides cascade_place_search (and cascade_place_search_async), which run a
+place_search and, when it comes back empty, failed or below min_precision, coarser
+fallbacks: by default SearchType "Locality", then "PostalCode". The fallbacks run
+speculatively instead of one after another. The request as given is sent first, and
+each next step is started delay_s after the previous one, or at once when every
+running step has already answered without an acceptable result.
+
+A result is accepted once it reaches min_precision and every finer step before it has
+answered. The best-precision result among those that have answered is then returned,
+and the remaining steps are cancelled: unstarted steps are never sent, and async
+requests in flight are aborted. When no step reaches min_precision, the best result
+found is returned once all steps have answered. A hard-to-match address therefore
+costs about one round-trip plus (steps - 1) * delay_s, instead of one round-trip per
+step.
+
+Classes:
+    CascadeStep(NamedTuple)
+    CascadeResult(NamedTuple)
+
+Functions:
+    cascade_place_search(single_line: str,
+                ...,
+                license_key: str,
+                is_live: bool,
+                client: AGIRestClient = None,
+                steps: tuple = DEFAULT_STEPS,
+                delay_s: float = 0.25,
+                min_precision: int = 1,
+                deadline_s: float = None,
+                executor: ThreadPoolExecutor = None) -> CascadeResult
+    cascade_place_search_async(...) -> CascadeResult
+'''
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from agi_rest_client import AGIRestClient, get_default_client
+from batch_search import PLACE_SEARCH_FIELDS
+from place_search_rest import BACKUP_URL, PRIMARY_URL, TRIAL_URL, place_search_params
+from retry_policy import Deadline
+
+ADDRESS_LINES = ("address1", "address2", "address3", "address4", "address5")
+
+
+class CascadeStep(NamedTuple):
+    """
+    One fallback of a cascade: the place_search arguments with search_type replaced and
+    the fields in clear emptied. The step is skipped unless at least one field in
+    requires is set (an empty requires always runs), or if it would repeat an earlier request.
+    """
+    search_type: str
+    clear: tuple = ()
+    requires: tuple = ()
+
+
+DEFAULT_STEPS = (
+    CascadeStep("Locality", clear=ADDRESS_LINES + ("postal_code",), requires=("single_line", "locality")),
+    CascadeStep("PostalCode", clear=ADDRESS_LINES + ("locality",), requires=("single_line", "postal_code")),
+)
+
+
+class CascadeResult(NamedTuple):
+    """
+    Outcome of a cascade: the chosen response, the step that produced it (0 for the
+    request as given, n for the n-th fallback), its search type, the best PrecisionLevel
+    among its locations (None when it has none) and the number of requests sent.
+    """
+    response: dict
+    step: int
+    search_type: str
+    precision: int
+    launched: int
+
+
+def precision_of(response: dict) -> int:
+    """
+    Return the highest PrecisionLevel among a response's locations, or None if it has
+    no locations or carries an Error.
+    """
+    if not response or response.get("Error"):
+        return None
+    best = None
+    for location in response.get("Locations") or ():
+        try:
+            level = int(location.get("PrecisionLevel"))
+        except (TypeError, ValueError):
+            level = 0
+        best = level if best is None else max(best, level)
+    return best
+
+
+def plan_steps(args: dict, steps: tuple) -> list:
+    """
+    Return [(search_type, args)] for the request as given followed by each applicable step.
+    """
+    planned = [(args["search_type"], args)]
+    seen = {tuple(sorted(args.items()))}
+    for step in steps:
+        if step.requires and not any(args.get(field) for field in step.requires):
+            continue
+        step_args = dict(args, search_type=step.search_type, **dict.fromkeys(step.clear, ""))
+        key = tuple(sorted(step_args.items()))
+        if key not in seen:
+            seen.add(key)
+            planned.append((step.search_type, step_args))
+    return planned
+
+
+class _Cascade:
+    """
+    Launch and acceptance decisions for one cascade, shared by the sync and async runners.
+    """
+
+    def __init__(self, planned: list, min_precision: int):
+        self.planned = planned
+        self.min_precision = min_precision
+        self.launched = 0
+        # step -> (response, error, precision)
+        self.outcomes = {}
+
+    def next_request(self) -> tuple:
+        """
+        Return (step, params) for the next step to launch, or None when all are launched.
+        """
+        if self.launched == len(self.planned):
+            return None
+        step = self.launched
+        self.launched += 1
+        return step, self.planned[step][1]
+
+    def record(self, step: int, response: dict, error: Exception) -> None:
+        self.outcomes[step] = (response, error, None if error is not None else precision_of(response))
+
+    def idle(self) -> bool:
+        """
+        Return True if every launched step has answered.
+        """
+        return len(self.outcomes) == self.launched
+
+    def result(self):
+        """
+        Return the CascadeResult to finish with, or None to keep waiting.
+
+        Raises:
+            Exception: The first step's error, when every step failed.
+        """
+        # Accept the first step reaching min_precision once every finer step has answered
+        accepted = False
+        for step in range(self.launched):
+            if step not in self.outcomes:
+                break
+            precision = self.outcomes[step][2]
+            if precision is not None and precision >= self.min_precision:
+                accepted = True
+                break
+        if not accepted and not (self.idle() and self.launched == len(self.planned)):
+            return None
+
+        located = [step for step, outcome in self.outcomes.items() if outcome[2] is not None]
+        if located:
+            best = max(located, key=lambda step: (self.outcomes[step][2], -step))
+        else:
+            # Nothing located: fall back to the request as given, raising its error if it failed
+            best = 0
+            if self.outcomes[0][1] is not None:
+                raise self.outcomes[0][1]
+        response, _, precision = self.outcomes[best]
+        return CascadeResult(response, best, self.planned[best][0], precision, self.launched)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide thread pool that runs cascade steps.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="agi-cascade")
+    return _executor
+
+
+def cascade_place_search(single_line: str,
+                address1: str,
+                address2: str,
+                address3: str,
+                address4: str,
+                address5: str,
+                locality: str,
+                administrative_area: str,
+                postal_code: str,
+                country: str,
+                boundaries: str,
+                max_results: int,
+                search_type: str,
+                extras: str,
+                license_key: str,
+                is_live: bool,
+                client: AGIRestClient = None,
+                steps: tuple = DEFAULT_STEPS,
+                delay_s: float = 0.25,
+                min_precision: int = 1,
+                deadline_s: float = None,
+                executor: ThreadPoolExecutor = None) -> CascadeResult:
+    """
+    Run place_search with speculative coarser fallbacks and return the best-precision result.
+
+    Parameters:
+        single_line ... extras: As for place_search; search_type is used for the first request.
+        license_key (str): AGI API key.
+        is_live (bool): True for live endpoint; False for trial.
+        client (AGIRestClient): Optional pooled client; defaults to the shared process-wide client.
+        steps (tuple): CascadeStep fallbacks, finest first.
+        delay_s (float): Time after launching a step before the next one is launched speculatively.
+        min_precision (int): Lowest PrecisionLevel accepted without waiting for coarser steps;
+            raise it to cascade on coarse matches as well as on empty results.
+        deadline_s (float): Total time budget shared by every step; None uses the client's default.
+        executor (ThreadPoolExecutor): Pool running the steps; defaults to a shared process-wide pool.
+
+    Returns:
+        CascadeResult: The chosen response and the step that produced it.
+
+    Raises:
+        RuntimeError: The first request's error, if every step failed.
+    """
+    args = dict(zip(PLACE_SEARCH_FIELDS,
+                    (single_line, address1, address2, address3, address4, address5, locality,
+                     administrative_area, postal_code, country, boundaries, max_results, search_type, extras)))
+    cascade = _Cascade(plan_steps(args, steps), min_precision)
+    client = client or get_default_client()
+    deadline = Deadline(deadline_s) if deadline_s is not None else None
+    executor = executor or _default_executor()
+
+    futures = {}
+
+    def launch():
+        step, step_args = cascade.next_request()
+        params = place_search_params(**step_args, license_key=license_key)
+        futures[executor.submit(client.call, "PlaceSearch", params, is_live,
+                                PRIMARY_URL, BACKUP_URL, TRIAL_URL, deadline)] = step
+
+    launch()
+    try:
+        while True:
+            more = cascade.launched < len(cascade.planned)
+            done, _ = wait(futures, timeout=delay_s if more else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for future in done:
+                step = futures.pop(future)
+                error = future.exception()
+                cascade.record(step, None if error is not None else future.result(), error)
+
+            result = cascade.result()
+            if result is not None:
+                return result
+            if cascade.idle():
+                launch()
+    finally:
+        # Steps already sending cannot be interrupted; their results are dropped
+        for future in futures:
+            future.cancel()
+
+
+async def cascade_place_search_async(single_line: str,
+                address1: str,
+                address2: str,
+                address3: str,
+                address4: str,
+                address5: str,
+                locality: str,
+                administrative_area: str,
+                postal_code: str,
+                country: str,
+                boundaries: str,
+                max_results: int,
+                search_type: str,
+                extras: str,
+                license_key: str,
+                is_live: bool,
+                client=None,
+                steps: tuple = DEFAULT_STEPS,
+                delay_s: float = 0.25,
+                min_precision: int = 1,
+                deadline_s: float = None) -> CascadeResult:
+    """
+    Async equivalent of cascade_place_search; steps that lose are cancelled mid-request.
+
+    Parameters:
+        client (AsyncAGIRestClient): Optional async client; defaults to the shared process-wide one.
+    """
+    import asyncio
+
+    from agi_rest_async import get_default_async_client
+
+    args = dict(zip(PLACE_SEARCH_FIELDS,
+                    (single_line, address1, address2, address3, address4, address5, locality,
+                     administrative_area, postal_code, country, boundaries, max_results, search_type, extras)))
+    cascade = _Cascade(plan_steps(args, steps), min_precision)
+    client = client or get_default_async_client()
+    deadline = Deadline(deadline_s) if deadline_s is not None else None
+
+    tasks = {}
+
+    def launch():
+        step, step_args = cascade.next_request()
+        params = place_search_params(**step_args, license_key=license_key)
+        tasks[asyncio.ensure_future(client.call("PlaceSearch", params, is_live,
+                                                PRIMARY_URL, BACKUP_URL, TRIAL_URL, deadline))] = step
+
+    launch()
+    try:
+        while True:
+            more = cascade.launched < len(cascade.planned)
+            done, _ = await asyncio.wait(tasks, timeout=delay_s if more else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                step = tasks.pop(task)
+                error = task.exception()
+                cascade.record(step, None if error is not None else task.result(), error)
+
+            result = cascade.result()
+            if result is not None:
+                return result
+            if cascade.idle():
+                launch()
+    finally:
+        for task in tasks:
+            task.cancel()
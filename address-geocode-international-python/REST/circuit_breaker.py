@@ -0,0 +1,202 @@
+'''
+Service Objects - AGI Endpoint Health Tracking
+
+This module provides a per-endpoint circuit breaker used to route calls straight to the
+backup endpoint while the primary is unhealthy. Each breaker moves between three states:
+
+    closed     - calls go to the endpoint; consecutive failures are counted.
+    open       - the endpoint is skipped until recovery_timeout_s has passed.
+    half_open  - a limited number of probe calls are let through; a success closes
+                 the circuit again, a failure re-opens it.
+
+Endpoints are keyed by host name, so the REST functions and the SOAP classes can share
+one EndpointHealthTracker and see the same health for sws.serviceobjects.com.
+
+Classes:
+    CircuitBreaker(failure_threshold: int = 5,
+                recovery_timeout_s: float = 30,
+                half_open_max_calls: int = 1)
+    EndpointHealthTracker(failure_threshold: int = 5,
+                recovery_timeout_s: float = 30,
+                half_open_max_calls: int = 1)
+
+Functions:
+    endpoint_key(url: str) -> str
+    get_default_tracker() -> EndpointHealthTracker
+'''
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def endpoint_key(url: str) -> str:
+    """
+    Return the key an endpoint URL is tracked under (its host name).
+    """
+    return urlsplit(url).netloc or url
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker for one endpoint.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout_s: float = 30, half_open_max_calls: int = 1):
+        """
+        Initialize the circuit breaker.
+
+        Parameters:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            recovery_timeout_s (float): Seconds the circuit stays open before probing.
+            half_open_max_calls (int): Concurrent probe calls allowed while half-open.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_s = recovery_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_started = 0.0
+        self._successes = 0
+        self._total_failures = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self, now: float) -> None:
+        """
+        Move an open circuit to half-open once the recovery timeout has passed. Caller holds the lock.
+        """
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout_s:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Return True if a call may be sent to the endpoint now. A True result while
+        half-open reserves a probe slot that record_success/record_failure releases.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                # Reclaim probe slots whose outcome was never recorded (e.g. a cancelled call)
+                if self._probes and now - self._probe_started >= self.recovery_timeout_s:
+                    self._probes = 0
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    self._probe_started = now
+                    return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """
+        Record a successful call; closes a half-open circuit.
+        """
+        with self._lock:
+            self._successes += 1
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            self._state = CLOSED
+
+    def record_failure(self) -> None:
+        """
+        Record a failed call; opens the circuit at the threshold or on a failed probe.
+        """
+        with self._lock:
+            self._total_failures += 1
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """
+        Return the breaker state and counters for monitoring.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "successes": self._successes,
+                "failures": self._total_failures,
+                "rejected": self._rejected,
+                "open_for_s": now - self._opened_at if self._state == OPEN else 0.0,
+            }
+
+
+class EndpointHealthTracker:
+    """
+    Registry of circuit breakers keyed by endpoint host.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout_s: float = 30, half_open_max_calls: int = 1):
+        """
+        Initialize the tracker. The parameters apply to every breaker it creates.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_s = recovery_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Return the circuit breaker for an endpoint URL, creating it on first use.
+        """
+        key = endpoint_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(self.failure_threshold,
+                                             self.recovery_timeout_s,
+                                             self.half_open_max_calls)
+                    self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self) -> dict:
+        """
+        Return {endpoint host: breaker snapshot} for every tracked endpoint.
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.snapshot() for key, breaker in breakers.items()}
+
+
+_default_tracker = None
+_default_lock = threading.Lock()
+
+
+def get_default_tracker() -> EndpointHealthTracker:
+    """
+    Return the process-wide EndpointHealthTracker used by AGIRestClient by default.
+    """
+    global _default_tracker
+    if _default_tracker is None:
+        with _default_lock:
+            if _default_tracker is None:
+                _default_tracker = EndpointHealthTracker()
+    return _default_tracker
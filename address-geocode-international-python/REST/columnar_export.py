@@ -0,0 +1,161 @@
+'''
+Service Objects - AGI Columnar Export
+
+This module converts a batch of AGI PlaceSearch / ReverseSearch results into NumPy
+columns for analytics: float64 Latitude / Longitude arrays, categorical codes for
+PrecisionLevel / Type, and string arrays for selected AddressComponents fields.
+
+Values are read straight from the response dicts into typed buffers (array.array for
+numbers, lists for strings) and turned into NumPy arrays once at the end; no per-row
+dicts or objects are built on the way.
+
+Results may be BatchResult objects (from batch_search), response dicts from
+place_search / reverse_search, or None for a failed record. A failed record, or one
+without locations, becomes a row with NaN coordinates and code -1, so by default the
+arrays line up one-to-one with the input.
+
+Classes:
+    GeocodeColumns(NamedTuple)
+
+Functions:
+    results_to_columns(results: Iterable,
+                    components: tuple = (),
+                    all_locations: bool = False) -> GeocodeColumns
+'''
+
+import math
+from array import array
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+NAN = math.nan
+
+
+class GeocodeColumns(NamedTuple):
+    """
+    Columnar batch results. Each array has one entry per output row.
+
+    row              - int64 index of the input result the row came from
+    latitude         - float64, NaN when missing
+    longitude        - float64, NaN when missing
+    precision_level  - int16 codes into precision_levels, -1 when missing
+    precision_levels - category values for precision_level codes
+    type             - int16 codes into types, -1 when missing
+    types            - category values for type codes
+    components       - {AddressComponents field: str array}, "" when missing
+    """
+    row: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    precision_level: np.ndarray
+    precision_levels: list
+    type: np.ndarray
+    types: list
+    components: dict
+
+    def __len__(self) -> int:
+        return len(self.row)
+
+
+def _response(result):
+    """
+    Return the response dict of a BatchResult or a plain response dict (None if failed).
+    """
+    if result is None or isinstance(result, dict):
+        return result
+    return getattr(result, "response", None)
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def results_to_columns(results: Iterable,
+                    components: tuple = (),
+                    all_locations: bool = False) -> GeocodeColumns:
+    """
+    Convert batch results into NumPy columns.
+
+    Parameters:
+        results (Iterable): BatchResult objects, response dicts, or None; consumed once.
+        components (tuple): AddressComponents fields to export as string columns
+            (e.g. ("Locality", "AdministrativeArea1", "PostalCode", "CountryISO3")).
+        all_locations (bool): True emits one row per location; False (default) emits
+            exactly one row per result using its first (best) location.
+
+    Returns:
+        GeocodeColumns
+    """
+    rows = array("q")
+    latitudes = array("d")
+    longitudes = array("d")
+    precision_codes = array("h")
+    type_codes = array("h")
+    precision_index = {}
+    type_index = {}
+    strings = [[] for _ in components]
+    string_appends = [(name, values.append) for name, values in zip(components, strings)]
+
+    append_row = rows.append
+    append_lat = latitudes.append
+    append_lon = longitudes.append
+    append_precision = precision_codes.append
+    append_type = type_codes.append
+
+    def append_location(index, location):
+        append_row(index)
+        append_lat(_float(location.get("Latitude")))
+        append_lon(_float(location.get("Longitude")))
+
+        precision = location.get("PrecisionLevel")
+        if precision is None or precision == "":
+            append_precision(-1)
+        else:
+            append_precision(precision_index.setdefault(precision, len(precision_index)))
+
+        kind = location.get("Type")
+        if kind is None or kind == "":
+            append_type(-1)
+        else:
+            append_type(type_index.setdefault(kind, len(type_index)))
+
+        if string_appends:
+            address = location.get("AddressComponents") or {}
+            for name, append in string_appends:
+                value = address.get(name)
+                append("" if value is None else str(value))
+
+    def append_missing(index):
+        append_row(index)
+        append_lat(NAN)
+        append_lon(NAN)
+        append_precision(-1)
+        append_type(-1)
+        for _, append in string_appends:
+            append("")
+
+    for index, result in enumerate(results):
+        response = _response(result)
+        locations = response.get("Locations") if response else None
+        if not locations:
+            append_missing(index)
+        elif all_locations:
+            for location in locations:
+                append_location(index, location)
+        else:
+            append_location(index, locations[0])
+
+    return GeocodeColumns(
+        row=np.frombuffer(rows, dtype=np.int64).copy(),
+        latitude=np.frombuffer(latitudes, dtype=np.float64).copy(),
+        longitude=np.frombuffer(longitudes, dtype=np.float64).copy(),
+        precision_level=np.frombuffer(precision_codes, dtype=np.int16).copy(),
+        precision_levels=list(precision_index),
+        type=np.frombuffer(type_codes, dtype=np.int16).copy(),
+        types=list(type_index),
+        components={name: np.array(values, dtype=str) for name, values in zip(components, strings)},
+    )
@@ -0,0 +1,315 @@
+'''
+Service Objects - AGI Geocoding Command Line Tool
+
+Streams a CSV or JSONL file through place_search or reverse_search and writes the
+results as they complete, in input order. Only a bounded window of records is held in
+memory, so any file size works. A checkpoint file records how many rows have been
+written; re-running the same command after an interruption resumes from that row
+instead of calling the service again for rows already done.
+
+Input columns/keys are matched to the argument names of place_search / reverse_search,
+ignoring case and underscores (so "single_line" and "SingleLine" both work).
+
+Usage:
+    python geocode_cli.py place addresses.csv results.jsonl --license-key KEY --live --workers 16
+    python geocode_cli.py reverse points.jsonl results.csv --license-key KEY
+    python geocode_cli.py place addresses.csv results.csv --license-key KEY --live --dedupe
+    python geocode_cli.py place addresses.csv results.csv --license-key KEY --live --processes 8 --cache agi.sqlite
+
+With --processes above 1 the file is split into shards of --shard-size rows that are
+geocoded and formatted on a pool of worker processes (see sharded_runner.py); output
+order, checkpoints and resume work the same way. --cache keeps responses in a SQLite
+file shared by all workers and by later runs.
+'''
+
+import argparse
+import csv
+import functools
+import io
+import itertools
+import json
+import os
+import sys
+
+from batch_search import (PLACE_SEARCH_FIELDS, REVERSE_SEARCH_FIELDS,
+                          batch_place_search, batch_reverse_search)
+
+# Result columns appended to each input row for CSV output
+RESULT_COLUMNS = (
+    "Status",
+    "PrecisionLevel",
+    "Type",
+    "Latitude",
+    "Longitude",
+    "ErrorType",
+    "ErrorTypeCode",
+    "ErrorDesc",
+)
+
+
+def _file_format(path: str, explicit: str) -> str:
+    """
+    Return "csv" or "jsonl" from an explicit choice or the file extension.
+    """
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(path: str, file_format: str, fields: tuple):
+    """
+    Lazily yield input rows as dicts keyed by the search argument names.
+    """
+    lookup = {field.replace("_", ""): field for field in fields}
+
+    def normalize(row):
+        return {lookup.get(str(k).replace("_", "").lower(), k): v for k, v in row.items()}
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            for row in csv.DictReader(f):
+                yield normalize(row)
+        else:
+            for line in f:
+                if line.strip():
+                    yield normalize(json.loads(line))
+
+
+def summarize(response: dict, error: Exception) -> dict:
+    """
+    Reduce a response to the RESULT_COLUMNS written in CSV output.
+    """
+    out = dict.fromkeys(RESULT_COLUMNS, "")
+    if error is not None:
+        out["ErrorDesc"] = str(error)
+        return out
+
+    err = response.get("Error")
+    if err:
+        out["ErrorType"] = err.get("Type", "")
+        out["ErrorTypeCode"] = err.get("TypeCode", "")
+        out["ErrorDesc"] = err.get("Desc", "")
+        return out
+
+    out["Status"] = (response.get("SearchInfo") or {}).get("Status", "")
+    locations = response.get("Locations") or []
+    if locations:
+        best = locations[0]
+        for key in ("PrecisionLevel", "Type", "Latitude", "Longitude"):
+            out[key] = best.get(key, "")
+    return out
+
+
+def csv_fieldnames(record: dict) -> list:
+    """
+    Return the CSV output columns for rows shaped like record: its own keys, then RESULT_COLUMNS.
+    """
+    return list(dict(record, **dict.fromkeys(RESULT_COLUMNS)).keys())
+
+
+def csv_text(results: list, fieldnames: list) -> str:
+    """
+    Format batch results as CSV rows (without a header).
+    """
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    for result in results:
+        row = dict(result.record)
+        row.update(summarize(result.response, result.error))
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def csv_shard_text(results: list, first_row: int, fieldnames: list) -> str:
+    """
+    Format a shard's results as CSV rows; the formatter signature run_sharded expects.
+    """
+    return csv_text(results, fieldnames)
+
+
+def jsonl_text(results: list, first_row: int) -> str:
+    """
+    Format batch results as JSON lines, numbering them from first_row.
+    """
+    return "".join(json.dumps({
+        "index": first_row + i,
+        "input": result.record,
+        "response": result.response,
+        "error": None if result.error is None else str(result.error),
+    }) + "\n" for i, result in enumerate(results))
+
+
+def csv_header(fieldnames: list) -> str:
+    """
+    Format the CSV header row.
+    """
+    buffer = io.StringIO(newline="")
+    csv.DictWriter(buffer, fieldnames=fieldnames).writeheader()
+    return buffer.getvalue()
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    Return the saved checkpoint, or a fresh one if none exists.
+    """
+    if not os.path.exists(path):
+        return {"completed": 0, "output_offset": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, completed: int, output_offset: int) -> None:
+    """
+    Atomically write the checkpoint so a crash never leaves it half written.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"completed": completed, "output_offset": output_offset}, f)
+    os.replace(tmp, path)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Geocode a CSV/JSONL file with AGI PlaceSearch or ReverseSearch.")
+    parser.add_argument("operation", choices=("place", "reverse"), help="Search operation to run.")
+    parser.add_argument("input", help="Input .csv or .jsonl file.")
+    parser.add_argument("output", help="Output .csv or .jsonl file.")
+    parser.add_argument("--license-key", default=os.environ.get("AGI_LICENSE_KEY"),
+                        help="Service Objects license key (default: $AGI_LICENSE_KEY).")
+    parser.add_argument("--live", action="store_true", help="Use the live endpoints instead of trial.")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Override the input format.")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), help="Override the output format.")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Number of concurrent requests (per process with --processes).")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint).")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="Rows written between checkpoint saves.")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint and start over.")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="place only: make one request per distinct normalized address.")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes; above 1, shards are geocoded in parallel processes.")
+    parser.add_argument("--shard-size", type=int, default=1000, help="Rows per shard with --processes.")
+    parser.add_argument("--cache", metavar="PATH", help="SQLite file caching responses across workers and runs.")
+    return parser
+
+
+def write_threaded(args, records, out, first_row: int, output_format: str, options: dict):
+    """
+    Geocode records on a thread pool in this process, writing each result as it completes.
+    Yields the number of rows written after each write.
+    """
+    batch = batch_place_search if args.operation == "place" else batch_reverse_search
+    client = None
+    if args.cache:
+        from agi_rest_client import AGIRestClient
+        from response_cache import ResponseCache
+
+        client = AGIRestClient(pool_maxsize=args.workers, cache=ResponseCache(sqlite_path=args.cache))
+        options["client"] = client
+
+    row = first_row
+    fieldnames = None
+    try:
+        for result in batch(records, args.license_key, args.live, max_workers=args.workers,
+                            on_throughput=lambda n, elapsed, rate: print(
+                                f"{first_row + n} rows, {rate:.1f} rows/s", file=sys.stderr),
+                            progress_interval=args.checkpoint_every,
+                            **options):
+            if output_format == "csv":
+                if fieldnames is None:
+                    fieldnames = csv_fieldnames(result.record)
+                    if row == 0:
+                        out.write(csv_header(fieldnames))
+                out.write(csv_text([result], fieldnames))
+            else:
+                out.write(jsonl_text([result], row))
+            row += 1
+            yield 1
+    finally:
+        # Closing the SQLite connection checkpoints its WAL into the database file
+        if client is not None:
+            client.close()
+            client.cache.close()
+
+
+def write_sharded(args, records, out, first_row: int, output_format: str, options: dict):
+    """
+    Geocode records in shards on a process pool, writing each shard's output in order.
+    Yields the number of rows written after each shard.
+    """
+    from sharded_runner import run_sharded
+
+    formatter = jsonl_text
+    if output_format == "csv":
+        # Peek at the first record for the column names, then put it back
+        first = next(records, None)
+        if first is None:
+            return
+        records = itertools.chain((first,), records)
+        fieldnames = csv_fieldnames(first)
+        formatter = functools.partial(csv_shard_text, fieldnames=fieldnames)
+        if first_row == 0:
+            out.write(csv_header(fieldnames))
+
+    for shard in run_sharded(records, args.operation, args.license_key, args.live, formatter,
+                             processes=args.processes,
+                             workers_per_process=args.workers,
+                             shard_size=args.shard_size,
+                             cache_path=args.cache,
+                             start_row=first_row,
+                             options=options):
+        out.write(shard.output)
+        print(f"{shard.first_row + shard.rows} rows ({shard.failed} failed in shard {shard.index})",
+              file=sys.stderr)
+        yield shard.rows
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.license_key:
+        print("A license key is required (--license-key or AGI_LICENSE_KEY).", file=sys.stderr)
+        return 2
+
+    fields = PLACE_SEARCH_FIELDS if args.operation == "place" else REVERSE_SEARCH_FIELDS
+    options = {"dedupe": True} if args.dedupe and args.operation == "place" else {}
+    input_format = _file_format(args.input, args.input_format)
+    output_format = _file_format(args.output, args.output_format)
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    if args.restart or not os.path.exists(args.output):
+        checkpoint = {"completed": 0, "output_offset": 0}
+    completed = checkpoint["completed"]
+    if completed:
+        print(f"Resuming after row {completed}.", file=sys.stderr)
+
+    # Skip rows already written; drop any partial output written after the last checkpoint
+    records = itertools.islice(read_records(args.input, input_format, fields), completed, None)
+    out = open(args.output, "r+" if completed else "w", newline="", encoding="utf-8")
+    out.seek(checkpoint["output_offset"])
+    out.truncate()
+
+    if args.processes > 1:
+        progress = write_sharded(args, records, out, completed, output_format, options)
+    else:
+        progress = write_threaded(args, records, out, completed, output_format, options)
+
+    saved = completed
+    try:
+        for rows in progress:
+            completed += rows
+            if completed - saved >= args.checkpoint_every:
+                out.flush()
+                save_checkpoint(checkpoint_path, completed, out.tell())
+                saved = completed
+    finally:
+        progress.close()
+        out.flush()
+        save_checkpoint(checkpoint_path, completed, out.tell())
+        out.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+'''
+Service Objects - AGI Hedged Requests
+
+This module provides HedgePolicy, which controls optional request hedging in
+AGIRestClient and AsyncAGIRestClient. When the primary endpoint has not answered within
+the hedge delay, the same request is also sent to the backup endpoint and whichever
+answers first wins. The delay is either fixed or learned from a percentile of recent
+primary latencies, and a hedge budget caps the extra load to a fraction of requests.
+
+Classes:
+    HedgePolicy(delay_s: float = None,
+                percentile: float = 0.95,
+                initial_delay_s: float = 0.5,
+                min_delay_s: float = 0.02,
+                window: int = 512,
+                budget_ratio: float = 0.05,
+                budget_burst: float = 10)
+'''
+
+import math
+import threading
+from collections import deque
+
+
+class HedgePolicy:
+    """
+    Thread-safe hedge delay and budget shared by all calls of a client.
+    """
+
+    def __init__(self,
+                delay_s: float = None,
+                percentile: float = 0.95,
+                initial_delay_s: float = 0.5,
+                min_delay_s: float = 0.02,
+                window: int = 512,
+                budget_ratio: float = 0.05,
+                budget_burst: float = 10):
+        """
+        Initialize the hedge policy.
+
+        Parameters:
+            delay_s (float): Fixed hedge delay in seconds; None learns it from recent latencies.
+            percentile (float): Latency percentile used as the learned delay (0-1).
+            initial_delay_s (float): Delay used until enough latencies have been observed.
+            min_delay_s (float): Lower bound for the learned delay.
+            window (int): Number of recent primary latencies kept.
+            budget_ratio (float): Hedges allowed per primary request (0.05 = at most 5% extra load).
+            budget_burst (float): Maximum hedge tokens that can accumulate.
+        """
+        self.delay_s = delay_s
+        self.percentile = percentile
+        self.initial_delay_s = initial_delay_s
+        self.min_delay_s = min_delay_s
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+
+        self._latencies = deque(maxlen=window)
+        self._learned = initial_delay_s
+        self._since_recompute = 0
+        self._tokens = budget_burst
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._denied = 0
+
+    def delay(self) -> float:
+        """
+        Return the current hedge delay in seconds.
+        """
+        if self.delay_s is not None:
+            return self.delay_s
+        with self._lock:
+            return self._learned
+
+    def record_latency(self, seconds: float) -> None:
+        """
+        Record a primary latency; the learned delay is refreshed periodically. For a primary
+        request cancelled after losing to a hedge, pass the time it had run: a lower bound
+        that keeps slow requests in the sample.
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+            self._since_recompute += 1
+            if self._since_recompute >= 32 and len(self._latencies) >= 32:
+                self._since_recompute = 0
+                ordered = sorted(self._latencies)
+                idx = min(len(ordered) - 1, max(0, math.ceil(self.percentile * len(ordered)) - 1))
+                self._learned = max(self.min_delay_s, ordered[idx])
+
+    def note_request(self) -> None:
+        """
+        Count a primary request and add its share of hedge budget.
+        """
+        with self._lock:
+            self._requests += 1
+            self._tokens = min(self.budget_burst, self._tokens + self.budget_ratio)
+
+    def try_acquire(self) -> bool:
+        """
+        Take one hedge token; returns False when the budget is exhausted.
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._hedges += 1
+                return True
+            self._denied += 1
+            return False
+
+    def record_win(self, hedge_won: bool) -> None:
+        """
+        Record whether the hedged backup request beat the primary.
+        """
+        if hedge_won:
+            with self._lock:
+                self._hedge_wins += 1
+
+    def stats(self) -> dict:
+        """
+        Return request/hedge counters and the current delay.
+        """
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "hedges_denied": self._denied,
+                "hedge_rate": self._hedges / self._requests if self._requests else 0.0,
+                "delay_s": self.delay_s if self.delay_s is not None else self._learned,
+            }
@@ -0,0 +1,245 @@
+'''
+Service Objects - AGI Client-Side Rate Limiting
+
+This module provides two optional throttles for AGIRestClient and AsyncAGIRestClient.
+Both are process-wide objects that can be shared by threads and asyncio tasks at once.
+
+TokenBucket caps the request rate: each HTTP request takes one token, tokens refill at
+rate_per_s, and up to burst requests may go out back to back.
+
+AdaptiveConcurrency caps the number of requests in flight with an AIMD limit: the limit
+grows by about one per round trip while latency stays close to the best recently seen
+and requests succeed, and is cut by decrease_factor on a congestion signal from a request
+that was actually sent: a timeout, an HTTP 429 or 503 response, a service-error payload
+(Error.TypeCode 3), or latency above latency_tolerance times the baseline. Other
+failures, such as an exhausted deadline, free the slot without adjusting the limit.
+
+Classes:
+    TokenBucket(rate_per_s: float,
+                burst: float = None)
+    AdaptiveConcurrency(initial_limit: int = 8,
+                min_limit: int = 1,
+                max_limit: int = 256,
+                decrease_factor: float = 0.7,
+                latency_tolerance: float = 2.0)
+'''
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+# HTTP statuses that signal an overloaded service
+CONGESTION_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """
+    Thread- and asyncio-safe token bucket rate limiter.
+    """
+
+    def __init__(self, rate_per_s: float, burst: float = None):
+        """
+        Initialize the token bucket.
+
+        Parameters:
+            rate_per_s (float): Sustained requests per second.
+            burst (float): Maximum tokens that can accumulate; defaults to one second of rate.
+        """
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be positive")
+        self.rate_per_s = rate_per_s
+        self.burst = burst if burst is not None else max(1.0, rate_per_s)
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take one token, possibly going into debt, and return how long the caller must wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_s
+
+    def try_acquire(self) -> bool:
+        """
+        Take one token if one is available now; never waits.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """
+        Take one token, sleeping the calling thread until it is due.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """
+        Take one token, suspending the calling task until it is due.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """
+    Thread- and asyncio-safe AIMD limit on the number of requests in flight.
+    """
+
+    def __init__(self,
+                initial_limit: int = 8,
+                min_limit: int = 1,
+                max_limit: int = 256,
+                decrease_factor: float = 0.7,
+                latency_tolerance: float = 2.0):
+        """
+        Initialize the adaptive concurrency limit.
+
+        Parameters:
+            initial_limit (int): Starting limit on requests in flight.
+            min_limit (int): Lowest the limit may drop to.
+            max_limit (int): Highest the limit may grow to.
+            decrease_factor (float): Multiplier applied to the limit on a congestion signal.
+            latency_tolerance (float): Latency above this multiple of the baseline counts as congestion.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self._in_flight = 0
+        self._baseline = None
+        self._last_decrease = 0.0
+        self._increases = 0
+        self._decreases = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._async_waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _try_enter(self) -> bool:
+        """
+        Take a slot if one is free. Caller holds the lock.
+        """
+        if self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        """
+        Wait in the calling thread for a free slot and take it.
+        """
+        with self._available:
+            while not self._try_enter():
+                self._available.wait()
+
+    async def acquire_async(self) -> None:
+        """
+        Wait in the calling task for a free slot and take it.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_enter():
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass on a wake-up this task received but can no longer use
+                if waiter.done() and not waiter.cancelled():
+                    with self._lock:
+                        self._wake()
+                raise
+
+    def _wake(self) -> None:
+        """
+        Wake waiters after slots were freed or the limit grew. Caller holds the lock.
+        """
+        self._available.notify_all()
+        free = int(self._limit) - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            loop.call_soon_threadsafe(self._resolve, waiter)
+            free -= 1
+
+    def _resolve(self, waiter) -> None:
+        """
+        Wake one async waiter on its own loop; if it was cancelled meanwhile, wake another.
+        """
+        if not waiter.done():
+            waiter.set_result(None)
+        else:
+            with self._lock:
+                self._wake()
+
+    def release(self, latency_s: float, ok) -> None:
+        """
+        Free a slot and adjust the limit from the request's outcome.
+
+        Parameters:
+            latency_s (float): Request latency in seconds.
+            ok (bool): True for a response; False for a congestion signal (a timeout, an
+                HTTP status in CONGESTION_STATUSES or a service-error payload); None to
+                free the slot without adjusting the limit (e.g. a cancelled request, an
+                exhausted deadline or another failure).
+        """
+        with self._lock:
+            saturated = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            if ok is not None:
+                if ok:
+                    # Track the best recent latency, letting it drift up slowly if the service slows down
+                    self._baseline = latency_s if self._baseline is None else min(latency_s, self._baseline * 1.001)
+                    ok = latency_s <= self._baseline * self.latency_tolerance
+                if ok:
+                    # Additive increase, about +1 per limit's worth of successful requests; only
+                    # while at least half the limit is in use, so an idle client does not inflate it
+                    if saturated and self._limit < self.max_limit:
+                        self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                        self._increases += 1
+                else:
+                    now = time.monotonic()
+                    # Multiplicative decrease, at most once per round trip so one burst of failures counts once
+                    if now - self._last_decrease >= (self._baseline or latency_s):
+                        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                        self._last_decrease = now
+                        self._decreases += 1
+            self._wake()
+
+    def stats(self) -> dict:
+        """
+        Return the current limit, in-flight count and adjustment counters.
+        """
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "baseline_latency_s": self._baseline,
+                "increases": self._increases,
+                "decreases": self._decreases,
+            }
+
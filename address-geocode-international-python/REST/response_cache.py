@@ -0,0 +1,233 @@
+'''
+Service Objects - AGI Response Cache
+
+This module provides ResponseCache, an opt-in two-tier cache for AGI responses: a
+bounded in-process LRU with TTL eviction in front of an optional persistent tier that
+survives restarts, either SQLite or a memory-mapped ResultStore (see result_store.py).
+Keys are built from a canonical form of the request parameters, the live/trial endpoint
+and a hash of the license key, so the same cache can be shared by the REST functions (via
+AGIRestClient), the SOAP PlaceSearch / ReverseSearch classes and several license keys.
+
+Classes:
+    ResponseCache(max_entries: int = 10000,
+                ttl_s: float = 86400,
+                sqlite_path: str = None,
+                store: ResultStore = None)
+
+Functions:
+    cache_key(operation: str, params: dict, is_live: bool = None) -> str
+    license_hash(license_key: str) -> str
+'''
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from result_store import ResultStore
+
+# Parameters left out of the canonical form; cache_key adds a hash of the license key instead
+IGNORED_PARAMS = frozenset(("LicenseKey",))
+
+
+def canonical_params(params: dict) -> dict:
+    """
+    Return a canonical copy of the request parameters: license key dropped,
+    None treated as empty, and strings trimmed, whitespace-collapsed and casefolded.
+    """
+    out = {}
+    for name, value in params.items():
+        if name in IGNORED_PARAMS:
+            continue
+        if value is None:
+            value = ""
+        elif isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        else:
+            value = str(value)
+        out[name] = value
+    return out
+
+
+def license_hash(license_key: str) -> str:
+    """
+    Return the SHA-256 hex digest that stands in for a license key in keys and file headers.
+    """
+    return hashlib.sha256(str(license_key).encode("utf-8")).hexdigest()
+
+
+def cache_key(operation: str, params: dict, is_live: bool = None) -> str:
+    """
+    Return a stable cache key for an operation and its request parameters.
+
+    Responses differ between the live and trial endpoints and between license keys (an
+    invalid or exhausted key gets an Error), so both are part of the key: is_live when
+    given, and a SHA-256 of the LicenseKey parameter when present. The key itself never
+    contains the license key.
+    """
+    canonical = canonical_params(params)
+    if is_live is not None:
+        canonical["IsLive"] = "true" if is_live else "false"
+    license_key = params.get("LicenseKey")
+    if license_key:
+        canonical["LicenseKey"] = license_hash(license_key)
+    canonical = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return operation + ":" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe two-tier response cache (in-memory LRU + optional SQLite or ResultStore).
+    """
+
+    def __init__(self,
+                max_entries: int = 10000,
+                ttl_s: float = 86400,
+                sqlite_path: str = None,
+                store: ResultStore = None):
+        """
+        Initialize the cache.
+
+        Parameters:
+            max_entries (int): Maximum number of responses held in memory.
+            ttl_s (float): Seconds a cached response stays valid in either tier.
+            sqlite_path (str): Path of the persistent SQLite database, which several processes may
+                share; None keeps the cache in memory only.
+            store (ResultStore): Memory-mapped persistent tier, which several processes may share;
+                used instead of SQLite when both are given.
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.sqlite_path = sqlite_path
+        self.store = store
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(("hits", "memory_hits", "sqlite_hits", "store_hits", "misses",
+                                     "evictions", "expirations", "puts"), 0)
+
+        self._db = None
+        if sqlite_path and store is None:
+            # The timeout lets several processes share one database file, waiting for each other's writes
+            self._db = sqlite3.connect(sqlite_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def key(self, operation: str, params: dict, is_live: bool = None) -> str:
+        """
+        Return the cache key for an operation, its request parameters and endpoint (see cache_key).
+        """
+        return cache_key(operation, params, is_live)
+
+    def _remember(self, key: str, expires_at: float, value) -> None:
+        """
+        Insert into the memory tier, evicting the least recently used entries. Caller holds the lock.
+        """
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str):
+        """
+        Return the cached response for a key, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self.store is not None:
+                entry = self.store.lookup(key)
+                if entry is not None:
+                    value = json.loads(entry[0].tobytes())
+                    self._remember(key, entry[1], value)
+                    self._stats["hits"] += 1
+                    self._stats["store_hits"] += 1
+                    return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[0] > now:
+                        value = json.loads(row[1])
+                        self._remember(key, row[0], value)
+                        self._stats["hits"] += 1
+                        self._stats["sqlite_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value) -> None:
+        """
+        Store a response in both tiers. Values that are not JSON-serializable
+        (such as suds objects) are kept in the memory tier only.
+        """
+        expires_at = time.time() + self.ttl_s
+        encoded = None
+        if self._db is not None or self.store is not None:
+            try:
+                encoded = json.dumps(value, separators=(",", ":"))
+            except (TypeError, ValueError):
+                encoded = None
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats["puts"] += 1
+            if encoded is not None and self.store is not None:
+                self.store.put(key, encoded, expires_at)
+            elif encoded is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, encoded),
+                )
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the hit/miss/eviction counters and the memory tier size.
+        """
+        with self._lock:
+            out = dict(self._stats)
+            out["memory_entries"] = len(self._memory)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        return out
+
+    def clear(self) -> None:
+        """
+        Remove every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self.store is not None:
+                self.store.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """
+        Close the SQLite tier.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,529 @@
+'''
+Service Objects - AGI Result Store
+
+This module provides ResultStore, a compact on-disk store for geocode results keyed by
+request key (see response_cache.cache_key). It is made for millions of results that
+must be looked up without loading them all into memory. It can serve as the persistent
+tier of a ResponseCache, or be read directly by reporting jobs.
+
+A store is a directory holding:
+    CURRENT      names the live log and index files
+    LOCK         serializes writers across processes
+    *.log        append-only record log: [crc32, value length, key length, flags, expires_at] key value
+    *.idx        open-addressing hash table of (key hash, record offset) slots, plus a header
+                 with the capacity, entry count and committed log length
+
+Both files are memory-mapped. get() hashes the key, probes the index and returns a
+memoryview of the value inside the mapped log. No bytes are copied or decoded until the
+caller asks for them. Any number of processes may read while others write. Writers take
+LOCK for each put, append the record, publish the new log length and then point the
+index slot at the record, so a reader never sees a slot for a half-written record.
+Replacing a key appends a new record and repoints its slot. compact() rewrites the live,
+unexpired records into fresh files. When the index fills up it is rebuilt at twice the
+size. In both cases the old index is marked stale, and every reader switches to the new
+files on its next lookup.
+
+Classes:
+    ResultStore(path: str,
+                readonly: bool = False,
+                initial_capacity: int = 65536)
+'''
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_LOG_MAGIC = b"AGIRLOG1"
+_LOG_HEADER_SIZE = 16
+_INDEX_MAGIC = b"AGIRIDX1"
+_INDEX_VERSION = 1
+_INDEX_HEADER_SIZE = 64
+
+# Index header: magic, version, stale flag, capacity, entry count, committed log length, records appended
+_INDEX_HEADER = struct.Struct("<8sIIQQQQ")
+_STALE_AT = 12
+_CAPACITY_AT = 16
+_COUNT_AT = 24
+_LOG_END_AT = 32
+_APPENDED_AT = 40
+
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_SLOT = struct.Struct("<QQ")
+# Record header: crc32 of key + value, value length, key length, flags (unused), expires_at (0 = never)
+_RECORD = struct.Struct("<IIHHd")
+
+MAX_LOAD = 0.7
+
+
+def _key_bytes(key) -> bytes:
+    return key if isinstance(key, bytes) else str(key).encode("utf-8")
+
+
+def _hash(key: bytes) -> int:
+    """
+    Return the 64-bit slot hash of a key; never 0, which marks an empty slot.
+    """
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class ResultStore:
+    """
+    Append-only, memory-mapped key/value store for geocode results.
+    Thread-safe; several processes may open the same store.
+    """
+
+    def __init__(self, path: str, readonly: bool = False, initial_capacity: int = 65536):
+        """
+        Open (or create) a store.
+
+        Parameters:
+            path (str): Store directory; created if missing unless readonly.
+            readonly (bool): Open for lookups only.
+            initial_capacity (int): Index slots of a new store, rounded up to a power of two.
+        """
+        self.path = path
+        self.readonly = readonly
+        self.initial_capacity = 1 << max(4, (initial_capacity - 1).bit_length())
+
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._index = None
+        self._log = None
+        self._log_file = None
+        self._files = None
+
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+            self._lock_file = open(os.path.join(path, "LOCK"), "a+b")
+            with self._write_lock():
+                if not os.path.exists(self._current_path()):
+                    self._publish(*self._create_files(self.initial_capacity))
+                self._open_current()
+        else:
+            self._open_current()
+
+    # --- files ---------------------------------------------------------------------
+
+    def _current_path(self) -> str:
+        return os.path.join(self.path, "CURRENT")
+
+    def _create_files(self, capacity: int) -> tuple:
+        """
+        Create an empty log and index and return their names.
+        """
+        stamp = f"{time.time_ns():x}"
+        log_name = stamp + ".log"
+        with open(os.path.join(self.path, log_name), "wb") as f:
+            f.write(_LOG_MAGIC.ljust(_LOG_HEADER_SIZE, b"\0"))
+        return log_name, self._new_index(capacity, _LOG_HEADER_SIZE, 0, stamp)
+
+    def _new_index(self, capacity: int, log_end: int, appended: int, stamp: str) -> str:
+        """
+        Write an empty index file of the given capacity and return its name.
+        """
+        name = f"{stamp}-{capacity}.idx"
+        with open(os.path.join(self.path, name), "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, 0, capacity, 0, log_end, appended)
+                    .ljust(_INDEX_HEADER_SIZE, b"\0"))
+            f.truncate(_INDEX_HEADER_SIZE + capacity * _SLOT.size)
+        return name
+
+    def _publish(self, log_name: str, index_name: str) -> None:
+        """
+        Atomically point CURRENT at a log and index.
+        """
+        tmp = self._current_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"log": log_name, "index": index_name}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._current_path())
+
+    def _open_current(self) -> None:
+        """
+        Map the log and index named by CURRENT, replacing any previous mapping.
+        """
+        access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+        for attempt in range(3):
+            with open(self._current_path(), encoding="utf-8") as f:
+                files = json.load(f)
+            try:
+                with open(os.path.join(self.path, files["index"]), "rb" if self.readonly else "r+b") as f:
+                    index = mmap.mmap(f.fileno(), 0, access=access)
+                break
+            except FileNotFoundError:
+                # Another compaction replaced the files between reading CURRENT and opening them
+                if attempt == 2:
+                    raise
+        magic, version = _INDEX_HEADER.unpack_from(index, 0)[:2]
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            raise ValueError(f"{self.path} is not a result store")
+
+        if self._log_file is not None:
+            self._log_file.close()
+        log_path = os.path.join(self.path, files["log"])
+        self._log_file = None if self.readonly else open(log_path, "r+b")
+        # Older mappings are left to the garbage collector: callers may still hold views into them
+        self._files = files
+        self._index = index
+        self._log = self._map_log()
+
+    def _map_log(self) -> mmap.mmap:
+        with open(os.path.join(self.path, self._files["log"]), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _refresh(self) -> None:
+        """
+        Switch to the current files if a compaction or index rebuild replaced ours.
+        """
+        if _U32.unpack_from(self._index, _STALE_AT)[0]:
+            with self._lock:
+                if _U32.unpack_from(self._index, _STALE_AT)[0]:
+                    self._open_current()
+
+    def _log_view(self, offset: int, size: int) -> mmap.mmap:
+        """
+        Return a log mapping covering [offset, offset + size), remapping if the log has grown.
+        """
+        log = self._log
+        if offset + size > len(log):
+            with self._lock:
+                if offset + size > len(self._log):
+                    self._log = self._map_log()
+                log = self._log
+        return log
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """
+        Hold both the thread lock and the cross-process LOCK file.
+        """
+        with self._lock:
+            fd = self._lock_file.fileno()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    # --- reads ---------------------------------------------------------------------
+
+    def _find(self, key: bytes):
+        """
+        Return (slot position, record offset) for a key; record offset is 0 when absent.
+        """
+        index = self._index
+        capacity = _U64.unpack_from(index, _CAPACITY_AT)[0]
+        mask = capacity - 1
+        h = _hash(key)
+        slot = h & mask
+        while True:
+            position = _INDEX_HEADER_SIZE + slot * _SLOT.size
+            slot_hash, offset = _SLOT.unpack_from(index, position)
+            if slot_hash == 0:
+                return position, 0
+            if slot_hash == h and offset:
+                log = self._log_view(offset, _RECORD.size)
+                key_len = _RECORD.unpack_from(log, offset)[2]
+                start = offset + _RECORD.size
+                log = self._log_view(start, key_len)
+                if log[start:start + key_len] == key:
+                    return position, offset
+            slot = (slot + 1) & mask
+
+    def _read(self, offset: int):
+        """
+        Return (key view, value view, expires_at) for the record at offset.
+        """
+        log = self._log_view(offset, _RECORD.size)
+        crc, value_len, key_len, _, expires_at = _RECORD.unpack_from(log, offset)
+        start = offset + _RECORD.size
+        log = self._log_view(start, key_len + value_len)
+        body = memoryview(log)[start:start + key_len + value_len]
+        if zlib.crc32(body) != crc:
+            raise ValueError(f"Corrupt record at offset {offset} in {self._files['log']}")
+        return body[:key_len], body[key_len:], expires_at
+
+    def lookup(self, key):
+        """
+        Return (value view, expires_at) for a key, or None if it is missing or expired.
+        """
+        self._refresh()
+        _, offset = self._find(_key_bytes(key))
+        if not offset:
+            return None
+        _, value, expires_at = self._read(offset)
+        if expires_at and expires_at <= time.time():
+            return None
+        return value, expires_at
+
+    def get(self, key):
+        """
+        Return the stored value as a read-only memoryview into the mapped log (no copy),
+        or None if the key is missing or expired. bytes(view) or json.loads(view.tobytes())
+        materializes it.
+        """
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    def get_json(self, key):
+        """
+        Return the stored value decoded from JSON, or None.
+        """
+        value = self.get(key)
+        return None if value is None else json.loads(value.tobytes())
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        """
+        Return the number of distinct keys, including expired ones not yet compacted.
+        """
+        self._refresh()
+        return _U64.unpack_from(self._index, _COUNT_AT)[0]
+
+    def items(self):
+        """
+        Yield (key, value view, expires_at) for every live record, in index order,
+        without loading the store into memory.
+        """
+        self._refresh()
+        index = self._index
+        capacity = _U64.unpack_from(index, _CAPACITY_AT)[0]
+        now = time.time()
+        for slot in range(capacity):
+            slot_hash, offset = _SLOT.unpack_from(index, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+            if not slot_hash or not offset:
+                continue
+            key, value, expires_at = self._read(offset)
+            if expires_at and expires_at <= now:
+                continue
+            yield key.tobytes().decode("utf-8"), value, expires_at
+
+    # --- writes --------------------------------------------------------------------
+
+    def put(self, key, value, expires_at: float = 0.0) -> None:
+        """
+        Store a value under a key, replacing any previous value.
+
+        Parameters:
+            key (str | bytes): Request key, e.g. from cache_key().
+            value (bytes | str | object): Raw bytes, text, or a JSON-serializable object.
+            expires_at (float): Unix time after which the value is ignored; 0 never expires.
+        """
+        if self.readonly:
+            raise PermissionError("ResultStore opened readonly")
+        key = _key_bytes(key)
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        elif not isinstance(value, (bytes, bytearray, memoryview)):
+            value = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        body = key + bytes(value)
+        record = _RECORD.pack(zlib.crc32(body), len(body) - len(key), len(key), 0, expires_at) + body
+
+        with self._write_lock():
+            self._refresh()
+            index = self._index
+            if (_U64.unpack_from(index, _COUNT_AT)[0] + 1) > _U64.unpack_from(index, _CAPACITY_AT)[0] * MAX_LOAD:
+                self._grow()
+                index = self._index
+
+            # Append the record, then publish the log length, then point the slot at it
+            log_end = _U64.unpack_from(index, _LOG_END_AT)[0]
+            self._log_file.seek(log_end)
+            self._log_file.write(record)
+            self._log_file.flush()
+            _U64.pack_into(index, _LOG_END_AT, log_end + len(record))
+            _U64.pack_into(index, _APPENDED_AT, _U64.unpack_from(index, _APPENDED_AT)[0] + 1)
+
+            position, offset = self._find(key)
+            if offset:
+                _U64.pack_into(index, position + 8, log_end)
+            else:
+                # Offset before hash: a reader that sees the hash also sees a valid offset
+                _U64.pack_into(index, position + 8, log_end)
+                _U64.pack_into(index, position, _hash(key))
+                _U64.pack_into(index, _COUNT_AT, _U64.unpack_from(index, _COUNT_AT)[0] + 1)
+
+    def _grow(self) -> None:
+        """
+        Rebuild the index at twice the capacity. Caller holds the write lock.
+        """
+        old = self._index
+        _, _, _, capacity, count, log_end, appended = _INDEX_HEADER.unpack_from(old, 0)
+        name = self._new_index(capacity * 2, log_end, appended, f"{time.time_ns():x}")
+        with open(os.path.join(self.path, name), "r+b") as f:
+            index = mmap.mmap(f.fileno(), 0)
+        mask = capacity * 2 - 1
+        for slot in range(capacity):
+            slot_hash, offset = _SLOT.unpack_from(old, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+            if not slot_hash:
+                continue
+            new_slot = slot_hash & mask
+            while _U64.unpack_from(index, _INDEX_HEADER_SIZE + new_slot * _SLOT.size)[0]:
+                new_slot = (new_slot + 1) & mask
+            _SLOT.pack_into(index, _INDEX_HEADER_SIZE + new_slot * _SLOT.size, slot_hash, offset)
+        _U64.pack_into(index, _COUNT_AT, count)
+        index.flush()
+        index.close()
+        self._switch(self._files["log"], name)
+
+    def _switch(self, log_name: str, index_name: str) -> None:
+        """
+        Publish new files, mark the old index stale for other readers and remove unused files.
+        Caller holds the write lock.
+        """
+        old_index = self._index
+        self._publish(log_name, index_name)
+        _U32.pack_into(old_index, _STALE_AT, 1)
+        old_index.flush()
+        self._open_current()
+        self._remove_unused()
+
+    def _remove_unused(self) -> None:
+        """
+        Delete log and index files CURRENT no longer names. Files still mapped by a reader
+        on Windows cannot be removed yet; they are retried on the next switch.
+        """
+        keep = set(self._files.values())
+        for name in os.listdir(self.path):
+            if name.endswith((".log", ".idx")) and name not in keep:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    def compact(self) -> dict:
+        """
+        Rewrite the live, unexpired records into a new log and index, dropping replaced and
+        expired ones. Readers keep working throughout and switch to the new files afterwards.
+
+        Returns:
+            dict: Records kept and bytes before and after.
+        """
+        if self.readonly:
+            raise PermissionError("ResultStore opened readonly")
+        with self._write_lock():
+            self._refresh()
+            old_index = self._index
+            capacity, _, log_end = _INDEX_HEADER.unpack_from(old_index, 0)[3:6]
+            now = time.time()
+
+            stamp = f"{time.time_ns():x}"
+            log_name = stamp + ".log"
+            live = []
+            with open(os.path.join(self.path, log_name), "wb") as out:
+                out.write(_LOG_MAGIC.ljust(_LOG_HEADER_SIZE, b"\0"))
+                position = _LOG_HEADER_SIZE
+                for slot in range(capacity):
+                    slot_hash, offset = _SLOT.unpack_from(old_index, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+                    if not slot_hash or not offset:
+                        continue
+                    log = self._log_view(offset, _RECORD.size)
+                    value_len, key_len, _, expires_at = _RECORD.unpack_from(log, offset)[1:]
+                    if expires_at and expires_at <= now:
+                        continue
+                    size = _RECORD.size + key_len + value_len
+                    out.write(self._log_view(offset, size)[offset:offset + size])
+                    live.append((slot_hash, position))
+                    position += size
+                out.flush()
+                os.fsync(out.fileno())
+
+            new_capacity = self.initial_capacity
+            while len(live) + 1 > new_capacity * MAX_LOAD:
+                new_capacity *= 2
+            index_name = self._new_index(new_capacity, position, len(live), stamp)
+            with open(os.path.join(self.path, index_name), "r+b") as f:
+                index = mmap.mmap(f.fileno(), 0)
+            mask = new_capacity - 1
+            for slot_hash, offset in live:
+                slot = slot_hash & mask
+                while _U64.unpack_from(index, _INDEX_HEADER_SIZE + slot * _SLOT.size)[0]:
+                    slot = (slot + 1) & mask
+                _SLOT.pack_into(index, _INDEX_HEADER_SIZE + slot * _SLOT.size, slot_hash, offset)
+            _U64.pack_into(index, _COUNT_AT, len(live))
+            index.flush()
+            index.close()
+
+            self._switch(log_name, index_name)
+            return {"records": len(live), "bytes_before": log_end, "bytes_after": position}
+
+    def clear(self) -> None:
+        """
+        Remove every record by switching to an empty log and index.
+        """
+        if self.readonly:
+            raise PermissionError("ResultStore opened readonly")
+        with self._write_lock():
+            self._refresh()
+            self._switch(*self._create_files(self.initial_capacity))
+
+    def stats(self) -> dict:
+        """
+        Return the entry count, index capacity and load, and log size.
+        """
+        self._refresh()
+        _, _, _, capacity, count, log_end, appended = _INDEX_HEADER.unpack_from(self._index, 0)
+        return {
+            "entries": count,
+            "capacity": capacity,
+            "load": count / capacity,
+            "records_appended": appended,
+            "log_bytes": log_end,
+        }
+
+    def flush(self) -> None:
+        """
+        Flush the index and log to disk.
+        """
+        if not self.readonly:
+            with self._lock:
+                self._index.flush()
+                self._log_file.flush()
+                os.fsync(self._log_file.fileno())
+
+    def close(self) -> None:
+        """
+        Release the mappings and file handles. Views returned by get() stay valid until released.
+        """
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            for mapping in (self._index, self._log):
+                try:
+                    mapping.close()
+                except BufferError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,231 @@
+'''
+Service Objects - AGI Retry Policy and Deadlines
+
+This module provides the retry and deadline support used by AGIRestClient,
+AsyncAGIRestClient and (duck-typed) the SOAP PlaceSearch / ReverseSearch classes.
+
+A Deadline is a total time budget for one call. Every HTTP attempt made for the call
+gets a timeout of min(per-attempt timeout, time left). When too little time is left for
+another attempt, the call raises DeadlineExceeded, so a call never runs past the
+caller's budget.
+
+A RetryPolicy decides whether a failed call is tried again, and how long to wait first.
+Waits grow exponentially with random jitter, so many clients failing together do not
+retry in lockstep. A retry is never started if its wait would use up the deadline.
+Network failures and HTTP 408/429/5xx responses are retryable. AGI error payloads are
+retryable only for the TypeCodes in retryable_type_codes: by default 3 (service error).
+TypeCodes 1 (authorization), 2 (user input) and 4 (domain specific) are answers, not
+failures. A SOAP Fault is the service rejecting the request, so it is never retried, and
+neither is any other exception that is not recognizably a network failure.
+
+Functions:
+    http_status(ex: BaseException) -> int
+    is_soap_fault(ex: BaseException) -> bool
+    is_network_error(ex: BaseException) -> bool
+
+Classes:
+    Deadline(budget_s: float,
+                min_attempt_s: float = 0.05)
+    RetryPolicy(max_attempts: int = 3,
+                base_delay_s: float = 0.1,
+                max_delay_s: float = 2.0,
+                jitter: float = 1.0,
+                retryable_type_codes: tuple = ("3",),
+                retryable_statuses: tuple = (408, 429, 500, 502, 503, 504),
+                retry_on_network: bool = True)
+    DeadlineExceeded(RuntimeError, TimeoutError)
+    AGIUnavailableError(RuntimeError)
+    AGIResponseError(RuntimeError)
+'''
+
+import http.client
+import random
+import time
+
+# Network exception bases of the async and SOAP transports, matched by module and class
+# name so that neither package, nor asyncio, is imported here. requests' exceptions and
+# urllib's URLError are OSErrors, and asyncio.TimeoutError is a TimeoutError on 3.11+.
+TRANSPORT_ERRORS = frozenset((
+    ("aiohttp.client_exceptions", "ClientError"),
+    ("asyncio.exceptions", "TimeoutError"),
+    ("concurrent.futures._base", "TimeoutError"),
+    ("suds.transport", "TransportError"),
+))
+
+
+class DeadlineExceeded(RuntimeError, TimeoutError):
+    """
+    Raised when a call's deadline leaves no time for another attempt.
+    """
+
+
+class AGIUnavailableError(RuntimeError):
+    """
+    Raised when no endpoint could be reached; the network error is the __cause__ when known.
+    """
+
+
+class AGIResponseError(RuntimeError):
+    """
+    Raised when the backup endpoint answers with an AGI Error payload.
+    """
+
+    def __init__(self, message: str, error: dict):
+        super().__init__(message)
+        self.error = error
+
+
+class Deadline:
+    """
+    Total time budget for one call, shared by all of its attempts.
+    """
+
+    def __init__(self, budget_s: float, min_attempt_s: float = 0.05):
+        """
+        Start the deadline clock.
+
+        Parameters:
+            budget_s (float): Seconds from now until the deadline.
+            min_attempt_s (float): Smallest timeout worth starting an attempt with.
+        """
+        self.budget_s = budget_s
+        self.min_attempt_s = min_attempt_s
+        self.expires_at = time.monotonic() + budget_s
+
+    def remaining(self) -> float:
+        """
+        Return the seconds left before the deadline, never negative.
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() < self.min_attempt_s
+
+    def timeout(self, attempt_timeout_s: float) -> float:
+        """
+        Return the timeout for the next attempt.
+
+        Raises:
+            DeadlineExceeded: If less than min_attempt_s is left.
+        """
+        remaining = self.remaining()
+        if remaining < self.min_attempt_s:
+            raise DeadlineExceeded(f"Deadline of {self.budget_s:g} s exceeded")
+        return min(attempt_timeout_s, remaining)
+
+
+def http_status(ex: BaseException):
+    """
+    Return the HTTP status carried by a requests, aiohttp or suds exception, or None.
+    """
+    for attr in ("status", "httpcode"):
+        status = getattr(ex, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(ex, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_soap_fault(ex: BaseException) -> bool:
+    """
+    Return True for a SOAP Fault raised by suds (WebFault) or by soap_fast (SoapFault).
+    """
+    return ((hasattr(ex, "fault") and hasattr(ex, "document"))
+            or (hasattr(ex, "faultcode") and hasattr(ex, "faultstring")))
+
+
+def is_network_error(ex: BaseException) -> bool:
+    """
+    Return True for a connection failure, timeout or broken HTTP exchange from the standard
+    library, requests, aiohttp or suds.
+    """
+    if isinstance(ex, (OSError, http.client.HTTPException)):
+        return True
+    return any((cls.__module__, cls.__qualname__) in TRANSPORT_ERRORS for cls in type(ex).__mro__)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter and retryable-error classification.
+    Holds no per-call state, so one policy can be shared by every client.
+    """
+
+    def __init__(self,
+                max_attempts: int = 3,
+                base_delay_s: float = 0.1,
+                max_delay_s: float = 2.0,
+                jitter: float = 1.0,
+                retryable_type_codes: tuple = ("3",),
+                retryable_statuses: tuple = (408, 429, 500, 502, 503, 504),
+                retry_on_network: bool = True):
+        """
+        Initialize the retry policy.
+
+        Parameters:
+            max_attempts (int): Total attempts per call, including the first. A live attempt
+                already tries the primary and then the backup endpoint.
+            base_delay_s (float): Backoff before the first retry; doubles on each later retry.
+            max_delay_s (float): Upper bound for the backoff.
+            jitter (float): Fraction of the backoff that is randomized; 1.0 is "full jitter"
+                (uniform between 0 and the backoff), 0 is no jitter.
+            retryable_type_codes (tuple): AGI Error.TypeCode values worth retrying.
+            retryable_statuses (tuple): HTTP statuses worth retrying.
+            retry_on_network (bool): Retry connection errors and timeouts.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.jitter = jitter
+        self.retryable_type_codes = tuple(str(code) for code in retryable_type_codes)
+        self.retryable_statuses = tuple(retryable_statuses)
+        self.retry_on_network = retry_on_network
+
+    def backoff(self, retry: int) -> float:
+        """
+        Return the seconds to wait before a retry; retry counts from 0.
+        """
+        delay = min(self.max_delay_s, self.base_delay_s * (2 ** retry))
+        return delay * (1.0 - self.jitter) + random.uniform(0.0, delay * self.jitter)
+
+    def is_retryable_type_code(self, type_code) -> bool:
+        return str(type_code) in self.retryable_type_codes
+
+    def is_retryable_response(self, data) -> bool:
+        """
+        Return True if a parsed response (dict or suds object) carries a retryable Error.
+        """
+        error = data.get("Error") if isinstance(data, dict) else getattr(data, "Error", None)
+        if not error:
+            return False
+        type_code = error.get("TypeCode") if isinstance(error, dict) else getattr(error, "TypeCode", None)
+        return self.is_retryable_type_code(type_code)
+
+    def is_retryable_exception(self, ex: BaseException) -> bool:
+        """
+        Return True if the failure a call raised is worth retrying.
+
+        The exception and then its __cause__ chain are checked; the first one classified
+        decides: an AGI error payload by its TypeCode, a SOAP Fault never, an HTTP status
+        by retryable_statuses, and a network failure by retry_on_network. An
+        AGIUnavailableError whose causes are not classified counts as a network failure.
+        Anything else, such as a programming error, is not retried.
+        """
+        unavailable = False
+        while ex is not None:
+            if isinstance(ex, DeadlineExceeded):
+                return False
+            if isinstance(ex, AGIResponseError):
+                return self.is_retryable_type_code((ex.error or {}).get("TypeCode"))
+            if is_soap_fault(ex):
+                return False
+            status = http_status(ex)
+            if status is not None:
+                return status in self.retryable_statuses
+            if is_network_error(ex):
+                return self.retry_on_network
+            unavailable = unavailable or isinstance(ex, AGIUnavailableError)
+            ex = ex.__cause__
+        return self.retry_on_network if unavailable else False
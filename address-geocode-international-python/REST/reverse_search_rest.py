@@ -6,6 +6,7 @@ using Service Objects' AGI ReverseSearch API. It handles live/trial endpoints,
 fallback logic, and JSON parsing.
 
 Functions:
+    reverse_search_params(...) -> dict
     reverse_search(latitude: float,
                 longitude: float,
                 search_radius: int,
@@ -13,16 +14,41 @@ Functions:
                 max_results: int,
                 search_type: str,
                 license_key: str,
-                is_live: bool) -> dict
+                is_live: bool,
+                client: AGIRestClient = None,
+                spatial_cache: ReverseSearchGridCache = None) -> dict
 '''
 
-import requests  # HTTP client for RESTful API calls
+from agi_rest_client import AGIRestClient, get_default_client
+from spatial_cache import ReverseSearchGridCache
 
 # Endpoint URLs for AV3 service
 PRIMARY_URL = "https://sws.serviceobjects.com/AGI/api.svc/json/ReverseSearch"
 BACKUP_URL = "https://swsbackup.serviceobjects.com/AGI/api.svc/ReverseSearch"
 TRIAL_URL = "https://trial.serviceobjects.com/AGI/api.svc/json/ReverseSearch"
 
+def reverse_search_params(latitude: float,
+                longitude: float,
+                search_radius: int,
+                country: str,
+                max_results: int,
+                search_type: str,
+                license_key: str) -> dict:
+    """
+    Build the AGI ReverseSearch query parameters from the reverse_search arguments.
+    """
+
+    # Prepare query parameters for AGI API
+    return {
+        "Latitude": latitude,
+        "Longitude": longitude,
+        "SearchRadius": search_radius,
+        "Country": country,
+        "MaxResults": max_results,
+        "SearchType": search_type,
+        "LicenseKey": license_key
+    }
+
 def reverse_search(latitude: float,
                 longitude: float,
                 search_radius: int,
@@ -30,7 +56,9 @@ def reverse_search(latitude: float,
                 max_results: int,
                 search_type: str,
                 license_key: str,
-                is_live: bool) -> dict:
+                is_live: bool,
+                client: AGIRestClient = None,
+                spatial_cache: ReverseSearchGridCache = None) -> dict:
     """
     Call AGI ReverseSearch API and return location results.
 
@@ -43,68 +71,33 @@ def reverse_search(latitude: float,
         search_type (str): The name of the type of search you want to perform for the given address or place.
         license_key (str): Service Objects license key.
         is_live (bool): True for production, False for trial endpoint.
+        client (AGIRestClient): Optional pooled client; defaults to the shared process-wide client.
+        spatial_cache (ReverseSearchGridCache): Optional cache that answers from a nearby
+            previous result with the same search options, license key and endpoint.
 
     Returns:
         dict: Parsed JSON response with location data or error info.
 
     Raises:
-        RuntimeError: If the API returns an error payload.
-        requests.RequestException: On network/HTTP failures (trial mode).
+        RuntimeError: If the backup returns an error payload, both endpoints are
+            unreachable, or the trial endpoint fails.
     """
 
-    # Prepare query parameters for AGI API
-    params = {
-        "Latitude": latitude,
-        "Longitude": longitude,
-        "SearchRadius": search_radius,
-        "Country": country,
-        "MaxResults": max_results,
-        "SearchType": search_type,
-        "LicenseKey": license_key
-    }
-
-    # Select the base URL: production vs trial
-    url = PRIMARY_URL if is_live else TRIAL_URL
-
-    try:
-        # Attempt primary (or trial) endpoint first
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # If API returned an error in JSON payload, trigger fallback
-        error = getattr(response, 'Error', None)
-        if not (error is None or getattr(error, 'TypeCode', None) != "3"):
-            if is_live:
-                # Try backup URL when live
-                response = requests.get(BACKUP_URL, params=params, timeout=10)
-                data = response.json()
+    params = reverse_search_params(latitude, longitude, search_radius, country,
+                                   max_results, search_type, license_key)
 
-                # If still error, propagate exception
-                if "Error" in data:
-                    raise RuntimeError(f"AGI ReverseSearch error: {data['Error']}")
-            else:
-                # Trial mode should not fallback; error is terminal
-                return data
-        
-        # Success: return parsed JSON data
-        return data
+    # Answer locally when a nearby point with the same options was already resolved
+    if spatial_cache is not None:
+        cached = spatial_cache.lookup(latitude, longitude, search_radius, country, max_results, search_type,
+                                      license_key, is_live)
+        if cached is not None:
+            return cached
 
-    except requests.RequestException as req_exc:
-        # Network or HTTP-level error occurred
-        if is_live:
-            try:
-                # Fallback to backup URL on network failure
-                response = requests.get(BACKUP_URL, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                if "Error" in data:
-                    # Both primary and backup failed; escalate
-                    raise RuntimeError(f"AGI ReverseSearch backup error: {data['Error']}")
-                return data
-            except Exception as backup_exc:
-                raise RuntimeError("AGI ReverseSearch service unreachable on both endpoints") from backup_exc
+    # Delegate to the pooled client; it selects primary/backup/trial and handles fallback
+    client = client or get_default_client()
+    data = client.call("ReverseSearch", params, is_live, PRIMARY_URL, BACKUP_URL, TRIAL_URL)
 
-        else:
-            # In trial mode, propagate the network exception
-            raise RuntimeError(f"AGI trial error: {str(req_exc)}") from req_exc
+    if spatial_cache is not None and "Error" not in data:
+        spatial_cache.store(latitude, longitude, search_radius, country, max_results, search_type,
+                            license_key, is_live, data)
+    return data
@@ -0,0 +1,239 @@
+'''
+Service Objects - AGI Sharded Runner
+
+This module provides run_sharded, which splits a stream of records into fixed-size
+shards and geocodes them on a pool of worker processes, so response decoding and output
+formatting use every core instead of contending for one GIL. Each worker process holds
+its own pooled AGIRestClient and runs batch_place_search / batch_reverse_search on its
+shard with a thread pool. Workers also format their own output, so the parent only
+concatenates text.
+
+Shards are yielded in input order. At most two shards per process are pending at a time,
+so memory stays bounded for any input size. With cache_path, every worker opens the same
+SQLite-backed ResponseCache, so a request already answered in one shard is not repeated
+in another, nor in a later run.
+
+A shard whose worker raises is retried up to max_retries times. If a worker process
+dies, the pool is restarted and every pending shard is retried. A shard that still fails
+is yielded with every record marked with a ShardError, so one bad shard never stops the
+run.
+
+Classes:
+    ShardResult(NamedTuple)
+    ShardError(RuntimeError)
+
+Functions:
+    run_sharded(records: Iterable,
+                operation: str,
+                license_key: str,
+                is_live: bool,
+                formatter: Callable,
+                ...) -> Iterator[ShardResult]
+'''
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import util
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from batch_search import BatchResult
+
+
+class ShardResult(NamedTuple):
+    """
+    Outcome of one shard: its formatted output and record counts.
+    """
+    index: int
+    first_row: int
+    rows: int
+    failed: int
+    output: str
+
+
+class ShardError(RuntimeError):
+    """
+    Raised for every record of a shard that failed on all its attempts.
+    """
+
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def _init_worker(workers: int, cache_path: str, cache_ttl_s: float) -> None:
+    """
+    Create the pooled client (and shared cache) used by every shard in this worker process.
+    """
+    from agi_rest_client import AGIRestClient
+    from response_cache import ResponseCache
+
+    cache = ResponseCache(ttl_s=cache_ttl_s, sqlite_path=cache_path) if cache_path else None
+    _worker["workers"] = workers
+    _worker["client"] = AGIRestClient(pool_maxsize=workers, cache=cache)
+    # Worker processes skip atexit handlers, so close through multiprocessing's exit hook
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker() -> None:
+    """
+    Close this worker's client and cache; closing the SQLite connection checkpoints its WAL.
+    """
+    client = _worker.pop("client", None)
+    if client is not None:
+        client.close()
+        if client.cache is not None:
+            client.cache.close()
+
+
+def _run_shard(index: int,
+            first_row: int,
+            records: list,
+            operation: str,
+            license_key: str,
+            is_live: bool,
+            formatter: Callable,
+            options: dict) -> ShardResult:
+    """
+    Geocode one shard in a worker process and return its formatted output.
+    """
+    from batch_search import batch_place_search, batch_reverse_search
+
+    batch = batch_place_search if operation == "place" else batch_reverse_search
+    results = list(batch(records, license_key, is_live,
+                         max_workers=_worker["workers"],
+                         client=_worker["client"],
+                         progress_interval=len(records) + 1,
+                         **options))
+    failed = sum(1 for result in results if result.error is not None)
+    return ShardResult(index, first_row, len(results), failed, formatter(results, first_row))
+
+
+def _failed_shard(shard: list, error: BaseException, formatter: Callable) -> ShardResult:
+    """
+    Build the result of a shard that failed on every attempt, with each record marked failed.
+    """
+    index, first_row, records = shard[0], shard[1], shard[2]
+    ex = ShardError(f"Shard {index} failed after {shard[3]} attempts: {error!r}")
+    results = [BatchResult(i, record, None, ex) for i, record in enumerate(records)]
+    return ShardResult(index, first_row, len(results), len(results), formatter(results, first_row))
+
+
+def _done(result):
+    """
+    Return an already completed future holding result.
+    """
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def run_sharded(records: Iterable,
+                operation: str,
+                license_key: str,
+                is_live: bool,
+                formatter: Callable,
+                processes: int = None,
+                workers_per_process: int = 8,
+                shard_size: int = 1000,
+                cache_path: str = None,
+                cache_ttl_s: float = 86400,
+                max_retries: int = 2,
+                start_row: int = 0,
+                options: dict = None) -> Iterator[ShardResult]:
+    """
+    Geocode records on a process pool, yielding one ShardResult per shard in input order.
+
+    Parameters:
+        records (Iterable): Dicts keyed by the search argument names; consumed lazily.
+        operation (str): "place" or "reverse".
+        license_key (str): AGI API key.
+        is_live (bool): True for live endpoint; False for trial.
+        formatter (Callable): Module-level function called in the worker as
+            formatter(results: list[BatchResult], first_row: int) -> str; must be picklable.
+        processes (int): Worker processes; defaults to the CPU count.
+        workers_per_process (int): Concurrent requests within each worker process.
+        shard_size (int): Records per shard.
+        cache_path (str): SQLite file for a ResponseCache shared by all workers; None disables it.
+        cache_ttl_s (float): Seconds a cached response stays valid.
+        max_retries (int): Extra attempts for a shard whose worker raised or died.
+        start_row (int): Input row number of the first record, passed on to formatter.
+        options (dict): Extra keyword arguments for the batch function, e.g. {"dedupe": True}
+            to deduplicate within each shard.
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = processes * 2
+    initargs = (workers_per_process, cache_path, cache_ttl_s)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=initargs)
+
+    def submit(shard):
+        try:
+            shard[4] = executor.submit(_run_shard, shard[0], shard[1], shard[2],
+                                       operation, license_key, is_live, formatter, options or {})
+        except BrokenProcessPool as ex:
+            # The new pool broke already; handled like any other crash when this shard is awaited
+            shard[4] = Future()
+            shard[4].set_exception(ex)
+
+    def shards():
+        it = iter(records)
+        first_row = start_row
+        for index in itertools.count():
+            chunk = list(itertools.islice(it, shard_size))
+            if not chunk:
+                return
+            yield index, first_row, chunk
+            first_row += len(chunk)
+
+    # Each pending shard is [index, first_row, records, failed attempts, future]
+    pending = deque()
+    executor = new_pool()
+    try:
+        source = shards()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    index, first_row, chunk = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                shard = [index, first_row, chunk, 0, None]
+                submit(shard)
+                pending.append(shard)
+
+            if not pending:
+                break
+
+            shard = pending[0]
+            try:
+                result = shard[4].result()
+            except BrokenProcessPool as ex:
+                # A worker died; the crashing shard is unknown, so every unfinished shard counts an attempt
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = new_pool()
+                for other in pending:
+                    if other[4].done() and other[4].exception() is None:
+                        continue
+                    other[3] += 1
+                    if other[3] > max_retries:
+                        other[4] = _done(_failed_shard(other, ex, formatter))
+                    else:
+                        submit(other)
+                continue
+            except Exception as ex:
+                shard[3] += 1
+                if shard[3] <= max_retries:
+                    submit(shard)
+                    continue
+                result = _failed_shard(shard, ex, formatter)
+
+            pending.popleft()
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
@@ -0,0 +1,129 @@
+'''
+Service Objects - AGI Request Coalescing
+
+This module provides single-flight request coalescing: while a call for a given key is
+in flight, concurrent callers with the same key wait for it and receive its result (or
+its exception) instead of issuing their own upstream request. Nothing is kept once the
+call completes, so this is not a cache. A caller that passes a Deadline waits no longer
+than its own deadline allows, and gets DeadlineExceeded if the shared call is still
+running then.
+
+Classes:
+    SingleFlight()       - for threads
+    AsyncSingleFlight()  - for asyncio tasks
+'''
+
+import asyncio
+import threading
+
+from retry_policy import Deadline, DeadlineExceeded
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-safe coalescing of concurrent calls that share a key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key, fn, deadline: Deadline = None):
+        """
+        Run fn() for key unless a call for key is already in flight, in which case
+        wait for that call and return its result (or raise its exception).
+
+        Raises:
+            DeadlineExceeded: If deadline runs out while waiting for another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self._executed += 1
+            else:
+                leader = False
+                self._shared += 1
+
+        if not leader:
+            if not call.done.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded(f"Deadline of {deadline.budget_s:g} s exceeded waiting for a shared call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        """
+        Return the number of upstream calls made and the number of callers that shared one.
+        """
+        with self._lock:
+            return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Coalescing of concurrent asyncio calls that share a key.
+
+    The shared call runs as its own task, so cancelling one waiting caller does not
+    cancel the request the other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._executed = 0
+        self._shared = 0
+
+    async def do(self, key, coro_fn, deadline: Deadline = None):
+        """
+        Await coro_fn() for key unless a call for key is already in flight, in which
+        case await that call's result instead.
+
+        Raises:
+            DeadlineExceeded: If deadline runs out while waiting for another caller's call.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            self._executed += 1
+            task.add_done_callback(lambda _t, k=key: self._tasks.pop(k, None))
+            return await asyncio.shield(task)
+
+        self._shared += 1
+        if deadline is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise DeadlineExceeded(f"Deadline of {deadline.budget_s:g} s exceeded waiting for a shared call") from None
+
+    def stats(self) -> dict:
+        """
+        Return the number of upstream calls made and the number of callers that shared one.
+        """
+        return {"executed": self._executed, "shared": self._shared, "in_flight": len(self._tasks)}
@@ -0,0 +1,169 @@
+'''
+Service Objects - AGI ReverseSearch Spatial Cache
+
+This module provides ReverseSearchGridCache, a bounded in-memory cache that answers
+reverse_search calls locally when a previous result was stored for a nearby coordinate.
+Results are indexed by quantized grid cell; a lookup scans the cells around the query
+point and returns the nearest cached result within max_distance_m whose search_radius,
+country, max_results and search_type match the request, and that was fetched from the
+same live or trial endpoint with the same license key (kept only as a hash).
+
+Classes:
+    ReverseSearchGridCache(max_distance_m: float = 25,
+                max_entries: int = 100000)
+'''
+
+import math
+import threading
+from collections import OrderedDict
+
+from response_cache import license_hash
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Return the great-circle distance in meters between two coordinates.
+    """
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _normalize(value) -> str:
+    return "" if value is None else str(value).strip().casefold()
+
+
+class ReverseSearchGridCache:
+    """
+    Thread-safe grid-indexed cache of reverse_search results.
+    """
+
+    def __init__(self, max_distance_m: float = 25, max_entries: int = 100000):
+        """
+        Initialize the cache.
+
+        Parameters:
+            max_distance_m (float): Maximum distance in meters between the query point
+                and a cached point for the cached result to be reused.
+            max_entries (int): Maximum number of cached results; least recently used
+                grid cells are evicted first.
+        """
+        self.max_distance_m = max_distance_m
+        self.max_entries = max_entries
+
+        # Cells are at least max_distance_m tall, so a match is always in an adjacent row
+        self._cell_deg = max(max_distance_m, 1.0) / METERS_PER_DEGREE
+        self._cells = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return (math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg))
+
+    def _nearby_cells(self, lat: float, lon: float):
+        """
+        Yield the cells that may hold a point within max_distance_m of (lat, lon).
+        Longitude cells narrow towards the poles, so more columns are scanned there.
+        """
+        row, _ = self._cell(lat, lon)
+        max_dist_deg = self.max_distance_m / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(90.0, abs(lat) + max_dist_deg)))
+        lon_span = max_dist_deg / max(cos_lat, 1e-6)
+        first = math.floor((lon - lon_span) / self._cell_deg)
+        last = math.floor((lon + lon_span) / self._cell_deg)
+        for r in (row - 1, row, row + 1):
+            for c in range(first, last + 1):
+                yield (r, c)
+
+    @staticmethod
+    def _compat_key(search_radius, country, max_results, search_type, license_key, is_live) -> tuple:
+        # Responses differ between endpoints and license keys (an invalid or exhausted key
+        # gets an Error), so both are part of the key, as in response_cache.cache_key
+        return (_normalize(search_radius), _normalize(country), _normalize(max_results), _normalize(search_type),
+                license_hash(license_key) if license_key else "", bool(is_live))
+
+    def lookup(self, latitude, longitude, search_radius, country, max_results, search_type, license_key, is_live):
+        """
+        Return the nearest compatible cached response within max_distance_m, or None.
+        """
+        lat = float(latitude)
+        lon = float(longitude)
+        compat = self._compat_key(search_radius, country, max_results, search_type, license_key, is_live)
+
+        with self._lock:
+            best = None
+            best_dist = self.max_distance_m
+            best_cell = None
+            for cell in self._nearby_cells(lat, lon):
+                entries = self._cells.get(cell)
+                if not entries:
+                    continue
+                for e_lat, e_lon, e_compat, response in entries:
+                    if e_compat != compat:
+                        continue
+                    dist = haversine_m(lat, lon, e_lat, e_lon)
+                    if dist <= best_dist:
+                        best, best_dist, best_cell = response, dist, cell
+
+            if best is None:
+                self._misses += 1
+                return None
+            self._cells.move_to_end(best_cell)
+            self._hits += 1
+            return best
+
+    def store(self, latitude, longitude, search_radius, country, max_results, search_type, license_key, is_live,
+              response) -> None:
+        """
+        Cache a reverse_search response for a coordinate, its search options, license key and endpoint.
+        """
+        lat = float(latitude)
+        lon = float(longitude)
+        cell = self._cell(lat, lon)
+        entry = (lat, lon, self._compat_key(search_radius, country, max_results, search_type, license_key, is_live),
+                 response)
+
+        with self._lock:
+            entries = self._cells.get(cell)
+            if entries is None:
+                entries = self._cells[cell] = []
+            entries.append(entry)
+            self._cells.move_to_end(cell)
+            self._size += 1
+
+            while self._size > self.max_entries and self._cells:
+                _, evicted = self._cells.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += len(evicted)
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss/eviction counters, the hit rate and the number of cached results.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": self._size,
+                "cells": len(self._cells),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """
+        Remove every cached result.
+        """
+        with self._lock:
+            self._cells.clear()
+            self._size = 0
@@ -0,0 +1,216 @@
+'''
+Service Objects - AGI Trajectory Reverse Geocoding
+
+This module provides reverse_geocode_trace, which reverse-geocodes an ordered GPS trace
+(a stream of (timestamp, latitude, longitude) points) with far fewer ReverseSearch calls
+than one per point.
+
+A call is made at an anchor point. The next anchor is the first point that is more
+than min_move_m from the current anchor, more than max_age_s after it, or max_points
+points after it (which bounds the buffer when timestamps are missing). Points in
+between reuse the result of the nearer of the two anchors around them. If those two
+anchors disagree on the admin area (boundary_fields: country, admin areas, locality,
+postal code), a boundary was crossed between them. The points in between are then
+bisected, one call per split, until the crossing is known to within resolution_m. Every
+point therefore gets a result from its own side of the boundary, for O(log n) extra
+calls per crossing. A boundary crossed and re-crossed between two anchors is not
+detected; lower min_move_m if that matters.
+
+Results are yielded one per input point, in input order. A point is yielded once the
+next anchor has been resolved, so at most max_points points (and max_age_s worth of
+points) are buffered.
+
+Classes:
+    TraceResult(NamedTuple)
+
+Functions:
+    area_key(response: dict, fields: tuple = BOUNDARY_FIELDS) -> tuple
+    reverse_geocode_trace(points: Iterable,
+                search_radius: int,
+                country: str,
+                max_results: int,
+                search_type: str,
+                license_key: str,
+                is_live: bool,
+                ...) -> Iterator[TraceResult]
+'''
+
+from typing import Iterable, Iterator, NamedTuple
+
+from agi_rest_client import AGIRestClient
+from reverse_search_rest import reverse_search
+from spatial_cache import ReverseSearchGridCache, haversine_m
+
+# AddressComponents fields whose change means the admin area changed
+BOUNDARY_FIELDS = (
+    "CountryISO3",
+    "AdministrativeArea1",
+    "AdministrativeArea2",
+    "Locality",
+    "PostalCode",
+)
+
+
+class TraceResult(NamedTuple):
+    """
+    Reverse-geocode result for one trace point.
+
+    anchor is the index of the point whose ReverseSearch call produced the response
+    (equal to index when this point was looked up itself), and distance_m is how far this
+    point is from that anchor.
+    """
+    index: int
+    timestamp: object
+    latitude: float
+    longitude: float
+    response: dict
+    error: Exception
+    anchor: int
+    distance_m: float
+
+
+class _Fix(NamedTuple):
+    """
+    A point that was looked up, with its outcome and admin area.
+    """
+    index: int
+    timestamp: object
+    latitude: float
+    longitude: float
+    response: dict
+    error: Exception
+    area: tuple
+
+
+def area_key(response: dict, fields: tuple = BOUNDARY_FIELDS) -> tuple:
+    """
+    Return the admin area of a ReverseSearch response's best location as a tuple of
+    fields; an empty tuple when the response has no location.
+    """
+    locations = (response or {}).get("Locations") or []
+    if not locations:
+        return ()
+    components = locations[0].get("AddressComponents") or {}
+    return tuple(str(components.get(field) or "").casefold() for field in fields)
+
+
+def _point(raw) -> tuple:
+    """
+    Return (timestamp, latitude, longitude) from a tuple or a dict with those keys.
+    """
+    if isinstance(raw, dict):
+        return raw.get("timestamp"), float(raw["latitude"]), float(raw["longitude"])
+    timestamp, latitude, longitude = raw
+    return timestamp, float(latitude), float(longitude)
+
+
+def _seconds_between(start, end) -> float:
+    """
+    Return seconds from start to end for numeric or datetime timestamps; 0 if either is missing.
+    """
+    if start is None or end is None:
+        return 0.0
+    delta = end - start
+    return delta.total_seconds() if hasattr(delta, "total_seconds") else float(delta)
+
+
+def _distance(a, b) -> float:
+    return haversine_m(a[2], a[3], b[2], b[3])
+
+
+def reverse_geocode_trace(points: Iterable,
+                search_radius: int,
+                country: str,
+                max_results: int,
+                search_type: str,
+                license_key: str,
+                is_live: bool,
+                client: AGIRestClient = None,
+                spatial_cache: ReverseSearchGridCache = None,
+                min_move_m: float = 250.0,
+                max_age_s: float = 300.0,
+                resolution_m: float = 25.0,
+                boundary_fields: tuple = BOUNDARY_FIELDS,
+                max_points: int = 1000) -> Iterator[TraceResult]:
+    """
+    Reverse-geocode an ordered GPS trace, yielding one TraceResult per point in input order.
+
+    Parameters:
+        points (Iterable): (timestamp, latitude, longitude) tuples, or dicts with those keys,
+            in time order; consumed lazily. Timestamps may be numbers (seconds), datetimes or None.
+        search_radius (int): ReverseSearch radius in kilometers.
+        country (str): Preferred country name or ISO code.
+        max_results (int): Maximum number of returned locations per call.
+        search_type (str): ReverseSearch search type.
+        license_key (str): AGI API key.
+        is_live (bool): True for live endpoint; False for trial.
+        client (AGIRestClient): Optional pooled client; defaults to the shared process-wide client.
+        spatial_cache (ReverseSearchGridCache): Optional cache shared with other traces, so
+            routes driven repeatedly are answered locally.
+        min_move_m (float): Distance from the current anchor that triggers a new call.
+        max_age_s (float): Time since the current anchor that triggers a new call.
+        resolution_m (float): Distance to which a boundary crossing is located; 0 disables
+            the bisection, and points take the nearer anchor's result.
+        boundary_fields (tuple): AddressComponents fields compared to detect a boundary crossing.
+        max_points (int): Points since the current anchor that trigger a new call; bounds the
+            points buffered, including on a stationary trace without timestamps.
+    """
+    if max_points < 1:
+        raise ValueError("max_points must be at least 1")
+
+    def lookup(point) -> _Fix:
+        index, timestamp, latitude, longitude = point
+        try:
+            response = reverse_search(latitude, longitude, search_radius, country, max_results, search_type,
+                                      license_key, is_live, client=client, spatial_cache=spatial_cache)
+        except Exception as ex:
+            return _Fix(index, timestamp, latitude, longitude, None, ex, None)
+        return _Fix(index, timestamp, latitude, longitude, response, None,
+                    area_key(response, boundary_fields))
+
+    def result(point, fix: _Fix) -> TraceResult:
+        return TraceResult(point[0], point[1], point[2], point[3], fix.response, fix.error,
+                           fix.index, _distance(point, fix))
+
+    def fill(before: _Fix, after: _Fix, between: list):
+        """
+        Yield results for the points between two fixes, bisecting if they straddle a boundary.
+        """
+        if not between:
+            return
+        straddles = (before.error is None and after.error is None and before.area != after.area)
+        if straddles and resolution_m > 0 and _distance(before, after) > resolution_m:
+            middle = len(between) // 2
+            fix = lookup(between[middle])
+            yield from fill(before, fix, between[:middle])
+            yield result(between[middle], fix)
+            yield from fill(fix, after, between[middle + 1:])
+            return
+
+        for point in between:
+            # Take the nearer fix, skipping a failed one if the other succeeded and is close enough
+            fixes = [fix for fix in (before, after) if fix.error is None and _distance(point, fix) <= min_move_m]
+            yield result(point, min(fixes or (before, after), key=lambda fix: _distance(point, fix)))
+
+    anchor = None
+    between = []
+    for index, raw in enumerate(points):
+        timestamp, latitude, longitude = _point(raw)
+        point = (index, timestamp, latitude, longitude)
+
+        if anchor is not None and (_distance(point, anchor) <= min_move_m
+                                   and _seconds_between(anchor.timestamp, timestamp) <= max_age_s
+                                   and len(between) < max_points):
+            between.append(point)
+            continue
+
+        fix = lookup(point)
+        if anchor is not None:
+            yield from fill(anchor, fix, between)
+        yield result(point, fix)
+        anchor = fix
+        between = []
+
+    # Nothing follows the last anchor, so trailing points reuse it
+    for point in between:
+        yield result(point, anchor)
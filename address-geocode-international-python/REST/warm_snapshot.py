@@ -0,0 +1,329 @@
+'''
+Service Objects - AGI Warm Snapshot
+
+This module pre-warms AGI responses for a known set of hot queries, typically
+PlaceSearch with SearchType "PostalCode" or "Locality" for the postal codes and
+localities that dominate traffic. build_snapshot runs the queries ahead of time and
+writes them to a portable, versioned snapshot file (gzip-compressed JSON). The license
+key is never stored in it; the header records the endpoint host and a hash of the key
+instead, and entries are keyed by IsLive as well as the query.
+
+A client created with AGIRestClient(snapshot=WarmSnapshot(path)) (or AsyncAGIRestClient)
+answers those queries locally from the first request on, as long as the call uses the
+endpoint and license key the snapshot was built with. An entry older than ttl_s is
+still returned immediately, and the client re-fetches it in the background with the
+caller's parameters. The first request after a deploy therefore never waits on the
+service.
+
+Usage:
+    python warm_snapshot.py hot_places.csv agi-warm.snapshot --license-key KEY --live --workers 16
+    python warm_snapshot.py postal_codes.jsonl agi-warm.snapshot --license-key KEY --search-type PostalCode
+
+Input columns/keys are the place_search argument names, as for geocode_cli.py.
+
+Classes:
+    WarmSnapshot(path: str = None,
+                ttl_s: float = 86400)
+
+Functions:
+    build_snapshot(queries: Iterable,
+                license_key: str,
+                is_live: bool,
+                path: str,
+                ...) -> dict
+'''
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Iterable
+
+from circuit_breaker import endpoint_key
+from response_cache import IGNORED_PARAMS, cache_key, license_hash
+
+SNAPSHOT_FORMAT = "agi-warm-snapshot"
+SNAPSHOT_VERSION = 2
+
+
+class WarmSnapshot:
+    """
+    Thread-safe in-memory set of pre-warmed responses, loaded from and saved to a snapshot file.
+    """
+
+    def __init__(self, path: str = None, ttl_s: float = 86400):
+        """
+        Initialize the snapshot, loading it from path when given.
+
+        Parameters:
+            path (str): Snapshot file written by build_snapshot or save(); None starts empty.
+            ttl_s (float): Seconds after which an entry is stale and is refreshed in the
+                background on its next use.
+
+        Raises:
+            ValueError: If the file is not a snapshot or has an unsupported version.
+        """
+        self.path = path
+        self.ttl_s = ttl_s
+        self.created_at = None
+        # Endpoint host and license key hash the entries were fetched with; see bind()
+        self.endpoint = None
+        self.license_hash = None
+
+        # key -> (operation, params, is_live, fetched_at, response)
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(("hits", "stale_hits", "misses", "mismatches", "refreshes",
+                                     "refresh_failures"), 0)
+
+        if path is not None:
+            self.load(path)
+
+    def load(self, path: str) -> None:
+        """
+        Replace the entries with those of a snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot or has an unsupported version.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not an AGI warm snapshot")
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {data.get('version')}; "
+                             f"version {SNAPSHOT_VERSION} is supported")
+
+        # Keys are recomputed, so a snapshot stays valid if the key format changes
+        entries = {}
+        for entry in data["entries"]:
+            key = self.key(entry["operation"], entry["params"], entry["is_live"])
+            entries[key] = (entry["operation"], entry["params"], entry["is_live"], entry["fetched_at"],
+                            entry["response"])
+        with self._lock:
+            self._entries = entries
+            self.created_at = data.get("created_at")
+            self.endpoint = data.get("endpoint")
+            self.license_hash = data.get("license_key_sha256")
+
+    def save(self, path: str = None) -> None:
+        """
+        Atomically write the entries to a snapshot file (by default the one loaded).
+        """
+        path = path or self.path
+        with self._lock:
+            entries = [{"operation": operation, "params": params, "is_live": is_live, "fetched_at": fetched_at,
+                        "response": response}
+                       for operation, params, is_live, fetched_at, response in self._entries.values()]
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.time(),
+            "endpoint": self.endpoint,
+            "license_key_sha256": self.license_hash,
+            "entries": entries,
+        }
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def bind(self, url: str, license_key: str) -> None:
+        """
+        Record the endpoint and license key the entries are fetched with. Only the endpoint's
+        host and a hash of the key are kept, and saved in the snapshot header.
+        """
+        self.endpoint = endpoint_key(url)
+        self.license_hash = license_hash(license_key)
+
+    def accepts(self, params: dict, url: str) -> bool:
+        """
+        Return True if a call to url with these request parameters may be answered from the
+        snapshot: it must use the endpoint host and license key recorded by bind(). A snapshot
+        that was never bound serves nothing.
+        """
+        ok = (self.endpoint is not None
+              and endpoint_key(url) == self.endpoint
+              and license_hash(params.get("LicenseKey") or "") == self.license_hash)
+        if not ok:
+            with self._lock:
+                self._stats["mismatches"] += 1
+        return ok
+
+    def key(self, operation: str, params: dict, is_live: bool) -> str:
+        """
+        Return the snapshot key for an operation, its request parameters and IsLive. The
+        license key is left out; accepts() checks it against the header instead.
+        """
+        params = {name: value for name, value in params.items() if name not in IGNORED_PARAMS}
+        return cache_key(operation, params, is_live)
+
+    def get(self, key: str):
+        """
+        Return (response, stale) for a snapshot key, or None if the snapshot does not hold it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            stale = time.time() - entry[3] > self.ttl_s
+            self._stats["hits"] += 1
+            if stale:
+                self._stats["stale_hits"] += 1
+            return entry[4], stale
+
+    def put(self, operation: str, params: dict, is_live: bool, response: dict, fetched_at: float = None) -> None:
+        """
+        Add or replace the response for an operation, its request parameters and IsLive.
+        """
+        params = {name: value for name, value in params.items() if name not in IGNORED_PARAMS}
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._entries[self.key(operation, params, is_live)] = (operation, params, is_live, fetched_at, response)
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        Claim the background refresh of a stale entry; False if one is already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def refreshed(self, operation: str, params: dict, is_live: bool, data: dict) -> None:
+        """
+        Finish a refresh claimed with begin_refresh. data is the new response, or None if
+        the fetch failed; a failure or an Error payload keeps the old response, which is
+        refreshed again on its next use.
+        """
+        ok = data is not None and "Error" not in data
+        if ok:
+            self.put(operation, params, is_live, data)
+        with self._lock:
+            self._refreshing.discard(self.key(operation, params, is_live))
+            self._stats["refreshes" if ok else "refresh_failures"] += 1
+
+    def refresh(self, operation: str, params: dict, is_live: bool, fetch: Callable) -> None:
+        """
+        Finish a refresh claimed with begin_refresh by calling fetch(), which returns the new response.
+        """
+        data = None
+        try:
+            data = fetch()
+        except Exception:
+            pass
+        finally:
+            self.refreshed(operation, params, is_live, data)
+
+    def stats(self) -> dict:
+        """
+        Return a snapshot of the hit/miss/refresh counters and the number of entries.
+        """
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = len(self._entries)
+            out["refreshing"] = len(self._refreshing)
+        return out
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+def build_snapshot(queries: Iterable,
+                license_key: str,
+                is_live: bool,
+                path: str,
+                search_type: str = "",
+                max_workers: int = 8,
+                client=None,
+                on_throughput: Callable = None) -> dict:
+    """
+    Run place_search for each query and write the successful responses to a snapshot file.
+
+    Parameters:
+        queries (Iterable): Dicts keyed by the place_search argument names (see batch_search.py).
+        license_key (str): AGI API key; used for the calls only, never written to the file.
+        is_live (bool): True for live endpoint; False for trial.
+        path (str): Snapshot file to write.
+        search_type (str): SearchType for queries that do not set their own, e.g. "PostalCode".
+        max_workers (int): Number of concurrent requests.
+        client (AGIRestClient): Optional pooled client; by default one sized to max_workers is created.
+        on_throughput (Callable): Called as on_throughput(completed, elapsed_s, records_per_s).
+
+    Returns:
+        dict: Counts of queries run, entries written and queries that failed.
+    """
+    from batch_search import PLACE_SEARCH_FIELDS, batch_place_search, record_args
+    from place_search_rest import PRIMARY_URL, TRIAL_URL, place_search_params
+
+    def with_search_type(query):
+        query = dict(query)
+        if search_type and not query.get("search_type"):
+            query["search_type"] = search_type
+        return query
+
+    snapshot = WarmSnapshot()
+    snapshot.bind(PRIMARY_URL if is_live else TRIAL_URL, license_key)
+    counts = {"queries": 0, "entries": 0, "failed": 0}
+    for result in batch_place_search(map(with_search_type, queries), license_key, is_live,
+                                     max_workers=max_workers, client=client,
+                                     on_throughput=on_throughput):
+        counts["queries"] += 1
+        if not result.ok or "Error" in result.response:
+            counts["failed"] += 1
+            continue
+        params = place_search_params(*record_args(result.record, PLACE_SEARCH_FIELDS), license_key)
+        snapshot.put("PlaceSearch", params, is_live, result.response)
+
+    counts["entries"] = len(snapshot)
+    snapshot.save(path)
+    return counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Pre-warm AGI PlaceSearch responses into a snapshot file.")
+    parser.add_argument("input", help="Input .csv or .jsonl file of place_search queries.")
+    parser.add_argument("output", help="Snapshot file to write.")
+    parser.add_argument("--license-key", default=os.environ.get("AGI_LICENSE_KEY"),
+                        help="Service Objects license key (default: $AGI_LICENSE_KEY).")
+    parser.add_argument("--live", action="store_true", help="Use the live endpoints instead of trial.")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="Override the input format.")
+    parser.add_argument("--search-type", default="",
+                        help="SearchType for rows without one, e.g. PostalCode or Locality.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent requests.")
+    return parser
+
+
+def main(argv=None) -> int:
+    from batch_search import PLACE_SEARCH_FIELDS
+    from geocode_cli import _file_format, read_records
+
+    args = build_parser().parse_args(argv)
+    if not args.license_key:
+        print("A license key is required (--license-key or AGI_LICENSE_KEY).", file=sys.stderr)
+        return 2
+
+    queries = read_records(args.input, _file_format(args.input, args.input_format), PLACE_SEARCH_FIELDS)
+    counts = build_snapshot(queries, args.license_key, args.live, args.output,
+                            search_type=args.search_type,
+                            max_workers=args.workers,
+                            on_throughput=lambda n, elapsed, rate: print(
+                                f"{n} queries, {rate:.1f} queries/s", file=sys.stderr))
+    print(f"{counts['entries']} entries written to {args.output} "
+          f"({counts['failed']} of {counts['queries']} queries failed).", file=sys.stderr)
+    return 0 if counts["entries"] or not counts["queries"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
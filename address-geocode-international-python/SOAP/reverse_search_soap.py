@@ -1,7 +1,14 @@
-from suds.client import Client
+import time
+
 from suds import WebFault
 from suds.sudsobject import Object
 
+from soap_client_pool import SoapClientPool, get_default_pool
+from soap_deadline import Deadline, DeadlineExceeded
+from soap_fast import FastSoapEngine, SoapFault
+from soap_health import get_default_tracker
+from soap_response import is_fatal_error, response_error
+
 
 class ReverseSearch:
     """
@@ -9,18 +16,42 @@ class ReverseSearch:
     with primary and backup endpoints.
     """
 
-    def __init__(self, license_key: str, is_live: bool, timeout_ms: int = 10000):
+    def __init__(self, license_key: str, is_live: bool, timeout_ms: int = 10000,
+                client_pool: SoapClientPool = None, cache=None, health=None, metrics=None,
+                retry=None, deadline_ms: int = None, engine: FastSoapEngine = None):
         """
         Initialize the ReverseSearch SOAP client.
 
         Parameters:
             license_key (str): Service Objects Address Geocode International license key.
             is_live (bool): whether to use live or trial endpoints.
-            timeout_ms (int): SOAP call timeout in milliseconds.
+            timeout_ms (int): SOAP call timeout in milliseconds, per endpoint attempt.
+            client_pool (SoapClientPool): Optional pool of parsed suds clients; defaults to
+                the shared process-wide pool.
+            cache (ResponseCache): Optional response cache (see REST/response_cache.py);
+                may be the same instance used by the REST client.
+            health (EndpointHealthTracker): Circuit breakers (see REST/circuit_breaker.py) used to
+                skip an unhealthy primary; defaults to the process-wide tracker shared with the
+                REST client (see soap_health.py).
+            metrics (AGIMetrics): Optional metrics collector (see REST/agi_metrics.py) for latency,
+                outcome, error and in-flight metrics; may be shared with the REST client.
+            retry (RetryPolicy): Optional retry policy (see REST/retry_policy.py) for retrying a
+                failed call with backoff and jitter; may be shared with the REST client.
+            deadline_ms (int): Total time budget per call in milliseconds, covering every attempt
+                and backoff; each attempt's timeout is shortened to fit. None for no deadline.
+            engine (FastSoapEngine): Optional suds-free engine (see soap_fast.py); calls then
+                return plain dicts shaped like response_to_dict's output instead of suds objects.
         """
         self._timeout_s = timeout_ms / 1000.0
+        self._deadline_s = deadline_ms / 1000.0 if deadline_ms is not None else None
         self.license_key = license_key
         self._is_live = is_live
+        self._pool = client_pool or get_default_pool()
+        self._cache = cache
+        self._health = health or get_default_tracker()
+        self._metrics = metrics
+        self._retry = retry
+        self._engine = engine
         
         # WSDL URLs
         self._primary_wsdl = (
@@ -44,7 +75,7 @@ class ReverseSearch:
         """
         Call ReverseSearch SOAP API using primary endpoint; on None response,
             WebFault, or Error.TypeCode == '3' falls back to the backup endpoint.
-            returns: the suds response object
+            returns: the suds response object, or a dict when an engine is set
             raises RuntimeError: if both endpoints fail
         """
         # Common kwargs for both calls
@@ -58,32 +89,168 @@ class ReverseSearch:
             LicenseKey=self.license_key
         )
 
-        # Attempt primary
-        try:
-            client = Client(self._primary_wsdl, timeout=self._timeout_s)
+        # Serve repeated requests from the cache when one is configured
+        if self._cache is not None:
+            # Engine dicts and suds objects are cached under separate keys
+            operation = "soap:ReverseSearch" if self._engine is None else "soap-dict:ReverseSearch"
+            key = self._cache.key(operation, call_kwargs, self._is_live)
+            response = self._cache.get(key)
+            if response is None:
+                response = self._call(call_kwargs)
+                # Only successful responses are cached; error payloads are retried next time
+                if response_error(response) is None:
+                    self._cache.put(key, response)
+            return response
 
-            # Override endpoint URL if needed:
-            response = client.service.ReverseSearch(**call_kwargs)
+        return self._call(call_kwargs)
 
-            # If response is None or fatal error code, trigger fallback
-            if response is None or (hasattr(response, 'Error') and response.Error and response.Error.TypeCode == '3'):
-                raise ValueError("Primary returned no result or fatal Error.TypeCode=3")
+    def _call(self, call_kwargs: dict) -> Object:
+        """
+        Call ReverseSearch with primary-to-backup fallback, retried per the retry policy and
+        bounded by the deadline.
+        """
+        deadline = Deadline(self._deadline_s) if self._deadline_s is not None else None
+        if self._retry is None:
+            return self._call_once(call_kwargs, deadline)
 
-            return response
+        retries = 0
+        while True:
+            failure = None
+            try:
+                response = self._call_once(call_kwargs, deadline)
+                if not self._retry.is_retryable_response(response):
+                    return response
+            except RuntimeError as ex:
+                if not self._retry.is_retryable_exception(ex):
+                    raise
+                failure = ex
+
+            delay = self._retry.backoff(retries)
+            retries += 1
+            # Give up when attempts run out or the backoff would not leave time for another attempt
+            if retries >= self._retry.max_attempts or (
+                    deadline is not None and deadline.remaining() - delay < deadline.min_attempt_s):
+                if failure is not None:
+                    raise failure
+                return response
+            self._record_call("retry")
+            time.sleep(delay)
 
-        except (WebFault, ValueError, Exception) as primary_ex:
+    def _call_once(self, call_kwargs: dict, deadline: Deadline) -> Object:
+        """
+        Call ReverseSearch on the primary endpoint, falling back to the backup endpoint.
+        """
+        primary_ex = None
+        primary = self._health.breaker(self._primary_wsdl) if self._health else None
+
+        # Attempt primary unless its circuit is open
+        if primary is None or primary.allow_request():
+            timeout_s = self._attempt_timeout(deadline)
             try:
-                # Attempt backup
-                client = Client(self._backup_wsdl, timeout=self._timeout_s)
-                response = client.service.ReverseSearch(**call_kwargs)
-                if response is None:
-                    raise ValueError("Backup returned no result")
+                response = self._send(self._primary_wsdl, call_kwargs, timeout_s)
+
+                # If response is None or fatal error code, trigger fallback
+                if response is None or is_fatal_error(response):
+                    raise ValueError("Primary returned no result or fatal Error.TypeCode=3")
+
+                if primary is not None:
+                    primary.record_success()
+                self._record_call("primary_success")
                 return response
 
-            except (WebFault, Exception) as backup_ex:
-                msg = (
-                    "Both primary and backup endpoints failed.\n"
-                    f"Primary error: {primary_ex}\n"
-                    f"Backup error: {backup_ex}"
-                )
-                raise RuntimeError(msg)
+            except (WebFault, ValueError, Exception) as ex:
+                if primary is not None:
+                    primary.record_failure()
+                primary_ex = ex
+        else:
+            primary_ex = RuntimeError("Primary endpoint skipped; circuit is open")
+
+        backup = self._health.breaker(self._backup_wsdl) if self._health else None
+        timeout_s = self._attempt_timeout(deadline)
+        try:
+            # Attempt backup
+            response = self._send(self._backup_wsdl, call_kwargs, timeout_s)
+            if response is None:
+                raise ValueError("Backup returned no result")
+            if backup is not None:
+                backup.record_success()
+            self._record_call("backup_fallback")
+            return response
+
+        except (WebFault, Exception) as backup_ex:
+            if backup is not None:
+                backup.record_failure()
+            self._record_call("failure")
+            msg = (
+                "Both primary and backup endpoints failed.\n"
+                f"Primary error: {primary_ex}\n"
+                f"Backup error: {backup_ex}"
+            )
+            raise RuntimeError(msg) from backup_ex
+
+    def _attempt_timeout(self, deadline: Deadline) -> float:
+        """
+        Return the timeout for the next endpoint attempt: timeout_ms, shortened to fit the deadline.
+        Raises DeadlineExceeded when the deadline leaves no time for another attempt.
+        """
+        if deadline is None:
+            return self._timeout_s
+        try:
+            return deadline.timeout(self._timeout_s)
+        except DeadlineExceeded:
+            self._record_call("deadline_exceeded")
+            raise
+
+    def _send(self, wsdl: str, call_kwargs: dict, timeout_s: float) -> Object:
+        """
+        Send ReverseSearch to one endpoint with the given timeout.
+        """
+        if self._engine is not None:
+            return self._invoke(wsdl, lambda: self._engine.call(wsdl, "ReverseSearch", call_kwargs, timeout_s))
+
+        client = self._pool.client(wsdl, self._timeout_s)
+        if timeout_s == self._timeout_s:
+            return self._invoke(wsdl, lambda: client.service.ReverseSearch(**call_kwargs))
+
+        # The client is this thread's own, so its timeout can be shortened for one call
+        client.set_options(timeout=timeout_s)
+        try:
+            return self._invoke(wsdl, lambda: client.service.ReverseSearch(**call_kwargs))
+        finally:
+            client.set_options(timeout=self._timeout_s)
+
+    def _invoke(self, wsdl: str, send) -> Object:
+        """
+        Make one ReverseSearch request with send(), recording latency, errors and in-flight requests
+        when metrics are configured.
+        """
+        if self._metrics is None:
+            return send()
+
+        self._metrics.in_flight(wsdl, 1)
+        started = time.perf_counter()
+        try:
+            response = send()
+        except (WebFault, SoapFault):
+            self._metrics.record_error(wsdl, "fault")
+            raise
+        except Exception:
+            self._metrics.record_error(wsdl, "network")
+            raise
+        finally:
+            self._metrics.observe(wsdl, "total", time.perf_counter() - started)
+            self._metrics.in_flight(wsdl, -1)
+
+        if isinstance(response, dict):
+            error = response.get("Error")
+            if error:
+                self._metrics.record_error(wsdl, error.get("TypeCode", ""))
+        else:
+            error = getattr(response, "Error", None)
+            if error:
+                self._metrics.record_error(wsdl, getattr(error, "TypeCode", ""))
+        return response
+
+    def _record_call(self, outcome: str) -> None:
+        if self._metrics is not None:
+            self._metrics.record_call("ReverseSearch", outcome)
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import threading
+
+from suds.cache import Cache, ObjectCache
+from suds.client import Client
+
+# Default on-disk location for parsed WSDL/XSD documents
+DEFAULT_WSDL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "agi-suds-cache")
+
+
+class _WsdlCache(Cache):
+    """
+    suds cache of parsed WSDL definitions shared by every client of a pool: kept in
+    memory, and backed by an optional on-disk ObjectCache so a new process skips the
+    download and parse as well.
+    """
+
+    def __init__(self, persistent: ObjectCache = None):
+        self._objects = {}
+        self._persistent = persistent
+        self._lock = threading.Lock()
+
+    def get(self, id):
+        with self._lock:
+            obj = self._objects.get(id)
+        if obj is None and self._persistent is not None:
+            obj = self._persistent.get(id)
+            if obj is not None:
+                with self._lock:
+                    obj = self._objects.setdefault(id, obj)
+        return obj
+
+    def put(self, id, obj):
+        with self._lock:
+            obj = self._objects.setdefault(id, obj)
+        if self._persistent is not None:
+            self._persistent.put(id, obj)
+        return obj
+
+    def purge(self, id):
+        with self._lock:
+            self._objects.pop(id, None)
+        if self._persistent is not None:
+            self._persistent.purge(id)
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+        if self._persistent is not None:
+            self._persistent.clear()
+
+
+class SoapClientPool:
+    """
+    Process-wide pool of suds clients keyed by WSDL URL.
+
+    Each WSDL is downloaded and parsed once per process (or loaded from the on-disk
+    cache). Every thread gets its own Client built on those shared definitions, so
+    concurrent calls never share suds' per-call state. Clients are not cloned: on
+    suds 1.2, Client.clone() deep-copies the options and fails with RecursionError.
+    """
+
+    def __init__(self, wsdl_cache_dir: str = DEFAULT_WSDL_CACHE_DIR, wsdl_cache_days: int = 7):
+        """
+        Initialize the pool.
+
+        Parameters:
+            wsdl_cache_dir (str): Directory for the persistent WSDL cache; None disables it.
+            wsdl_cache_days (int): Number of days a cached WSDL stays valid.
+        """
+        self.wsdl_cache_dir = wsdl_cache_dir
+        self.wsdl_cache_days = wsdl_cache_days
+
+        persistent = ObjectCache(location=wsdl_cache_dir, days=wsdl_cache_days) if wsdl_cache_dir else None
+        self._cache = _WsdlCache(persistent)
+        self._parsed = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _new_client(self, wsdl: str, timeout_s: float) -> Client:
+        """
+        Build a client from the shared definitions; the first client of a WSDL parses it,
+        while other threads wait instead of parsing it again.
+        """
+        if wsdl in self._parsed:
+            return Client(wsdl, timeout=timeout_s, cache=self._cache, cachingpolicy=1)
+        with self._lock:
+            client = Client(wsdl, timeout=timeout_s, cache=self._cache, cachingpolicy=1)
+            self._parsed.add(wsdl)
+            return client
+
+    def client(self, wsdl: str, timeout_s: float) -> Client:
+        """
+        Return this thread's suds client for a WSDL.
+
+        Parameters:
+            wsdl (str): WSDL URL of the endpoint.
+            timeout_s (float): SOAP call timeout in seconds.
+        """
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+
+        key = (wsdl, timeout_s)
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = self._new_client(wsdl, timeout_s)
+        return client
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool() -> SoapClientPool:
+    """
+    Return the process-wide SoapClientPool shared by PlaceSearch and ReverseSearch.
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_lock:
+            if _default_pool is None:
+                _default_pool = SoapClientPool()
+    return _default_pool
@@ -0,0 +1,59 @@
+"""
+soap_deadline.py
+
+Deadline and DeadlineExceeded for the SOAP PlaceSearch / ReverseSearch classes.
+
+When the REST folder is importable (side by side on sys.path, or through agi_geocode),
+the classes are taken from REST/retry_policy.py. A SOAP timeout is then the same
+DeadlineExceeded a REST call raises: one except clause catches both, and a shared
+RetryPolicy tells it apart from an endpoint failure. The copies below keep the SOAP
+folder usable on its own.
+"""
+
+try:
+    from retry_policy import Deadline, DeadlineExceeded
+except ImportError:
+    import time
+
+    class DeadlineExceeded(RuntimeError, TimeoutError):
+        """
+        Raised when a call's deadline leaves no time for another attempt.
+        """
+
+    class Deadline:
+        """
+        Total time budget for one call, shared by all of its attempts.
+        """
+
+        def __init__(self, budget_s: float, min_attempt_s: float = 0.05):
+            """
+            Start the deadline clock.
+
+            Args:
+                budget_s: Seconds from now until the deadline.
+                min_attempt_s: Smallest timeout worth starting an attempt with.
+            """
+            self.budget_s = budget_s
+            self.min_attempt_s = min_attempt_s
+            self.expires_at = time.monotonic() + budget_s
+
+        def remaining(self) -> float:
+            """
+            Return the seconds left before the deadline, never negative.
+            """
+            return max(0.0, self.expires_at - time.monotonic())
+
+        def expired(self) -> bool:
+            return self.remaining() < self.min_attempt_s
+
+        def timeout(self, attempt_timeout_s: float) -> float:
+            """
+            Return the timeout for the next attempt.
+
+            Raises:
+                DeadlineExceeded: If less than min_attempt_s is left.
+            """
+            remaining = self.remaining()
+            if remaining < self.min_attempt_s:
+                raise DeadlineExceeded(f"Deadline of {self.budget_s:g} s exceeded")
+            return min(attempt_timeout_s, remaining)
@@ -0,0 +1,467 @@
+"""
+soap_fast.py
+
+A SOAP engine for the AGI PlaceSearch and ReverseSearch operations that does not use suds.
+
+Each endpoint's WSDL is read once per process. For each operation it is compiled into
+an envelope template: the endpoint address, the SOAPAction, and the request element
+with its fields in schema order. A call fills the template with the escaped parameter
+values and POSTs it over a keep-alive http.client connection owned by the calling
+thread. The response body is fed to an incremental XML parser as it arrives and is
+built straight into the dict that response_to_dict (see soap_response.py) returns for
+the same suds response. No SOAP object tree is built on either side of the call.
+
+Pass an engine to PlaceSearch / ReverseSearch (engine=FastSoapEngine()) to use it
+in place of suds. Those calls then return that dict instead of a suds object.
+
+Only the standard library is used.
+"""
+
+import http.client
+import threading
+import urllib.request
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit
+from xml.sax.saxutils import escape, quoteattr
+
+from soap_response import LOCATION_FIELDS
+
+WSDL_NS = "http://schemas.xmlsoap.org/wsdl/"
+WSDL_SOAP_NS = "http://schemas.xmlsoap.org/wsdl/soap/"
+XS_NS = "http://www.w3.org/2001/XMLSchema"
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+
+# Errors after which a request on a reused keep-alive connection is sent again on a new one.
+# BadStatusLine covers a closed connection that still delivered stray bytes, and
+# CannotSendRequest a connection left mid-request by an earlier failure.
+STALE_CONNECTION_ERRORS = (
+    http.client.BadStatusLine,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+READ_CHUNK = 16384
+
+
+class SoapFault(RuntimeError):
+    """
+    Raised when an endpoint answers with a SOAP Fault.
+    """
+
+    def __init__(self, faultcode: str, faultstring: str):
+        super().__init__(f"Server raised fault: '{faultstring}'")
+        self.faultcode = faultcode
+        self.faultstring = faultstring
+
+
+class SoapHTTPError(RuntimeError):
+    """
+    Raised when an endpoint answers with an HTTP error status and no SOAP Fault.
+    """
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _text(elem) -> str:
+    """
+    Return an element's text as suds unmarshals it: None when nil or empty.
+    """
+    if elem.get(XSI_NIL) in ("true", "1"):
+        return None
+    return elem.text or None
+
+
+class SoapOperation:
+    """
+    Compiled request template for one operation on one endpoint.
+    """
+
+    def __init__(self, location: str, soap_action: str, namespace: str, element: str,
+                 fields: tuple, qualified: bool):
+        """
+        Args:
+            location: Endpoint URL requests are POSTed to.
+            soap_action: SOAPAction header value.
+            namespace: Namespace of the request element.
+            element: Name of the request (wrapper) element.
+            fields: Request field names in schema order.
+            qualified: Whether the fields are namespace-qualified (elementFormDefault).
+        """
+        self.location = location
+        self.fields = fields
+        self.headers = {
+            "Content-Type": "text/xml; charset=utf-8",
+            "SOAPAction": f'"{soap_action}"',
+        }
+        parts = urlsplit(location)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        prefix = "ns0:" if qualified else ""
+        self._head = (f'<?xml version="1.0" encoding="UTF-8"?>'
+                      f'<SOAP-ENV:Envelope xmlns:SOAP-ENV="{SOAP_ENV_NS}" xmlns:ns0={quoteattr(namespace)}>'
+                      f'<SOAP-ENV:Header/><SOAP-ENV:Body><ns0:{element}>')
+        self._tail = f"</ns0:{element}></SOAP-ENV:Body></SOAP-ENV:Envelope>"
+        self._tags = {name: (f"<{prefix}{name}>", f"</{prefix}{name}>") for name in fields}
+        self._prefix = prefix
+
+    def render(self, params: dict) -> bytes:
+        """
+        Return the request envelope for params; None values are omitted, like suds does.
+        """
+        out = [self._head]
+        for name in self.fields:
+            value = params.get(name)
+            if value is not None:
+                open_tag, close_tag = self._tags[name]
+                out.append(open_tag + escape(str(value)) + close_tag)
+        for name, value in params.items():
+            if value is not None and name not in self._tags:
+                out.append(f"<{self._prefix}{name}>{escape(str(value))}</{self._prefix}{name}>")
+        out.append(self._tail)
+        return "".join(out).encode("utf-8")
+
+
+def _fetch(url: str, timeout_s: float) -> ET.Element:
+    with urllib.request.urlopen(url, timeout=timeout_s) as response:
+        return ET.fromstring(response.read())
+
+
+def _load_wsdl(url: str, timeout_s: float) -> tuple:
+    """
+    Return (definitions, schemas): the WSDL documents and XML schemas reachable from url,
+    following wsdl:import, xs:import and xs:include.
+    """
+    definitions = []
+    schemas = []
+    seen = set()
+
+    def add_schema(schema, base):
+        schemas.append(schema)
+        for ref in schema.findall(f"{{{XS_NS}}}import") + schema.findall(f"{{{XS_NS}}}include"):
+            location = ref.get("schemaLocation")
+            if location:
+                visit_schema(urljoin(base, location))
+
+    def visit_schema(location):
+        if location not in seen:
+            seen.add(location)
+            add_schema(_fetch(location, timeout_s), location)
+
+    def visit_wsdl(location):
+        if location in seen:
+            return
+        seen.add(location)
+        root = _fetch(location, timeout_s)
+        definitions.append(root)
+        for ref in root.findall(f"{{{WSDL_NS}}}import"):
+            if ref.get("location"):
+                visit_wsdl(urljoin(location, ref.get("location")))
+        for schema in root.iterfind(f"{{{WSDL_NS}}}types/{{{XS_NS}}}schema"):
+            add_schema(schema, location)
+
+    visit_wsdl(url)
+    return definitions, schemas
+
+
+def compile_operation(wsdl: str, operation: str, timeout_s: float = 30) -> SoapOperation:
+    """
+    Read a document/literal SOAP 1.1 WSDL and compile the request template for an operation.
+
+    Args:
+        wsdl: WSDL URL.
+        operation: Operation name, e.g. "PlaceSearch".
+        timeout_s: Timeout for each WSDL/XSD download.
+
+    Returns:
+        SoapOperation: The compiled template.
+
+    Raises:
+        ValueError: If the WSDL does not describe the operation over SOAP 1.1.
+    """
+    definitions, schemas = _load_wsdl(wsdl, timeout_s)
+
+    def find_all(path):
+        for root in definitions:
+            yield from root.iterfind(path)
+
+    location = next((address.get("location") for address in
+                     find_all(f"{{{WSDL_NS}}}service/{{{WSDL_NS}}}port/{{{WSDL_SOAP_NS}}}address")), None)
+    soap_action = None
+    for binding in find_all(f"{{{WSDL_NS}}}binding"):
+        if binding.find(f"{{{WSDL_SOAP_NS}}}binding") is None:
+            continue
+        for op in binding.iterfind(f"{{{WSDL_NS}}}operation"):
+            if op.get("name") == operation:
+                soap_op = op.find(f"{{{WSDL_SOAP_NS}}}operation")
+                soap_action = soap_op.get("soapAction", "") if soap_op is not None else ""
+        if soap_action is not None:
+            break
+    if location is None or soap_action is None:
+        raise ValueError(f"{wsdl} does not describe a SOAP 1.1 {operation} operation")
+
+    # portType operation -> input message -> element of its part
+    element = operation
+    for op in find_all(f"{{{WSDL_NS}}}portType/{{{WSDL_NS}}}operation"):
+        if op.get("name") != operation or op.find(f"{{{WSDL_NS}}}input") is None:
+            continue
+        message = op.find(f"{{{WSDL_NS}}}input").get("message", "").rpartition(":")[2]
+        for msg in find_all(f"{{{WSDL_NS}}}message"):
+            if msg.get("name") == message:
+                part = msg.find(f"{{{WSDL_NS}}}part")
+                if part is not None and part.get("element"):
+                    element = part.get("element").rpartition(":")[2]
+        break
+
+    namespace = ""
+    fields = ()
+    qualified = True
+    for schema in schemas:
+        decl = next((e for e in schema.iterfind(f"{{{XS_NS}}}element") if e.get("name") == element), None)
+        if decl is None:
+            continue
+        namespace = schema.get("targetNamespace", "")
+        qualified = schema.get("elementFormDefault") == "qualified"
+        complex_type = decl.find(f"{{{XS_NS}}}complexType")
+        if complex_type is None and decl.get("type"):
+            type_name = decl.get("type").rpartition(":")[2]
+            complex_type = next((t for s in schemas for t in s.iterfind(f"{{{XS_NS}}}complexType")
+                                 if t.get("name") == type_name), None)
+        if complex_type is not None:
+            fields = tuple(e.get("name") for e in complex_type.iterfind(f"{{{XS_NS}}}sequence/{{{XS_NS}}}element"))
+        break
+    else:
+        raise ValueError(f"{wsdl} does not declare the {element} element")
+
+    return SoapOperation(location, soap_action, namespace, element, fields, qualified)
+
+
+def parse_response(chunks) -> dict:
+    """
+    Parse an AGI SOAP response envelope, fed incrementally, into a plain dict.
+
+    Args:
+        chunks: Iterable of bytes making up the response body.
+
+    Returns:
+        dict: The same value response_to_dict returns for the equivalent suds response
+            ({"SearchInfo": {...}, "Locations": [...]}, plus "Error" when the service returned
+            one), or None if the result element is missing or nil.
+
+    Raises:
+        SoapFault: If the body is a SOAP Fault.
+        xml.etree.ElementTree.ParseError: If the body is not well-formed XML.
+    """
+    # Envelope(1)/Body(2)/<op>Response(3)/<op>Result(4)/Response|Error(5)/Key|Value(6)/Result(7)/Field(8)/Key|Value(9)
+    parser = ET.XMLPullParser(("start", "end"))
+    out = {}
+    locations = []
+    result = None
+    fault = None
+    top_error = None
+
+    depth = 0
+    in_body = False
+    section = None
+    item_key = ""
+    is_locations = False
+    record = location = components = None
+    field_key = field_value = None
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    in_body = _local(elem.tag) == "Body"
+                elif not in_body:
+                    pass
+                elif depth == 3 and _local(elem.tag) == "Fault":
+                    fault = {}
+                elif depth == 4 and fault is None:
+                    result = elem
+                elif depth == 5:
+                    section = _local(elem.tag)
+                    item_key = ""
+                    if section == "Error":
+                        top_error = {}
+                elif depth == 7 and section == "Response":
+                    is_locations = "Locations" in item_key
+                    record = {}
+                    location = {}
+                    components = {}
+                continue
+
+            if not in_body or depth < 3:
+                pass
+            elif depth == 9:
+                if _local(elem.tag) == "Key":
+                    field_key = _text(elem)
+                else:
+                    field_value = _text(elem)
+            elif depth == 8 and record is not None:
+                if not is_locations:
+                    record[field_key] = field_value
+                elif field_key in LOCATION_FIELDS:
+                    location[field_key] = field_value
+                else:
+                    components[field_key] = field_value
+                field_key = field_value = None
+            elif depth == 7 and record is not None:
+                if is_locations:
+                    location["AddressComponents"] = components
+                    locations.append(location)
+                else:
+                    out[item_key] = record
+                record = None
+                elem.clear()
+            elif depth == 6:
+                if section == "Response" and _local(elem.tag) == "Key":
+                    item_key = elem.text or ""
+                elif section == "Error":
+                    top_error[_local(elem.tag)] = _text(elem)
+            elif depth == 5:
+                elem.clear()
+            elif depth == 4 and fault is not None:
+                fault[_local(elem.tag)] = elem.text or ""
+            depth -= 1
+    parser.close()
+
+    if fault is not None:
+        raise SoapFault(fault.get("faultcode", ""), fault.get("faultstring", ""))
+    if result is None or result.get(XSI_NIL) in ("true", "1"):
+        return None
+    # The top-level Error element is used when no Error response item carried it
+    if "Error" not in out and top_error:
+        out["Error"] = top_error
+    if locations or "Error" not in out:
+        out["Locations"] = locations
+    return out
+
+
+class FastSoapEngine:
+    """
+    Thread-safe suds-free engine holding compiled operations and per-thread keep-alive connections.
+    """
+
+    def __init__(self, wsdl_timeout_s: float = 30):
+        """
+        Initialize the engine.
+
+        Args:
+            wsdl_timeout_s: Timeout for each WSDL/XSD download when an operation is first compiled.
+        """
+        self.wsdl_timeout_s = wsdl_timeout_s
+
+        self._operations = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+
+    def operation(self, wsdl: str, operation: str) -> SoapOperation:
+        """
+        Return the compiled template for an operation, reading the WSDL on first use.
+        """
+        key = (wsdl, operation)
+        compiled = self._operations.get(key)
+        if compiled is not None:
+            return compiled
+
+        with self._lock:
+            compiled = self._operations.get(key)
+            if compiled is None:
+                compiled = compile_operation(wsdl, operation, self.wsdl_timeout_s)
+                self._operations[key] = compiled
+            return compiled
+
+    def _connection(self, op: SoapOperation, timeout_s: float) -> tuple:
+        """
+        Return (connection, reused): this thread's keep-alive connection to an operation's host.
+        """
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        key = (op.scheme, op.netloc)
+        conn = connections.get(key)
+        if conn is None:
+            if op.scheme == "https":
+                conn = http.client.HTTPSConnection(op.netloc, timeout=timeout_s)
+            else:
+                conn = http.client.HTTPConnection(op.netloc, timeout=timeout_s)
+            connections[key] = conn
+            with self._lock:
+                self._connections.append(conn)
+            return conn, False
+
+        conn.timeout = timeout_s
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout_s)
+        return conn, True
+
+    def call(self, wsdl: str, operation: str, params: dict, timeout_s: float) -> dict:
+        """
+        Call an operation on the endpoint described by a WSDL.
+
+        Args:
+            wsdl: WSDL URL of the endpoint.
+            operation: Operation name, e.g. "PlaceSearch".
+            params: Request fields, keyed as in the WSDL (SingleLine, Latitude, LicenseKey, ...).
+            timeout_s: Socket timeout for the request.
+
+        Returns:
+            dict: The parsed response (see parse_response), or None if it carried no result.
+
+        Raises:
+            SoapFault: If the endpoint answers with a SOAP Fault.
+            SoapHTTPError: If the endpoint answers with an HTTP error status.
+            OSError: On connection failures and timeouts.
+            http.client.HTTPException: On a malformed HTTP response.
+        """
+        op = self.operation(wsdl, operation)
+        body = op.render(params)
+
+        conn, reused = self._connection(op, timeout_s)
+        try:
+            try:
+                conn.request("POST", op.path, body, op.headers)
+                response = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # The server closed the idle keep-alive connection; send once more on a new one
+                conn.close()
+                conn.request("POST", op.path, body, op.headers)
+                response = conn.getresponse()
+
+            chunks = iter(lambda: response.read(READ_CHUNK), b"")
+            if response.status == 200:
+                return parse_response(chunks)
+            # Faults come with HTTP 500; parse_response raises them as SoapFault
+            try:
+                parse_response(chunks)
+            except ET.ParseError:
+                pass
+            raise SoapHTTPError(response.status, response.reason)
+        except BaseException:
+            conn.close()
+            raise
+
+    def close(self) -> None:
+        """
+        Close every connection opened by the engine, in all threads. A later call reconnects.
+        """
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            conn.close()
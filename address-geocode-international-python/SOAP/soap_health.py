@@ -0,0 +1,20 @@
+"""
+soap_health.py
+
+Default endpoint health tracker for the SOAP PlaceSearch / ReverseSearch classes.
+
+When the REST folder is importable (side by side on sys.path, or through agi_geocode),
+get_default_tracker is the one from REST/circuit_breaker.py, so SOAP calls use the same
+process-wide circuit breakers as AGIRestClient by default, and what one transport learns
+about a host is seen by the other. Without it, there is no default tracker and SOAP calls
+run without circuit breaking, as an explicit health=None did before.
+"""
+
+try:
+    from circuit_breaker import get_default_tracker
+except ImportError:
+    def get_default_tracker():
+        """
+        Return None: the circuit breakers live in REST/circuit_breaker.py.
+        """
+        return None
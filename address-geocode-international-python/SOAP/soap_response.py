@@ -0,0 +1,124 @@
+"""
+soap_response.py
+
+Fast conversion of AGI SOAP (suds) responses into plain Python structures.
+
+A SOAP response is a list of Response items, each with a Key ("SearchInfo", "Error",
+"Locations", ...) and a Value holding Result records made of Key/Value Field pairs.
+response_to_dict flattens this in a single pass into the same shape the REST API
+returns, keeping every location; responses_to_columns turns a batch of responses into
+one list per field for columnar processing.
+"""
+
+# Location-level fields; every other location field is an address component
+LOCATION_FIELDS = frozenset(("PrecisionLevel", "Type", "Latitude", "Longitude"))
+
+
+def _records(resp):
+    """
+    Yield each Result record of a Response item as a {field: value} dict.
+    """
+    value = getattr(resp, "Value", None)
+    for field_obj in getattr(value, "Result", None) or ():
+        yield {field.Key: field.Value for field in getattr(field_obj, "Field", None) or ()}
+
+
+def _location(fields: dict) -> dict:
+    """
+    Split a flat SOAP location record into location fields and AddressComponents.
+    """
+    location = {}
+    components = {}
+    for key, value in fields.items():
+        if key in LOCATION_FIELDS:
+            location[key] = value
+        else:
+            components[key] = value
+    location["AddressComponents"] = components
+    return location
+
+
+def response_to_dict(resp_obj) -> dict:
+    """
+    Convert a SOAP response object into the REST response shape.
+
+    Args:
+        resp_obj: The SOAP response object with a `.Response` iterable attribute.
+
+    Returns:
+        dict: {"SearchInfo": {...}, "Locations": [{..., "AddressComponents": {...}}, ...]}
+            plus "Error": {...} when the service returned an error.
+    """
+    out = {}
+    locations = []
+    for resp in getattr(resp_obj, "Response", None) or ():
+        key = resp.Key
+        if "Locations" in key:
+            locations.extend(_location(fields) for fields in _records(resp))
+        else:
+            for fields in _records(resp):
+                out[key] = fields
+    if locations or "Error" not in out:
+        out["Locations"] = locations
+    return out
+
+
+def response_error(resp_obj):
+    """
+    Return the Error a response carries, or None.
+
+    Args:
+        resp_obj: A suds response object, or a dict returned by FastSoapEngine.
+    """
+    if isinstance(resp_obj, dict):
+        return resp_obj.get("Error") or None
+    return getattr(resp_obj, "Error", None) or None
+
+
+def is_fatal_error(resp_obj) -> bool:
+    """
+    Return True if a response carries an Error with TypeCode 3 (a service-side failure).
+
+    Args:
+        resp_obj: A suds response object, or a dict returned by FastSoapEngine.
+    """
+    error = response_error(resp_obj)
+    if error is None:
+        return False
+    type_code = error.get("TypeCode") if isinstance(error, dict) else getattr(error, "TypeCode", None)
+    return str(type_code) == "3"
+
+
+def responses_to_columns(responses, fields=("PrecisionLevel", "Type", "Latitude", "Longitude"),
+                         components=()) -> dict:
+    """
+    Convert a batch of SOAP responses into columns with one entry per location.
+
+    Args:
+        responses: Iterable of SOAP response objects (None entries are skipped).
+        fields: Location fields to extract.
+        components: Address component fields to extract (e.g. "Locality", "PostalCode").
+
+    Returns:
+        dict: {"row": [...], field: [...], ...} where "row" is the index of the response
+            in the batch that each location came from; missing values are "".
+    """
+    wanted = tuple(fields) + tuple(components)
+    columns = {"row": []}
+    for name in wanted:
+        columns[name] = []
+    appenders = [(name, columns[name].append) for name in wanted]
+    append_row = columns["row"].append
+
+    for row, resp_obj in enumerate(responses):
+        if resp_obj is None:
+            continue
+        for resp in getattr(resp_obj, "Response", None) or ():
+            if "Locations" not in resp.Key:
+                continue
+            for record in _records(resp):
+                append_row(row)
+                get = record.get
+                for name, append in appenders:
+                    append(get(name, ""))
+    return columns
@@ -0,0 +1,94 @@
+'''
+Service Objects - Address Geocode International
+
+Single import point for the REST and SOAP clients:
+
+    import agi_geocode
+
+    result = agi_geocode.place_search(...)               # REST
+    service = agi_geocode.PlaceSearch(license_key, True)  # SOAP
+
+Nothing is imported until a name is first used: importing agi_geocode itself is
+almost free, REST names pull in requests (or aiohttp for the async ones) and SOAP names
+pull in suds, each only on first access. The REST and SOAP modules remain loose scripts
+and can still be used directly from their folders.
+'''
+
+import importlib
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SOURCE_DIRS = (os.path.join(_ROOT, "REST"), os.path.join(_ROOT, "SOAP"))
+
+# Public name -> (module, attribute)
+_EXPORTS = {
+    # REST
+    "place_search": ("place_search_rest", "place_search"),
+    "reverse_search": ("reverse_search_rest", "reverse_search"),
+    "AGIRestClient": ("agi_rest_client", "AGIRestClient"),
+    "get_default_client": ("agi_rest_client", "get_default_client"),
+    "AsyncAGIRestClient": ("agi_rest_async", "AsyncAGIRestClient"),
+    "place_search_async": ("agi_rest_async", "place_search_async"),
+    "reverse_search_async": ("agi_rest_async", "reverse_search_async"),
+    "BatchResult": ("batch_search", "BatchResult"),
+    "batch_place_search": ("batch_search", "batch_place_search"),
+    "batch_reverse_search": ("batch_search", "batch_reverse_search"),
+    "PSResponse": ("agi_response", "PSResponse"),
+    "RSResponse": ("agi_response", "RSResponse"),
+    "ResponseCache": ("response_cache", "ResponseCache"),
+    "ResultStore": ("result_store", "ResultStore"),
+    "WarmSnapshot": ("warm_snapshot", "WarmSnapshot"),
+    "build_snapshot": ("warm_snapshot", "build_snapshot"),
+    "ReverseSearchGridCache": ("spatial_cache", "ReverseSearchGridCache"),
+    "CircuitBreaker": ("circuit_breaker", "CircuitBreaker"),
+    "EndpointHealthTracker": ("circuit_breaker", "EndpointHealthTracker"),
+    "HedgePolicy": ("hedging", "HedgePolicy"),
+    "AGIMetrics": ("agi_metrics", "AGIMetrics"),
+    "TokenBucket": ("rate_limit", "TokenBucket"),
+    "AdaptiveConcurrency": ("rate_limit", "AdaptiveConcurrency"),
+    "AddressDeduplicator": ("address_normalize", "AddressDeduplicator"),
+    "address_key": ("address_normalize", "address_key"),
+    "results_to_columns": ("columnar_export", "results_to_columns"),
+    "run_sharded": ("sharded_runner", "run_sharded"),
+    "reverse_geocode_trace": ("trajectory", "reverse_geocode_trace"),
+    "cascade_place_search": ("cascade_search", "cascade_place_search"),
+    "cascade_place_search_async": ("cascade_search", "cascade_place_search_async"),
+    "CascadeStep": ("cascade_search", "CascadeStep"),
+    "RetryPolicy": ("retry_policy", "RetryPolicy"),
+    "Deadline": ("retry_policy", "Deadline"),
+    "DeadlineExceeded": ("retry_policy", "DeadlineExceeded"),
+    # SOAP
+    "PlaceSearch": ("place_search_soap", "PlaceSearch"),
+    "ReverseSearch": ("reverse_search_soap", "ReverseSearch"),
+    "SoapClientPool": ("soap_client_pool", "SoapClientPool"),
+    "FastSoapEngine": ("soap_fast", "FastSoapEngine"),
+    "soap_response_to_dict": ("soap_response", "response_to_dict"),
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def _add_source_dirs() -> None:
+    """
+    Make the REST and SOAP modules importable; they import each other by plain module name.
+    """
+    for path in _SOURCE_DIRS:
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attr = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    _add_source_dirs()
+    value = getattr(importlib.import_module(module_name), attr)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
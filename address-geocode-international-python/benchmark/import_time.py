@@ -0,0 +1,69 @@
+'''
+Service Objects - AGI Import Time Check
+
+Measures how long "import agi_geocode" takes in a fresh interpreter and verifies that it
+does not pull in requests, aiohttp, suds or numpy. Exits with status 1 if the median import
+time exceeds the budget or a heavy dependency was imported, so it can gate CI:
+
+    python import_time.py --budget-ms 20
+'''
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+HEAVY_MODULES = ("requests", "aiohttp", "suds", "numpy")
+# Median import time allowed, in milliseconds; tests/test_import.py checks against it too
+BUDGET_MS = 20.0
+RUNS = 7
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import agi_geocode
+elapsed = time.perf_counter() - started
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed * 1000, ",".join(heavy))
+"""
+
+
+def measure(runs: int) -> tuple:
+    """
+    Return (import times in ms, heavy modules imported) over runs fresh interpreters.
+    """
+    times = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(output[0]))
+        if len(output) > 1:
+            heavy.update(output[1].split(","))
+    return times, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the agi_geocode package.")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Maximum median import time.")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Fresh interpreters to measure.")
+    args = parser.parse_args()
+
+    times, heavy = measure(args.runs)
+    median = statistics.median(times)
+    print(f"import agi_geocode: median {median:.2f} ms, max {max(times):.2f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.2f} ms)")
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
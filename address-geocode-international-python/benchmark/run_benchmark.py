@@ -0,0 +1,389 @@
+'''
+Service Objects - AGI Benchmark Suite
+
+Drives the REST functions and SOAP classes against local stub endpoints (see
+stub_server.py) and reports throughput, p50/p95/p99 latency and client CPU time per
+call for each scenario:
+
+    rest-sequential   place_search / reverse_search, one call at a time
+    rest-threaded     the same functions on a thread pool
+    rest-async        place_search_async / reverse_search_async under asyncio (needs aiohttp)
+    soap-sequential   PlaceSearch / ReverseSearch SOAP classes, one call at a time (needs suds)
+    soap-threaded     the SOAP classes on a thread pool (needs suds)
+    soap-fast-sequential, soap-fast-threaded
+                      the SOAP classes with the suds-free FastSoapEngine (see SOAP/soap_fast.py)
+
+When both SOAP engines run, their parsed responses are first compared, so the CPU time
+saved by the fast engine is measured on identical results.
+
+The stub endpoints run in a separate process, so the CPU time reported is the client's
+own. Results can be saved as a baseline and later runs compared against it:
+
+    python run_benchmark.py --requests 2000 --save baseline.json
+    python run_benchmark.py --requests 2000 --compare baseline.json
+
+A scenario whose calls raise is reported as failed, with its first error, and the run
+exits with status 1. Failures are judged against --max-error-rate (default 0), which
+leaves room for runs that inject errors faster than the client can recover.
+
+Run "python run_benchmark.py --help" for latency, error rate and outage options.
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "REST"))
+sys.path.insert(0, os.path.join(HERE, "..", "SOAP"))
+
+import stub_server
+
+SCENARIOS = ("rest-sequential", "rest-threaded", "rest-async", "soap-sequential", "soap-threaded",
+             "soap-fast-sequential", "soap-fast-threaded")
+LICENSE_KEY = "BENCHMARK"
+
+# Metrics where a larger value is worse, and where a smaller value is worse
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "p99_ms", "cpu_ms_per_call")
+LOWER_IS_WORSE = ("throughput",)
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """
+    Return the nearest-rank percentile of an ascending list.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+def summarize(latencies: list, errors: list, wall_s: float, cpu_s: float) -> dict:
+    """
+    Return the report row for one scenario; errors holds the exception of each failed call.
+    """
+    ordered = sorted(latencies)
+    calls = len(ordered)
+    return {
+        "calls": calls,
+        "errors": len(errors),
+        "first_error": f"{type(errors[0]).__name__}: {' '.join(str(errors[0]).split())}" if errors else None,
+        "throughput": calls / wall_s if wall_s > 0 else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "cpu_ms_per_call": cpu_s / calls * 1000 if calls else 0.0,
+    }
+
+
+def point_rest_at(primary: str, backup: str) -> None:
+    """
+    Point the REST search functions at the stub endpoints.
+    """
+    import place_search_rest
+    import reverse_search_rest
+
+    for module, op in ((place_search_rest, "PlaceSearch"), (reverse_search_rest, "ReverseSearch")):
+        module.PRIMARY_URL = f"{primary}/AGI/api.svc/json/{op}"
+        module.BACKUP_URL = f"{backup}/AGI/api.svc/{op}"
+        module.TRIAL_URL = f"{primary}/AGI/api.svc/json/{op}"
+
+
+def rest_call(operation: str, client):
+    """
+    Return a no-argument function making one synchronous REST call.
+    """
+    from place_search_rest import place_search
+    from reverse_search_rest import reverse_search
+
+    if operation == "place":
+        return lambda: place_search("17 Battery Place, New York, NY 10004", "", "", "", "", "", "", "", "",
+                                    "USA", "", 1, "", "", LICENSE_KEY, True, client=client)
+    return lambda: reverse_search(40.705273, -74.016979, 100, "USA", 1, "", LICENSE_KEY, True, client=client)
+
+
+def soap_service(operation: str, primary: str, backup: str, fast: bool = False):
+    """
+    Return the PlaceSearch / ReverseSearch service the SOAP scenarios call, on a fresh
+    SoapClientPool, using suds or (fast=True) the FastSoapEngine.
+    """
+    import tempfile
+
+    from soap_client_pool import SoapClientPool
+    from soap_fast import FastSoapEngine
+
+    pool = SoapClientPool(wsdl_cache_dir=tempfile.mkdtemp(prefix="agi-bench-wsdl-"))
+    engine = FastSoapEngine() if fast else None
+    if operation == "place":
+        from place_search_soap import PlaceSearch
+        service = PlaceSearch(LICENSE_KEY, True, client_pool=pool, engine=engine)
+    else:
+        from reverse_search_soap import ReverseSearch
+        service = ReverseSearch(LICENSE_KEY, True, client_pool=pool, engine=engine)
+    service._primary_wsdl = f"{primary}/AGI/soap.svc?wsdl"
+    service._backup_wsdl = f"{backup}/AGI/soap.svc?wsdl"
+    return service
+
+
+def soap_call(operation: str, primary: str, backup: str, fast: bool = False):
+    """
+    Return a no-argument function making one SOAP call through a shared service object,
+    using suds or (fast=True) the FastSoapEngine.
+    """
+    return soap_request(operation, soap_service(operation, primary, backup, fast))
+
+
+def soap_request(operation: str, service):
+    """
+    Return a no-argument function making the benchmark's SOAP call on a service.
+    """
+    if operation == "place":
+        return lambda: service.place_search("17 Battery Place, New York, NY 10004", "", "", "", "", "", "", "", "",
+                                            "USA", 1, "", "", "")
+    return lambda: service.reverse_search("40.705273", "-74.016979", "100", "USA", "1", "")
+
+
+def check_soap_parity(operation: str, backup: str) -> bool:
+    """
+    Return True if the fast engine parses a response into the same dict that
+    response_to_dict builds from the suds response. Both calls go through the same
+    PlaceSearch / ReverseSearch and SoapClientPool path the soap scenarios measure, so a
+    broken suds baseline fails the check instead of being skipped. The backup stub is
+    used for both endpoints because it never injects errors.
+    """
+    from soap_response import response_to_dict
+
+    try:
+        expected = response_to_dict(soap_call(operation, backup, backup)())
+    except Exception as ex:
+        print(f"SOAP parity check failed: the suds path raised {type(ex).__name__}: {' '.join(str(ex).split())}")
+        return False
+    service = soap_service(operation, backup, backup, fast=True)
+    try:
+        actual = soap_request(operation, service)()
+    finally:
+        service._engine.close()
+    if actual != expected:
+        print(f"SOAP engines disagree:\n  suds: {expected}\n  fast: {actual}")
+    return actual == expected
+
+
+def run_sync(call, count: int, workers: int) -> dict:
+    """
+    Make count calls, one at a time (workers=1) or on a thread pool, and summarize them.
+    """
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            call()
+            return time.perf_counter() - started, None
+        except Exception as ex:
+            return time.perf_counter() - started, ex
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    if workers == 1:
+        outcomes = [timed(i) for i in range(count)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(timed, range(count)))
+    cpu_s = time.process_time() - cpu_started
+    wall_s = time.perf_counter() - wall_started
+    return summarize([o[0] for o in outcomes], [o[1] for o in outcomes if o[1] is not None], wall_s, cpu_s)
+
+
+def run_async(operation: str, count: int, concurrency: int, warmup: int) -> dict:
+    """
+    Make count calls with the async client, at most concurrency at a time, and summarize them.
+    """
+    from agi_rest_async import AsyncAGIRestClient, place_search_async, reverse_search_async
+    from circuit_breaker import EndpointHealthTracker
+
+    async def main():
+        client = AsyncAGIRestClient(max_concurrency=concurrency, limit_per_host=concurrency,
+                                    health=EndpointHealthTracker())
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    if operation == "place":
+                        await place_search_async("17 Battery Place, New York, NY 10004", "", "", "", "", "", "", "",
+                                                 "", "USA", "", 1, "", "", LICENSE_KEY, True, client=client)
+                    else:
+                        await reverse_search_async(40.705273, -74.016979, 100, "USA", 1, "", LICENSE_KEY, True,
+                                                   client=client)
+                    return time.perf_counter() - started, None
+                except Exception as ex:
+                    return time.perf_counter() - started, ex
+
+        try:
+            await asyncio.gather(*(one() for _ in range(warmup)))
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            outcomes = await asyncio.gather(*(one() for _ in range(count)))
+            cpu_s = time.process_time() - cpu_started
+            wall_s = time.perf_counter() - wall_started
+        finally:
+            await client.close()
+        return summarize([o[0] for o in outcomes], [o[1] for o in outcomes if o[1] is not None], wall_s, cpu_s)
+
+    return asyncio.run(main())
+
+
+def run_scenario(name: str, args, primary: str, backup: str) -> dict:
+    """
+    Run one scenario and return its report row.
+    """
+    transport, mode = name.rsplit("-", 1)
+    if transport == "rest":
+        point_rest_at(primary, backup)
+    if mode == "async":
+        return run_async(args.operation, args.requests, args.concurrency, args.warmup)
+
+    workers = 1 if mode == "sequential" else args.concurrency
+    if transport == "rest":
+        from agi_rest_client import AGIRestClient
+        from circuit_breaker import EndpointHealthTracker
+
+        client = AGIRestClient(pool_maxsize=workers, health=EndpointHealthTracker())
+        call = rest_call(args.operation, client)
+    else:
+        client = None
+        call = soap_call(args.operation, primary, backup, fast=transport == "soap-fast")
+
+    try:
+        run_sync(call, args.warmup, workers)
+        return run_sync(call, args.requests, workers)
+    finally:
+        if client is not None:
+            client.close()
+
+
+def available(name: str) -> str:
+    """
+    Return None if a scenario's dependencies are importable, else the reason it is skipped.
+    """
+    # The SOAP classes import suds even when they run on the fast engine
+    needed = {"rest": "requests", "soap": "suds", "soap-fast": "suds"}[name.rsplit("-", 1)[0]]
+    modules = [needed] + (["aiohttp"] if name == "rest-async" else [])
+    for module in modules:
+        try:
+            __import__(module)
+        except ImportError:
+            return f"{module} is not installed"
+    return None
+
+
+def failed(row: dict, max_error_rate: float) -> bool:
+    """
+    Return True if a scenario's calls failed more often than max_error_rate allows.
+    """
+    return row["errors"] > max_error_rate * row["calls"]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print each metric against the baseline and return the regressions beyond threshold.
+    """
+    regressions = []
+    print(f"\nComparison against baseline (threshold {threshold:.0%}):")
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"  {name}: no baseline")
+            continue
+        for metric in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > threshold if metric in HIGHER_IS_WORSE else change < -threshold
+            flag = "  REGRESSION" if worse else ""
+            print(f"  {name:20} {metric:16} {old:10.2f} -> {new:10.2f} ({change:+.1%}){flag}")
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AGI clients against local stub endpoints.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run; repeat for several (default: all available).")
+    parser.add_argument("--operation", choices=("place", "reverse"), default="place")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured calls per scenario.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured calls before each scenario.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads or async tasks for concurrent scenarios.")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Stub response latency.")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Extra random stub latency, 0..jitter.")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of primary responses with Error.TypeCode 3.")
+    parser.add_argument("--primary-outage", action="store_true", help="Primary answers every request with HTTP 503.")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Fraction of calls per scenario allowed to raise before the run fails (default 0).")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results against a saved baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression when comparing (default 0.10).")
+    args = parser.parse_args()
+
+    common = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    primary_cfg = dict(common, error_rate=args.error_rate, outage=args.primary_outage)
+    backup_cfg = dict(common)
+
+    ready = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=stub_server.serve, args=(primary_cfg, backup_cfg, ready, stop),
+                                     daemon=True)
+    server.start()
+    primary, backup = ready.get(timeout=30)
+
+    results = {}
+    broken = []
+    try:
+        selected = args.scenario or SCENARIOS
+        if (any(name.startswith("soap-fast") for name in selected) and available("soap-sequential") is None
+                and not check_soap_parity(args.operation, backup)):
+            sys.exit(1)
+        print(f"{'scenario':20} {'calls':>7} {'errors':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'cpu ms/call':>12}")
+        for name in selected:
+            reason = available(name)
+            if reason:
+                print(f"{name:20} skipped: {reason}")
+                continue
+            row = results[name] = run_scenario(name, args, primary, backup)
+            print(f"{name:20} {row['calls']:7d} {row['errors']:7d} {row['throughput']:10.1f} {row['p50_ms']:9.2f} "
+                  f"{row['p95_ms']:9.2f} {row['p99_ms']:9.2f} {row['cpu_ms_per_call']:12.3f}")
+            if failed(row, args.max_error_rate):
+                broken.append(name)
+                print(f"{'':20} FAILED: {row['errors']} of {row['calls']} calls raised, first: {row['first_error']}")
+    finally:
+        stop.set()
+        server.join(timeout=5)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.threshold)
+
+    if broken:
+        print(f"\nFailed scenarios (error rate above {args.max_error_rate:g}): {', '.join(broken)}")
+    if broken or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+'''
+Service Objects - AGI Stub Server
+
+A local stand-in for the AGI service used by the benchmark suite. One StubAGIServer
+plays one endpoint (primary or backup) and answers:
+
+    GET  .../PlaceSearch, .../ReverseSearch   REST JSON responses
+    GET  /AGI/soap.svc?wsdl                    a WSDL describing PlaceSearch / ReverseSearch
+    POST /AGI/soap.svc                         SOAP responses for either operation
+
+Latency, jitter, the fraction of Error.TypeCode 3 responses and a full outage (HTTP 503
+on every request) are configurable, so failover paths can be exercised offline.
+
+Run standalone to serve a primary and a backup endpoint:
+
+    python stub_server.py --latency-ms 20 --error-rate 0.01
+
+Classes:
+    StubAGIServer(host: str = "127.0.0.1",
+                port: int = 0,
+                latency_ms: float = 0,
+                jitter_ms: float = 0,
+                error_rate: float = 0.0,
+                outage: bool = False)
+'''
+
+import argparse
+import json
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+AGI_NS = "https://sws.serviceobjects.com/AGI/"
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+
+SEARCH_INFO = {
+    "Status": "OK",
+    "NumberOfLocations": "1",
+    "Notes": "",
+    "NotesDesc": "",
+    "Warnings": "",
+    "WarningDesc": "",
+}
+LOCATION = {
+    "PrecisionLevel": "16",
+    "Type": "Address",
+    "Latitude": "40.705273",
+    "Longitude": "-74.016979",
+}
+ADDRESS_COMPONENTS = {
+    "PremiseNumber": "17",
+    "Thoroughfare": "Battery Pl",
+    "Locality": "New York",
+    "AdministrativeArea1": "New York",
+    "AdministrativeArea1Abbreviation": "NY",
+    "AdministrativeArea2": "New York",
+    "PostalCode": "10004",
+    "Country": "United States",
+    "CountryISO2": "US",
+    "CountryISO3": "USA",
+    "TimeZone_UTC": "-5",
+}
+FATAL_ERROR = {
+    "Type": "Service Objects Fatal",
+    "TypeCode": "3",
+    "Desc": "Unhandled error. Please contact Service Objects.",
+    "DescCode": "1",
+}
+
+REST_BODY = json.dumps({
+    "SearchInfo": SEARCH_INFO,
+    "Locations": [dict(LOCATION, AddressComponents=ADDRESS_COMPONENTS)],
+}).encode("utf-8")
+REST_ERROR_BODY = json.dumps({"Error": FATAL_ERROR}).encode("utf-8")
+
+OPERATIONS = {
+    "PlaceSearch": ("SingleLine", "Address1", "Address2", "Address3", "Address4", "Address5",
+                    "Locality", "AdministrativeArea", "PostalCode", "Country", "MaxResults",
+                    "SearchType", "Boundaries", "Extras", "LicenseKey"),
+    "ReverseSearch": ("Latitude", "Longitude", "SearchRadius", "Country", "MaxResults",
+                      "SearchType", "LicenseKey"),
+}
+
+
+def _wsdl(location: str) -> bytes:
+    """
+    Return a document/literal WSDL for both operations bound to location.
+    """
+    elements = []
+    messages = []
+    port_ops = []
+    binding_ops = []
+    for op, params in OPERATIONS.items():
+        fields = "".join(f'<xs:element name="{p}" type="xs:string" minOccurs="0"/>' for p in params)
+        elements.append(
+            f'<xs:element name="{op}"><xs:complexType><xs:sequence>{fields}</xs:sequence></xs:complexType></xs:element>'
+            f'<xs:element name="{op}Response"><xs:complexType><xs:sequence>'
+            f'<xs:element name="{op}Result" type="tns:AGIResponse" minOccurs="0"/>'
+            f'</xs:sequence></xs:complexType></xs:element>')
+        messages.append(
+            f'<wsdl:message name="{op}In"><wsdl:part name="parameters" element="tns:{op}"/></wsdl:message>'
+            f'<wsdl:message name="{op}Out"><wsdl:part name="parameters" element="tns:{op}Response"/></wsdl:message>')
+        port_ops.append(
+            f'<wsdl:operation name="{op}"><wsdl:input message="tns:{op}In"/>'
+            f'<wsdl:output message="tns:{op}Out"/></wsdl:operation>')
+        binding_ops.append(
+            f'<wsdl:operation name="{op}"><soap:operation soapAction="{AGI_NS}{op}" style="document"/>'
+            f'<wsdl:input><soap:body use="literal"/></wsdl:input>'
+            f'<wsdl:output><soap:body use="literal"/></wsdl:output></wsdl:operation>')
+
+    return f'''<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="{AGI_NS}" targetNamespace="{AGI_NS}">
+  <wsdl:types>
+    <xs:schema targetNamespace="{AGI_NS}" elementFormDefault="qualified">
+      <xs:complexType name="Field"><xs:sequence>
+        <xs:element name="Key" type="xs:string" minOccurs="0"/>
+        <xs:element name="Value" type="xs:string" minOccurs="0"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Record"><xs:sequence>
+        <xs:element name="Field" type="tns:Field" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="RecordSet"><xs:sequence>
+        <xs:element name="Result" type="tns:Record" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ResponseItem"><xs:sequence>
+        <xs:element name="Key" type="xs:string" minOccurs="0"/>
+        <xs:element name="Value" type="tns:RecordSet" minOccurs="0"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="ErrorInfo"><xs:sequence>
+        <xs:element name="Type" type="xs:string" minOccurs="0"/>
+        <xs:element name="TypeCode" type="xs:string" minOccurs="0"/>
+        <xs:element name="Desc" type="xs:string" minOccurs="0"/>
+        <xs:element name="DescCode" type="xs:string" minOccurs="0"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="AGIResponse"><xs:sequence>
+        <xs:element name="Response" type="tns:ResponseItem" minOccurs="0" maxOccurs="unbounded"/>
+        <xs:element name="Error" type="tns:ErrorInfo" minOccurs="0"/>
+      </xs:sequence></xs:complexType>
+      {"".join(elements)}
+    </xs:schema>
+  </wsdl:types>
+  {"".join(messages)}
+  <wsdl:portType name="IAGI">{"".join(port_ops)}</wsdl:portType>
+  <wsdl:binding name="AGIBinding" type="tns:IAGI">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>
+    {"".join(binding_ops)}
+  </wsdl:binding>
+  <wsdl:service name="AGI">
+    <wsdl:port name="AGIPort" binding="tns:AGIBinding"><soap:address location="{escape(location)}"/></wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>'''.encode("utf-8")
+
+
+def _soap_record(fields: dict) -> str:
+    return "<Result>" + "".join(
+        f"<Field><Key>{k}</Key><Value>{escape(v)}</Value></Field>" for k, v in fields.items()) + "</Result>"
+
+
+def _soap_body(op: str, error: bool) -> bytes:
+    """
+    Return a SOAP response envelope for op: one location, or a fatal Error.
+    """
+    if error:
+        content = ("<Response><Key>Error</Key><Value>" + _soap_record(FATAL_ERROR) + "</Value></Response>"
+                   "<Error>" + "".join(f"<{k}>{escape(v)}</{k}>" for k, v in FATAL_ERROR.items()) + "</Error>")
+    else:
+        content = ("<Response><Key>SearchInfo</Key><Value>" + _soap_record(SEARCH_INFO) + "</Value></Response>"
+                   "<Response><Key>Locations</Key><Value>"
+                   + _soap_record(dict(LOCATION, **ADDRESS_COMPONENTS)) + "</Value></Response>")
+    return (f'<?xml version="1.0" encoding="utf-8"?>'
+            f'<s:Envelope xmlns:s="{SOAP_ENV_NS}"><s:Body>'
+            f'<{op}Response xmlns="{AGI_NS}"><{op}Result>{content}</{op}Result></{op}Response>'
+            f'</s:Body></s:Envelope>').encode("utf-8")
+
+
+class StubAGIServer:
+    """
+    Threaded HTTP server impersonating one AGI endpoint.
+    """
+
+    def __init__(self,
+                host: str = "127.0.0.1",
+                port: int = 0,
+                latency_ms: float = 0,
+                jitter_ms: float = 0,
+                error_rate: float = 0.0,
+                outage: bool = False):
+        """
+        Initialize the stub server; port 0 picks a free port.
+
+        Parameters:
+            latency_ms (float): Delay added before every response.
+            jitter_ms (float): Extra uniformly random delay, 0..jitter_ms.
+            error_rate (float): Fraction of responses carrying Error.TypeCode 3 (0-1).
+            outage (bool): Answer every request with HTTP 503.
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.outage = outage
+        self.requests = 0
+
+        stub = self
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, Nagle and delayed ACKs
+            # stall every keep-alive request by ~40 ms
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int, body: bytes, content_type: str) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _prepare(self) -> bool:
+                """
+                Count the request and apply latency; returns False if it was answered with 503.
+                """
+                with lock:
+                    stub.requests += 1
+                delay = stub.latency_ms + (random.uniform(0, stub.jitter_ms) if stub.jitter_ms else 0)
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                if stub.outage:
+                    self._reply(503, b"Service Unavailable", "text/plain")
+                    return False
+                return True
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path.lower().endswith("/soap.svc"):
+                    location = f"http://{self.headers.get('Host') or stub.address}/AGI/soap.svc"
+                    self._reply(200, _wsdl(location), "text/xml; charset=utf-8")
+                    return
+                if not self._prepare():
+                    return
+                if path.endswith("PlaceSearch") or path.endswith("ReverseSearch"):
+                    error = stub.error_rate and random.random() < stub.error_rate
+                    self._reply(200, REST_ERROR_BODY if error else REST_BODY, "application/json")
+                else:
+                    self._reply(404, b"Not Found", "text/plain")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self._prepare():
+                    return
+                op = None
+                try:
+                    soap_body = ET.fromstring(body).find(f"{{{SOAP_ENV_NS}}}Body")
+                    if soap_body is not None and len(soap_body):
+                        op = soap_body[0].tag.rsplit("}", 1)[-1]
+                except ET.ParseError:
+                    pass
+                if op not in OPERATIONS:
+                    self._reply(400, b"Unknown SOAP operation", "text/plain")
+                    return
+                error = stub.error_rate and random.random() < stub.error_rate
+                self._reply(200, _soap_body(op, error), "text/xml; charset=utf-8")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of the endpoint, e.g. http://127.0.0.1:50123
+        """
+        return f"http://{self.address}"
+
+    def start(self) -> "StubAGIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="agi-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def serve(primary: dict, backup: dict, ready=None, stop=None) -> None:
+    """
+    Run a primary and a backup stub until stop (a threading/multiprocessing Event) is set.
+    Each dict holds StubAGIServer keyword arguments; their base URLs are put on ready (a queue).
+    """
+    with StubAGIServer(**primary) as primary_server, StubAGIServer(**backup) as backup_server:
+        if ready is not None:
+            ready.put((primary_server.url, backup_server.url))
+        if stop is None:
+            threading.Event().wait()
+        else:
+            stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local primary and backup AGI stub endpoints.")
+    parser.add_argument("--primary-port", type=int, default=8701)
+    parser.add_argument("--backup-port", type=int, default=8702)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of primary responses with Error.TypeCode 3.")
+    parser.add_argument("--primary-outage", action="store_true", help="Answer every primary request with HTTP 503.")
+    args = parser.parse_args()
+
+    common = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    primary = dict(common, port=args.primary_port, error_rate=args.error_rate, outage=args.primary_outage)
+    backup = dict(common, port=args.backup_port)
+    print(f"Primary: http://127.0.0.1:{args.primary_port}  Backup: http://127.0.0.1:{args.backup_port}")
+    try:
+        serve(primary, backup)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# agi_geocode is imported from the project folder, and the REST and SOAP modules from
+# their own folders, as the examples do; benchmark holds the stub AGI endpoints
+for path in (ROOT, os.path.join(ROOT, "REST"), os.path.join(ROOT, "SOAP"), os.path.join(ROOT, "benchmark")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def stub():
+    """
+    A local stub AGI endpoint (see benchmark/stub_server.py) serving REST and SOAP.
+    """
+    from stub_server import StubAGIServer
+
+    with StubAGIServer() as server:
+        yield server
@@ -0,0 +1,102 @@
+'''
+Service Objects - AGI Address Normalization Tests
+
+Checks the canonical forms behind address_key, including the positional reading of "St",
+and that AddressDeduplicator makes one call per distinct key within its memory bound.
+'''
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from address_normalize import (AddressDeduplicator, address_key, normalize_country, normalize_postal_code,
+                               normalize_text)
+
+
+@pytest.mark.parametrize("written, canonical", [
+    ("  17 Battery   PLACE, Suite #4 ", "17 battery pl ste 4"),
+    ("Çalle Mayor North", "calle mayor n"),
+    ("Saint Paul Ave", "saint paul ave"),
+    ("St. Paul Avenue", "saint paul ave"),
+    ("Street Paul Ave", "st paul ave"),
+    ("123 Main St", "123 main st"),
+    ("123 Main Street New York NY 10004", "123 main st new york ny 10004"),
+    ("123 Main St New York NY 10004", "123 main st new york ny 10004"),
+    ("123 St Marks Pl", "123 saint marks pl"),
+    ("401 N St Marys Rd", "401 n saint marys rd"),
+    ("1 E St NW", "1 e st nw"),
+    ("Main St Apt 4", "main st apt 4"),
+    ("St Louis", "saint louis"),
+    (None, ""),
+])
+def test_normalize_text(written, canonical):
+    assert normalize_text(written) == canonical
+
+
+def test_saint_and_street_keep_distinct_keys():
+    def key(address1):
+        return address_key({"address1": address1, "locality": "Saint Paul", "country": "US"})
+
+    assert key("10 Saint Paul Ave") == key("10 St. Paul Avenue")
+    assert key("10 Saint Paul Ave") != key("10 Street Paul Ave")
+
+
+def test_normalize_country():
+    assert normalize_country("US") == normalize_country("usa") == normalize_country("United States") == "USA"
+    assert normalize_country("Côte d'Ivoire") == "CIV"
+    assert normalize_country("U.K.") == "GBR"
+    assert normalize_country("Atlantis") == "atlantis"
+
+
+def test_normalize_postal_code():
+    assert normalize_postal_code("sw1a 1aa") == "SW1A1AA"
+    assert normalize_postal_code(" 10004 ") == "10004"
+    assert normalize_postal_code(None) == ""
+
+
+def test_address_key_keeps_search_options_apart():
+    record = {"single_line": "17 Battery Place", "country": "US", "max_results": "1"}
+    assert address_key(record) == address_key({"single_line": "17 battery pl.", "country": "USA", "max_results": 1})
+    assert address_key(record) != address_key(dict(record, search_type="Locality"))
+
+
+def test_deduplicator_calls_once_per_key():
+    dedupe = AddressDeduplicator()
+    calls = []
+
+    for key in ("a", "b", "a", "a"):
+        assert dedupe.call(key, lambda key=key: calls.append(key) or key.upper()) == key.upper()
+
+    assert calls == ["a", "b"]
+    assert dedupe.stats() == {"rows": 4, "requests": 2, "deduplicated": 2, "remembered": 2, "evictions": 0}
+
+
+def test_deduplicator_shares_a_call_in_flight():
+    dedupe = AddressDeduplicator()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(dedupe.call, "key", fetch) for _ in range(4)]
+        while dedupe.stats()["rows"] < 4:
+            time.sleep(0.001)
+        release.set()
+
+    assert [future.result() for future in futures] == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_deduplicator_forgets_the_least_recently_used():
+    dedupe = AddressDeduplicator(max_entries=2)
+    for key in ("a", "b", "a", "c", "b"):
+        dedupe.call(key, lambda key=key: key)
+
+    stats = dedupe.stats()
+    assert (stats["requests"], stats["remembered"], stats["evictions"]) == (4, 2, 2)
@@ -0,0 +1,127 @@
+'''
+Service Objects - AGI Call Metrics Tests
+
+Checks AGIMetrics histograms, hooks, the Prometheus text format and its HTTP endpoint,
+and the metrics the REST and SOAP clients record against the stub server.
+'''
+
+import asyncio
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("requests")
+
+from agi_metrics import AGIMetrics
+from agi_rest_client import AGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from stub_server import StubAGIServer
+
+PARAMS = {"SingleLine": "17 Battery Pl New York NY", "Country": "USA", "MaxResults": "1",
+          "SearchType": "BestMatch", "LicenseKey": "KEY"}
+
+
+def url(server) -> str:
+    return f"{server.url}/AGI/api.svc/json/PlaceSearch"
+
+
+def test_histogram_buckets_and_prometheus_text():
+    metrics = AGIMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.observe("https://sws.serviceobjects.com/AGI", "total", seconds)
+    metrics.record_call("PlaceSearch", "primary_success")
+    metrics.record_error("https://sws.serviceobjects.com/AGI", 3)
+    metrics.in_flight("https://sws.serviceobjects.com/AGI", 1)
+
+    latency = metrics.snapshot()["latency"][("sws.serviceobjects.com", "total")]
+    assert (latency["buckets"], latency["count"]) == ([1, 1, 1], 3)
+
+    text = metrics.to_prometheus()
+    assert 'agi_request_duration_seconds_bucket{endpoint="sws.serviceobjects.com",phase="total",le="1.0"} 2' in text
+    assert 'agi_request_duration_seconds_bucket{endpoint="sws.serviceobjects.com",phase="total",le="+Inf"} 3' in text
+    assert 'agi_calls_total{operation="PlaceSearch",outcome="primary_success"} 1' in text
+    assert 'agi_errors_total{endpoint="sws.serviceobjects.com",type_code="3"} 1' in text
+    assert 'agi_in_flight_requests{endpoint="sws.serviceobjects.com"} 1' in text
+
+
+def test_label_values_are_escaped():
+    metrics = AGIMetrics()
+    metrics.record_call('Place"Search\n', "failure")
+    assert 'operation="Place\\"Search\\n"' in metrics.to_prometheus()
+
+
+def test_hooks_receive_each_event():
+    metrics = AGIMetrics()
+    events = []
+    metrics.add_hook(lambda event, labels, value: events.append((event, labels, value)))
+
+    metrics.record_call("ReverseSearch", "trial_success")
+    metrics.in_flight("http://127.0.0.1:1/AGI", 1)
+
+    assert events == [("call", {"operation": "ReverseSearch", "outcome": "trial_success"}, 1),
+                      ("in_flight", {"endpoint": "127.0.0.1:1"}, 1)]
+
+
+def test_http_server_serves_the_metrics():
+    metrics = AGIMetrics()
+    metrics.record_call("PlaceSearch", "failure")
+    server = metrics.start_http_server(0, "127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+            assert 'outcome="failure"} 1' in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(base + "/other", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_client_records_a_backup_fallback(stub):
+    metrics = AGIMetrics()
+    with StubAGIServer(outage=True) as primary, StubAGIServer(error_rate=1.0) as erroring:
+        with AGIRestClient(health=EndpointHealthTracker(), metrics=metrics) as client:
+            client.call("PlaceSearch", PARAMS, True, url(primary), url(stub), url(primary))
+            client.call("PlaceSearch", PARAMS, True, url(erroring), url(stub), url(erroring))
+
+    snap = metrics.snapshot()
+    assert snap["calls"] == {("PlaceSearch", "backup_fallback"): 2}
+    assert snap["errors"] == {(primary.address, "network"): 1, (erroring.address, "3"): 1}
+    assert snap["latency"][(stub.address, "total")]["count"] == 2
+    assert set(snap["in_flight"].values()) == {0}
+
+
+def test_async_client_records_calls(stub):
+    pytest.importorskip("aiohttp")
+    from agi_rest_async import AsyncAGIRestClient
+
+    metrics = AGIMetrics()
+
+    async def main():
+        async with AsyncAGIRestClient(health=EndpointHealthTracker(), metrics=metrics) as client:
+            await client.call("PlaceSearch", PARAMS, False, url(stub), url(stub), url(stub))
+
+    asyncio.run(main())
+
+    snap = metrics.snapshot()
+    assert snap["calls"] == {("PlaceSearch", "trial_success"): 1}
+    assert snap["latency"][(stub.address, "total")]["count"] == 1
+    assert snap["in_flight"] == {stub.address: 0}
+
+
+def test_soap_service_shares_the_collector(stub):
+    pytest.importorskip("suds")
+    from place_search_soap import PlaceSearch
+
+    metrics = AGIMetrics()
+    with StubAGIServer(error_rate=1.0) as primary:
+        service = PlaceSearch("KEY", True, health=EndpointHealthTracker(), metrics=metrics)
+        service._primary_wsdl = primary.url + "/AGI/soap.svc?wsdl"
+        service._backup_wsdl = stub.url + "/AGI/soap.svc?wsdl"
+        service.place_search("17 Battery Pl", "", "", "", "", "", "", "", "", "USA", 1, "", "", "")
+
+    snap = metrics.snapshot()
+    assert snap["calls"] == {("PlaceSearch", "backup_fallback"): 1}
+    assert snap["errors"] == {(primary.address, "3"): 1}
+    assert snap["in_flight"] == {primary.address: 0, stub.address: 0}
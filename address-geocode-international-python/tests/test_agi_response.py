@@ -0,0 +1,102 @@
+'''
+Service Objects - AGI Response Model Tests
+
+Checks the typed response classes built from REST dicts and suds-shaped SOAP objects, and
+that address components are packed without the raw dict and decoded on first access.
+'''
+
+import gc
+import json
+from types import SimpleNamespace
+
+from agi_response import AddressComponents, LocationInfo, PSResponse, RSResponse
+from stub_server import ADDRESS_COMPONENTS, LOCATION, REST_BODY, SEARCH_INFO
+
+
+def soap_response(*items) -> SimpleNamespace:
+    """
+    Build a suds-shaped response from (key, [field dicts]) items.
+    """
+    return SimpleNamespace(Response=[
+        SimpleNamespace(Key=key, Value=SimpleNamespace(Result=[
+            SimpleNamespace(Field=[SimpleNamespace(Key=k, Value=v) for k, v in record.items()])
+            for record in records]))
+        for key, records in items])
+
+
+def test_from_dict_types():
+    response = PSResponse.from_dict(json.loads(REST_BODY))
+
+    assert response.SearchInfo.Status == "OK"
+    assert response.SearchInfo.NumberOfLocations == 1
+    location = response.Locations[0]
+    assert (location.PrecisionLevel, location.Type) == (16, "Address")
+    assert (location.Latitude, location.Longitude) == (40.705273, -74.016979)
+    assert location.AddressComponents.PostalCode == "10004"
+    assert location.AddressComponents.PlaceName is None
+    assert response.Error is None
+
+
+def test_to_dict_round_trip():
+    data = json.loads(REST_BODY)
+    out = PSResponse.from_dict(data).to_dict()
+
+    components = out["Locations"][0]["AddressComponents"]
+    assert {k: v for k, v in components.items() if v is not None} == ADDRESS_COMPONENTS
+    assert out["Locations"][0]["Latitude"] == float(LOCATION["Latitude"])
+
+
+def test_components_are_decoded_on_first_access():
+    data = json.loads(REST_BODY)["Locations"][0]
+    raw = data["AddressComponents"]
+    location = LocationInfo(data)
+
+    assert location._components is None
+    assert not any(referent is raw for referent in gc.get_referents(location._packed))
+
+    components = location.AddressComponents
+    assert isinstance(components, AddressComponents)
+    assert location.AddressComponents is components
+    assert location._packed is None
+
+
+def test_pack_keeps_only_present_values():
+    packed = AddressComponents.pack({"Locality": "Paris", "CountryISO3": "FRA", "Unknown": "x"})
+
+    assert packed[1:] == ("Paris", "FRA")
+    components = AddressComponents.unpack(packed)
+    assert (components.Locality, components.CountryISO3, components.PostalCode) == ("Paris", "FRA", None)
+    assert AddressComponents.pack({"Unknown": "x"}) is None
+
+
+def test_location_without_components():
+    location = LocationInfo({"PrecisionLevel": "5", "Latitude": "bad"})
+
+    assert location.AddressComponents is None
+    assert (location.PrecisionLevel, location.Latitude) == (5, None)
+    assert location.to_dict()["AddressComponents"] is None
+
+
+def test_repr_includes_components():
+    assert "PostalCode='10004'" in repr(LocationInfo(json.loads(REST_BODY)["Locations"][0]))
+
+
+def test_from_soap_splits_flat_locations():
+    response = RSResponse.from_soap(soap_response(("SearchInfo", [SEARCH_INFO]),
+                                                  ("Locations", [dict(LOCATION, **ADDRESS_COMPONENTS)])))
+
+    assert isinstance(response, RSResponse)
+    assert response.SearchInfo.Status == "OK"
+    location = response.Locations[0]
+    assert location.PrecisionLevel == 16
+    assert location.AddressComponents.Thoroughfare == "Battery Pl"
+    assert location.AddressComponents.to_dict().get("PrecisionLevel") is None
+
+
+def test_from_soap_error():
+    error = {"Type": "Authorization", "TypeCode": "1", "Desc": "Invalid license key", "DescCode": "7"}
+    response = PSResponse.from_soap(soap_response(("Error", [error])))
+
+    assert response.Error.Desc == "Invalid license key"
+    assert response.Locations == []
+    assert response.to_dict()["Error"] == error
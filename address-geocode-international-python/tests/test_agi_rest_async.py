@@ -0,0 +1,115 @@
+'''
+Service Objects - AGI REST Async Client Tests
+
+Runs AsyncAGIRestClient against the stub server: primary-to-backup failover, and one
+client shared by threads that each run their own event loop.
+'''
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from agi_rest_async import AsyncAGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from stub_server import StubAGIServer
+
+PARAMS = {"SingleLine": "17 Battery Pl New York NY", "Country": "USA", "MaxResults": "1",
+          "SearchType": "BestMatch", "LicenseKey": "KEY"}
+
+
+def url(server) -> str:
+    return f"{server.url}/AGI/api.svc/json/PlaceSearch"
+
+
+def call(client: AsyncAGIRestClient, primary, backup, is_live: bool = True):
+    return client.call("PlaceSearch", PARAMS, is_live, url(primary), url(backup), url(primary))
+
+
+def test_primary_outage_falls_back_to_backup(stub):
+    async def main(primary):
+        async with AsyncAGIRestClient(health=EndpointHealthTracker()) as client:
+            return await call(client, primary, stub)
+
+    with StubAGIServer(outage=True) as primary:
+        data = asyncio.run(main(primary))
+
+    assert "Locations" in data
+    assert (primary.requests, stub.requests) == (1, 1)
+
+
+def test_open_primary_circuit_skips_the_primary(stub):
+    health = EndpointHealthTracker(failure_threshold=2)
+
+    async def main(primary):
+        async with AsyncAGIRestClient(health=health) as client:
+            return [await call(client, primary, stub) for _ in range(4)]
+
+    with StubAGIServer(outage=True) as primary:
+        results = asyncio.run(main(primary))
+
+    assert all("Locations" in data for data in results)
+    assert (primary.requests, stub.requests) == (2, 4)
+
+
+def test_backup_error_payload_raises(stub):
+    async def main(primary, backup):
+        async with AsyncAGIRestClient(health=EndpointHealthTracker()) as client:
+            return await call(client, primary, backup)
+
+    with StubAGIServer(outage=True) as primary, StubAGIServer(error_rate=1.0) as backup:
+        with pytest.raises(RuntimeError, match="backup error"):
+            asyncio.run(main(primary, backup))
+
+
+def test_threads_with_their_own_loops_share_one_client():
+    client = AsyncAGIRestClient(health=EndpointHealthTracker())
+    started = threading.Barrier(2)
+    errors = []
+
+    async def burst(server):
+        pending = [asyncio.ensure_future(call(client, server, server, is_live=False)) for _ in range(5)]
+        # Both loops bind while the other one's requests are in flight
+        await asyncio.sleep(0.02)
+        await asyncio.to_thread(started.wait, 5)
+        try:
+            return await asyncio.gather(*pending)
+        finally:
+            await client.release_loop()
+
+    def worker(server):
+        try:
+            assert all("Locations" in data for data in asyncio.run(burst(server)))
+        except Exception as ex:
+            errors.append(ex)
+
+    with StubAGIServer(latency_ms=150) as server:
+        threads = [threading.Thread(target=worker, args=(server,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        assert server.requests == 10
+
+    assert errors == []
+    assert len(client._sessions) == 0
+
+
+def test_a_new_loop_releases_the_session_of_a_closed_one(stub):
+    client = AsyncAGIRestClient(health=EndpointHealthTracker())
+    sessions = []
+
+    async def main():
+        await call(client, stub, stub)
+        sessions.append(client._bind()[0])
+
+    asyncio.run(main())
+    asyncio.run(main())
+
+    first, second = sessions
+    assert first is not second
+    assert first.closed
+    asyncio.run(client.close())
+    assert second.closed
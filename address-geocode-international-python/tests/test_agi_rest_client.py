@@ -0,0 +1,109 @@
+'''
+Service Objects - AGI REST Client Tests
+
+Runs AGIRestClient against stub servers: primary-to-backup failover, circuit breaking,
+trial calls, retries and deadlines.
+'''
+
+import socket
+
+import pytest
+
+pytest.importorskip("requests")
+
+from agi_rest_client import AGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from retry_policy import AGIResponseError, AGIUnavailableError, DeadlineExceeded, RetryPolicy
+from stub_server import StubAGIServer
+
+PARAMS = {"SingleLine": "17 Battery Pl New York NY", "Country": "USA", "MaxResults": "1",
+          "SearchType": "BestMatch", "LicenseKey": "KEY"}
+
+
+def url(server) -> str:
+    return f"{server.url}/AGI/api.svc/json/PlaceSearch"
+
+
+def closed_url() -> str:
+    """
+    Return a URL on a local port nothing listens on.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/AGI/api.svc/json/PlaceSearch"
+
+
+def client(**kwargs) -> AGIRestClient:
+    return AGIRestClient(health=kwargs.pop("health", None) or EndpointHealthTracker(), **kwargs)
+
+
+def call(agi: AGIRestClient, primary: str, backup: str, is_live: bool = True) -> dict:
+    return agi.call("PlaceSearch", PARAMS, is_live, primary, backup, primary)
+
+
+def test_primary_answers(stub):
+    with client() as agi:
+        assert "Locations" in call(agi, url(stub), closed_url())
+    assert stub.requests == 1
+
+
+def test_primary_outage_falls_back_to_backup(stub):
+    with StubAGIServer(outage=True) as primary, client() as agi:
+        assert "Locations" in call(agi, url(primary), url(stub))
+        assert (primary.requests, stub.requests) == (1, 1)
+
+
+def test_unreachable_primary_falls_back_to_backup(stub):
+    with client() as agi:
+        assert "Locations" in call(agi, closed_url(), url(stub))
+
+
+def test_primary_error_payload_falls_back_to_backup(stub):
+    with StubAGIServer(error_rate=1.0) as primary, client() as agi:
+        assert "Error" not in call(agi, url(primary), url(stub))
+        assert stub.requests == 1
+
+
+def test_open_primary_circuit_skips_the_primary(stub):
+    health = EndpointHealthTracker(failure_threshold=2)
+    with StubAGIServer(outage=True) as primary, client(health=health) as agi:
+        for _ in range(4):
+            assert "Locations" in call(agi, url(primary), url(stub))
+        assert (primary.requests, stub.requests) == (2, 4)
+
+
+def test_backup_error_payload_raises(stub):
+    with StubAGIServer(outage=True) as primary, StubAGIServer(error_rate=1.0) as backup, client() as agi:
+        with pytest.raises(AGIResponseError) as info:
+            call(agi, url(primary), url(backup))
+    assert info.value.error["TypeCode"] == "3"
+
+
+def test_both_endpoints_down_raises_unavailable():
+    with client() as agi:
+        with pytest.raises(AGIUnavailableError):
+            call(agi, closed_url(), closed_url())
+
+
+def test_trial_returns_error_payloads_without_fallback(stub):
+    with StubAGIServer(error_rate=1.0) as trial, client() as agi:
+        assert "Error" in call(agi, url(trial), url(stub), is_live=False)
+        assert stub.requests == 0
+        with pytest.raises(AGIUnavailableError, match="trial"):
+            call(agi, closed_url(), url(stub), is_live=False)
+
+
+def test_retry_repeats_a_retryable_failure():
+    policy = RetryPolicy(max_attempts=3, base_delay_s=0.001, max_delay_s=0.001)
+    with StubAGIServer(error_rate=1.0) as server, client(retry=policy) as agi:
+        with pytest.raises(AGIResponseError):
+            call(agi, url(server), url(server))
+        # Primary and backup on each of the three attempts
+        assert server.requests == 6
+
+
+def test_deadline_bounds_a_slow_call():
+    with StubAGIServer(latency_ms=500) as server, client(deadline_s=0.2) as agi:
+        with pytest.raises(DeadlineExceeded):
+            call(agi, url(server), url(server))
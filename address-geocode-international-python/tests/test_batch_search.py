@@ -0,0 +1,135 @@
+'''
+Service Objects - AGI Batch Search Tests
+
+Checks run_batch ordering, error capture and bounded read-ahead, and batch place and
+reverse searches against the stub server, including deduplicated place searches.
+'''
+
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import place_search_rest
+import reverse_search_rest
+from address_normalize import AddressDeduplicator
+from agi_rest_client import AGIRestClient
+from batch_search import (PLACE_SEARCH_FIELDS, batch_place_search, batch_reverse_search, record_args,
+                          run_batch)
+from circuit_breaker import EndpointHealthTracker
+from stub_server import StubAGIServer
+
+
+@pytest.fixture
+def endpoints(stub, monkeypatch):
+    """
+    Point the place and reverse search modules at the stub server.
+    """
+    for module, operation in ((place_search_rest, "PlaceSearch"), (reverse_search_rest, "ReverseSearch")):
+        for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+            monkeypatch.setattr(module, name, f"{stub.url}/AGI/api.svc/json/{operation}")
+    return stub
+
+
+def client() -> AGIRestClient:
+    return AGIRestClient(health=EndpointHealthTracker())
+
+
+def test_record_args_accepts_dicts_and_tuples():
+    assert record_args({"single_line": "17 Battery Pl", "country": "US"}, PLACE_SEARCH_FIELDS)[0] == "17 Battery Pl"
+    assert record_args(("17 Battery Pl",), PLACE_SEARCH_FIELDS) == ["17 Battery Pl"] + [""] * (len(PLACE_SEARCH_FIELDS) - 1)
+    with pytest.raises(ValueError, match="at most"):
+        record_args(("x",) * (len(PLACE_SEARCH_FIELDS) + 1), PLACE_SEARCH_FIELDS)
+
+
+def test_run_batch_yields_in_input_order_and_captures_errors():
+    def call(index, record):
+        # Later records finish first
+        time.sleep((5 - index) * 0.01)
+        if record == "bad":
+            raise ValueError(record)
+        return {"record": record}
+
+    results = list(run_batch(["a", "b", "bad", "c", "d"], call, max_workers=5))
+
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [result.response for result in results if result.ok] == [{"record": r} for r in "abcd"]
+    assert isinstance(results[2].error, ValueError)
+
+
+def test_run_batch_reads_no_further_ahead_than_max_pending():
+    read = []
+
+    def records():
+        for index in range(20):
+            read.append(index)
+            yield index
+
+    batch = run_batch(records(), lambda index, record: {}, max_workers=2, max_pending=3)
+    next(batch)
+    assert len(read) <= 4
+    batch.close()
+
+
+def test_run_batch_reports_progress_and_throughput():
+    progress, throughput = [], []
+
+    def call(index, record):
+        if record % 3 == 0:
+            raise ValueError(record)
+        return {}
+
+    list(run_batch(range(7), call, max_workers=2, progress_interval=3,
+                   on_progress=lambda *args: progress.append(args),
+                   on_throughput=lambda completed, elapsed, rate: throughput.append(completed)))
+
+    assert progress == [(3, 1), (6, 2), (7, 3)]
+    assert throughput == [3, 6, 7]
+
+
+def test_batch_place_search_against_the_stub(endpoints):
+    records = [{"single_line": "17 Battery Pl New York NY", "country": "US"},
+               ("1600 Amphitheatre Pkwy Mountain View CA", "", "", "", "", "", "", "", "", "US")]
+    with client() as agi:
+        results = list(batch_place_search(records, "KEY", True, max_workers=2, client=agi))
+
+    assert [result.record for result in results] == records
+    assert all(result.ok and "Locations" in result.response for result in results)
+    assert endpoints.requests == 2
+
+
+def test_batch_place_search_dedupes_equivalent_addresses(endpoints):
+    records = [{"single_line": "17 Battery Place", "country": "US"},
+               {"single_line": "17 battery pl.", "country": "USA"},
+               {"single_line": "1600 Amphitheatre Pkwy", "country": "US"},
+               {"single_line": "17 BATTERY PL", "country": "United States"}]
+    dedupe = AddressDeduplicator()
+    with client() as agi:
+        results = list(batch_place_search(records, "KEY", True, max_workers=4, client=agi, dedupe=dedupe))
+
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert all(result.ok for result in results)
+    assert endpoints.requests == 2
+    assert dedupe.stats()["deduplicated"] == 2
+
+
+def test_batch_place_search_reports_outages_per_record(monkeypatch):
+    with StubAGIServer(outage=True) as server:
+        for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+            monkeypatch.setattr(place_search_rest, name, f"{server.url}/AGI/api.svc/json/PlaceSearch")
+        with client() as agi:
+            results = list(batch_place_search([{"single_line": "17 Battery Pl"}] * 3, "KEY", True,
+                                              max_workers=2, client=agi))
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert not any(result.ok for result in results)
+
+
+def test_batch_reverse_search_against_the_stub(endpoints):
+    records = [{"latitude": 40.705273, "longitude": -74.017426, "country": "US"}, (34.42, -119.70)]
+    with client() as agi:
+        results = list(batch_reverse_search(records, "KEY", False, max_workers=2, client=agi))
+
+    assert all(result.ok and "Locations" in result.response for result in results)
+    assert endpoints.requests == 2
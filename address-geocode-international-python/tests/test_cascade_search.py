@@ -0,0 +1,140 @@
+'''
+Service Objects - AGI Cascading Place Search Tests
+
+Checks plan_steps and the acceptance rules of _Cascade.result, without network calls.
+'''
+
+import pytest
+
+pytest.importorskip("requests")
+
+from cascade_search import DEFAULT_STEPS, CascadeResult, CascadeStep, _Cascade, plan_steps, precision_of
+
+ARGS = {"single_line": "", "address1": "17 Battery Pl", "address2": "", "address3": "", "address4": "",
+        "address5": "", "locality": "New York", "administrative_area": "NY", "postal_code": "10004",
+        "country": "USA", "boundaries": "", "max_results": "1", "search_type": "BestMatch", "extras": ""}
+
+
+def located(*levels) -> dict:
+    return {"Locations": [{"PrecisionLevel": str(level)} for level in levels]}
+
+
+def cascade(steps: int = 3, min_precision: int = 10) -> _Cascade:
+    planned = [(f"type{step}", {"step": step}) for step in range(steps)]
+    return _Cascade(planned, min_precision)
+
+
+def launch(run: _Cascade, count: int) -> None:
+    for _ in range(count):
+        assert run.next_request() is not None
+
+
+def test_precision_of():
+    assert precision_of(located(12, 16, "x")) == 16
+    assert precision_of(located("x")) == 0
+    assert precision_of({"Locations": []}) is None
+    assert precision_of({"Error": {"TypeCode": "4"}, "Locations": [{"PrecisionLevel": "16"}]}) is None
+    assert precision_of(None) is None
+
+
+def test_plan_steps_default_fallbacks():
+    planned = plan_steps(ARGS, DEFAULT_STEPS)
+
+    assert [search_type for search_type, _ in planned] == ["BestMatch", "Locality", "PostalCode"]
+    assert planned[0][1] is ARGS
+    locality = planned[1][1]
+    assert (locality["address1"], locality["postal_code"], locality["locality"]) == ("", "", "New York")
+    postal_code = planned[2][1]
+    assert (postal_code["address1"], postal_code["locality"], postal_code["postal_code"]) == ("", "", "10004")
+    assert ARGS["address1"] == "17 Battery Pl"
+
+
+def test_plan_steps_skips_steps_without_their_fields():
+    planned = plan_steps(dict(ARGS, locality="", postal_code=""), DEFAULT_STEPS)
+    assert [search_type for search_type, _ in planned] == ["BestMatch"]
+
+
+def test_plan_steps_drops_repeated_requests():
+    args = dict(ARGS, single_line="New York NY", address1="", postal_code="", search_type="Locality")
+    steps = DEFAULT_STEPS + (CascadeStep("Locality", clear=("address1",)),)
+    assert [search_type for search_type, _ in plan_steps(args, steps)] == ["Locality", "PostalCode"]
+
+
+def test_next_request_launches_each_step_once():
+    run = cascade(2)
+    assert run.next_request() == (0, {"step": 0})
+    assert run.next_request() == (1, {"step": 1})
+    assert run.next_request() is None
+    assert run.launched == 2
+
+
+def test_first_step_reaching_min_precision_wins_at_once():
+    run = cascade()
+    launch(run, 2)
+    run.record(0, located(16), None)
+
+    assert run.result() == CascadeResult(located(16), 0, "type0", 16, 2)
+
+
+def test_coarser_success_waits_for_finer_steps():
+    run = cascade()
+    launch(run, 2)
+    run.record(1, located(12), None)
+    assert run.result() is None
+
+    run.record(0, {"Locations": []}, None)
+    assert run.result() == CascadeResult(located(12), 1, "type1", 12, 2)
+
+
+def test_best_answered_precision_is_returned():
+    run = cascade(min_precision=12)
+    launch(run, 3)
+    run.record(1, located(14), None)
+    run.record(2, located(16), None)
+    run.record(0, located(10), None)
+
+    result = run.result()
+    assert (result.step, result.precision) == (2, 16)
+
+
+def test_equal_precision_prefers_the_earlier_step():
+    run = cascade()
+    launch(run, 2)
+    run.record(1, located(12), None)
+    run.record(0, located(12), None)
+
+    assert run.result().step == 0
+
+
+def test_below_min_precision_waits_for_every_step():
+    run = cascade(min_precision=16)
+    launch(run, 2)
+    run.record(0, located(5), None)
+    run.record(1, located(8), None)
+    assert run.result() is None
+
+    launch(run, 1)
+    run.record(2, {"Locations": []}, None)
+    result = run.result()
+    assert (result.step, result.precision, result.launched) == (1, 8, 3)
+
+
+def test_nothing_located_returns_the_request_as_given():
+    run = cascade(2)
+    launch(run, 2)
+    run.record(1, None, RuntimeError("unavailable"))
+    run.record(0, {"Locations": []}, None)
+
+    assert run.result() == CascadeResult({"Locations": []}, 0, "type0", None, 2)
+
+
+def test_every_step_failing_raises_the_first_error():
+    run = cascade(2)
+    launch(run, 2)
+    first = RuntimeError("primary and backup failed")
+    run.record(0, None, first)
+    run.record(1, None, RuntimeError("later"))
+
+    with pytest.raises(RuntimeError) as info:
+        run.result()
+    assert info.value is first
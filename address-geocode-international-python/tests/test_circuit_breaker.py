@@ -0,0 +1,82 @@
+'''
+Service Objects - AGI Circuit Breaker Tests
+
+Walks a CircuitBreaker through closed, open and half-open on a fake clock.
+'''
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, EndpointHealthTracker, endpoint_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout_s=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout_s=30, half_open_max_calls=1)
+    breaker.record_failure()
+    clock[0] += 29
+    assert breaker.state == OPEN
+
+    clock[0] += 1
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, recovery_timeout_s=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["open_for_s"] == 0
+
+
+def test_unrecorded_probe_slot_is_reclaimed(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout_s=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # The probe's outcome was never recorded, e.g. the call was cancelled
+    clock[0] += 30
+    assert breaker.allow_request()
+
+
+def test_tracker_shares_a_breaker_per_host():
+    tracker = EndpointHealthTracker(failure_threshold=1)
+    primary = tracker.breaker("https://sws.serviceobjects.com/AGI/api.svc/json/PlaceSearch")
+    assert tracker.breaker("https://sws.serviceobjects.com/AGI/soap.svc?wsdl") is primary
+    assert tracker.breaker("https://swsbackup.serviceobjects.com/AGI/soap.svc?wsdl") is not primary
+
+    primary.record_failure()
+    assert tracker.snapshot()[endpoint_key("https://sws.serviceobjects.com/x")]["state"] == OPEN
@@ -0,0 +1,82 @@
+'''
+Service Objects - AGI Columnar Export Tests
+
+Converts batch results from the stub server, failed records and multi-location
+responses into NumPy columns with results_to_columns.
+'''
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("requests")
+
+import place_search_rest
+from agi_rest_client import AGIRestClient
+from batch_search import batch_place_search
+from circuit_breaker import EndpointHealthTracker
+from columnar_export import results_to_columns
+from stub_server import ADDRESS_COMPONENTS, LOCATION, StubAGIServer
+
+SECOND = {"PrecisionLevel": "8", "Type": "Locality", "Latitude": "34.42", "Longitude": "-119.70",
+          "AddressComponents": {"Locality": "Santa Barbara"}}
+
+
+@pytest.fixture
+def endpoints(stub, monkeypatch):
+    """
+    Point place_search at the stub server.
+    """
+    for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+        monkeypatch.setattr(place_search_rest, name, f"{stub.url}/AGI/api.svc/json/PlaceSearch")
+    return stub
+
+
+def test_batch_results_line_up_with_the_input(endpoints, monkeypatch):
+    records = [{"single_line": "17 Battery Pl"}, {"single_line": "1 Main St"}]
+    with AGIRestClient(health=EndpointHealthTracker()) as client:
+        results = list(batch_place_search(records, "KEY", True, max_workers=2, client=client))
+
+    # A record whose endpoints are both down becomes a row of missing values
+    with StubAGIServer(outage=True) as down:
+        for name in ("PRIMARY_URL", "BACKUP_URL"):
+            monkeypatch.setattr(place_search_rest, name, f"{down.url}/AGI/api.svc/json/PlaceSearch")
+        with AGIRestClient(health=EndpointHealthTracker()) as client:
+            results += list(batch_place_search(records[:1], "KEY", True, max_workers=1, client=client))
+    assert not results[-1].ok
+
+    columns = results_to_columns(results, components=("PostalCode", "CountryISO3"))
+
+    assert len(columns) == 3
+    assert columns.row.tolist() == [0, 1, 2]
+    assert columns.latitude[:2].tolist() == [float(LOCATION["Latitude"])] * 2
+    assert math.isnan(columns.latitude[2]) and math.isnan(columns.longitude[2])
+    assert columns.precision_levels == [LOCATION["PrecisionLevel"]]
+    assert columns.precision_level.tolist() == [0, 0, -1]
+    assert columns.types == [LOCATION["Type"]]
+    assert columns.components["PostalCode"].tolist() == [ADDRESS_COMPONENTS["PostalCode"]] * 2 + [""]
+    assert columns.latitude.dtype == np.float64 and columns.type.dtype == np.int16
+
+
+def test_all_locations_emits_one_row_per_location():
+    response = {"Locations": [dict(LOCATION, AddressComponents=ADDRESS_COMPONENTS), SECOND]}
+    results = [response, None, {"Locations": []}]
+
+    best = results_to_columns(results, components=("Locality",))
+    assert best.row.tolist() == [0, 1, 2]
+    assert best.components["Locality"].tolist() == ["New York", "", ""]
+
+    every = results_to_columns(results, components=("Locality",), all_locations=True)
+    assert every.row.tolist() == [0, 0, 1, 2]
+    assert every.types == ["Address", "Locality"]
+    assert every.type.tolist() == [0, 1, -1, -1]
+    assert every.longitude[1] == pytest.approx(-119.70)
+    assert every.components["Locality"].tolist() == ["New York", "Santa Barbara", "", ""]
+
+
+def test_unparseable_coordinates_become_nan():
+    columns = results_to_columns([{"Locations": [{"Latitude": "", "Longitude": None, "PrecisionLevel": ""}]}])
+    assert math.isnan(columns.latitude[0]) and math.isnan(columns.longitude[0])
+    assert columns.precision_level.tolist() == [-1]
+    assert columns.precision_levels == []
@@ -0,0 +1,131 @@
+'''
+Service Objects - AGI Geocoding Command Line Tool Tests
+
+Runs geocode_cli against the stub server: CSV and JSONL output in input order, and
+resuming an interrupted run from its checkpoint without repeating finished rows.
+'''
+
+import csv
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+import geocode_cli
+import place_search_rest
+from batch_search import PLACE_SEARCH_FIELDS
+from geocode_cli import load_checkpoint, main, read_records, summarize
+
+ADDRESSES = [f"{number} Battery Pl New York NY" for number in range(1, 7)]
+
+
+@pytest.fixture
+def endpoints(stub, monkeypatch):
+    """
+    Point place_search at the stub server.
+    """
+    for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+        monkeypatch.setattr(place_search_rest, name, f"{stub.url}/AGI/api.svc/json/PlaceSearch")
+    return stub
+
+
+@pytest.fixture
+def addresses(tmp_path):
+    path = tmp_path / "addresses.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["SingleLine", "Country"])
+        writer.writerows([address, "US"] for address in ADDRESSES)
+    return str(path)
+
+
+def geocode(source: str, output: str, *options) -> int:
+    return main(["place", source, output, "--license-key", "KEY", "--workers", "2", *options])
+
+
+def read_csv(path: str) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def interrupt_after(monkeypatch, rows: int) -> None:
+    """
+    Make the next run stop with KeyboardInterrupt after writing the given number of rows.
+    """
+    write_threaded = geocode_cli.write_threaded
+
+    def interrupted(*args, **kwargs):
+        for written, step in enumerate(write_threaded(*args, **kwargs), 1):
+            yield step
+            if written == rows:
+                raise KeyboardInterrupt
+
+    monkeypatch.setattr(geocode_cli, "write_threaded", interrupted)
+
+
+def test_read_records_matches_columns_ignoring_case_and_underscores(addresses):
+    records = list(read_records(addresses, "csv", PLACE_SEARCH_FIELDS))
+    assert records[0] == {"single_line": ADDRESSES[0], "country": "US"}
+
+
+def test_summarize_reports_errors_and_the_best_location():
+    assert summarize(None, ValueError("boom"))["ErrorDesc"] == "boom"
+    error = {"Error": {"Type": "Authorization", "TypeCode": "1", "Desc": "Bad key"}}
+    assert summarize(error, None)["ErrorTypeCode"] == "1"
+    response = {"SearchInfo": {"Status": "OK"}, "Locations": [{"PrecisionLevel": "16", "Latitude": "40.7"}]}
+    assert (summarize(response, None)["Status"], summarize(response, None)["Latitude"]) == ("OK", "40.7")
+
+
+def test_csv_output_keeps_input_order(endpoints, addresses, tmp_path):
+    output = str(tmp_path / "results.csv")
+    assert geocode(addresses, output) == 0
+
+    rows = read_csv(output)
+    assert [row["single_line"] for row in rows] == ADDRESSES
+    assert all(row["Status"] == "OK" and row["Latitude"] for row in rows)
+    assert load_checkpoint(output + ".checkpoint")["completed"] == len(ADDRESSES)
+    assert endpoints.requests == len(ADDRESSES)
+
+
+def test_jsonl_output_numbers_rows(endpoints, addresses, tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    assert geocode(addresses, output) == 0
+
+    with open(output, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["index"] for line in lines] == list(range(len(ADDRESSES)))
+    assert all(line["error"] is None and "Locations" in line["response"] for line in lines)
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(endpoints, addresses, tmp_path, monkeypatch):
+    output = str(tmp_path / "results.csv")
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 4)
+        with pytest.raises(KeyboardInterrupt):
+            geocode(addresses, output, "--checkpoint-every", "2")
+    assert load_checkpoint(output + ".checkpoint")["completed"] == 4
+
+    # A row written after the last checkpoint save is dropped on resume
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("partial,row\n")
+    requests = endpoints.requests
+
+    assert geocode(addresses, output) == 0
+    assert [row["single_line"] for row in read_csv(output)] == ADDRESSES
+    assert endpoints.requests - requests == 2
+
+
+def test_restart_ignores_the_checkpoint(endpoints, addresses, tmp_path):
+    output = str(tmp_path / "results.csv")
+    geocode(addresses, output)
+    requests = endpoints.requests
+
+    assert geocode(addresses, output, "--restart") == 0
+    assert [row["single_line"] for row in read_csv(output)] == ADDRESSES
+    assert endpoints.requests - requests == len(ADDRESSES)
+
+
+def test_missing_license_key_is_an_error(addresses, tmp_path, monkeypatch):
+    monkeypatch.delenv("AGI_LICENSE_KEY", raising=False)
+    assert main(["place", addresses, str(tmp_path / "results.csv")]) == 2
@@ -0,0 +1,120 @@
+'''
+Service Objects - AGI Hedged Request Tests
+
+Checks the learned hedge delay and the hedge budget of HedgePolicy, and hedged calls of
+AGIRestClient and AsyncAGIRestClient against a slow stub primary and a fast backup.
+'''
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from agi_rest_client import AGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from hedging import HedgePolicy
+from stub_server import StubAGIServer
+
+PARAMS = {"SingleLine": "17 Battery Pl New York NY", "Country": "USA", "MaxResults": "1",
+          "SearchType": "BestMatch", "LicenseKey": "KEY"}
+
+
+def url(server) -> str:
+    return f"{server.url}/AGI/api.svc/json/PlaceSearch"
+
+
+def call(hedge: HedgePolicy, primary, backup) -> dict:
+    with AGIRestClient(health=EndpointHealthTracker(), hedge=hedge) as client:
+        return client.call("PlaceSearch", PARAMS, True, url(primary), url(backup), url(primary))
+
+
+def test_fixed_delay_is_not_learned():
+    hedge = HedgePolicy(delay_s=0.2)
+    for _ in range(64):
+        hedge.record_latency(1.0)
+    assert hedge.delay() == 0.2
+
+
+def test_delay_is_learned_from_the_latency_percentile():
+    hedge = HedgePolicy(percentile=0.9, initial_delay_s=0.5, min_delay_s=0.01)
+    for ms in range(1, 32):
+        hedge.record_latency(ms / 1000)
+    assert hedge.delay() == 0.5
+
+    hedge.record_latency(0.032)
+    assert hedge.delay() == pytest.approx(0.029)
+
+
+def test_learned_delay_has_a_floor():
+    hedge = HedgePolicy(min_delay_s=0.05)
+    for _ in range(32):
+        hedge.record_latency(0.001)
+    assert hedge.delay() == 0.05
+
+
+def test_budget_caps_hedges_to_a_share_of_requests():
+    hedge = HedgePolicy(budget_ratio=0.5, budget_burst=1)
+    assert hedge.try_acquire()
+    assert not hedge.try_acquire()
+
+    hedge.note_request()
+    assert not hedge.try_acquire()
+    hedge.note_request()
+    assert hedge.try_acquire()
+
+    stats = hedge.stats()
+    assert (stats["requests"], stats["hedges"], stats["hedges_denied"]) == (2, 2, 2)
+    assert stats["hedge_rate"] == 1.0
+
+
+def test_slow_primary_is_raced_against_the_backup(stub):
+    hedge = HedgePolicy(delay_s=0.05)
+    with StubAGIServer(latency_ms=800) as primary:
+        started = time.perf_counter()
+        assert "Locations" in call(hedge, primary, stub)
+        assert time.perf_counter() - started < 0.6
+
+    assert stub.requests == 1
+    assert hedge.stats()["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged(stub):
+    hedge = HedgePolicy(delay_s=0.5)
+    with StubAGIServer() as primary:
+        assert "Locations" in call(hedge, primary, stub)
+
+    assert stub.requests == 0
+    assert hedge.stats()["hedges"] == 0
+
+
+def test_exhausted_budget_waits_for_the_primary(stub):
+    hedge = HedgePolicy(delay_s=0.05, budget_ratio=0, budget_burst=0)
+    with StubAGIServer(latency_ms=200) as primary:
+        assert "Locations" in call(hedge, primary, stub)
+
+    assert stub.requests == 0
+    assert hedge.stats()["hedges_denied"] == 1
+
+
+def test_async_slow_primary_is_cancelled_when_the_backup_wins(stub):
+    pytest.importorskip("aiohttp")
+    from agi_rest_async import AsyncAGIRestClient
+
+    hedge = HedgePolicy(delay_s=0.05)
+
+    async def main(primary):
+        async with AsyncAGIRestClient(health=EndpointHealthTracker(), hedge=hedge) as client:
+            started = time.perf_counter()
+            data = await client.call("PlaceSearch", PARAMS, True, url(primary), url(stub), url(primary))
+            return data, time.perf_counter() - started
+
+    with StubAGIServer(latency_ms=800) as primary:
+        data, elapsed = asyncio.run(main(primary))
+
+    assert "Locations" in data and elapsed < 0.6
+    assert stub.requests == 1
+    assert hedge.stats()["hedge_wins"] == 1
+    # The cancelled primary still leaves a censored latency sample
+    assert len(hedge._latencies) == 1 and hedge._latencies[0] >= 0.05
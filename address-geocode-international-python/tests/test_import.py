@@ -0,0 +1,55 @@
+'''
+Service Objects - AGI Import Tests
+
+Checks that "import agi_geocode" stays lightweight: importing the package, listing its
+names or reading __all__ must not pull in any of the optional heavy dependencies, and the
+median import time must stay within the budget of benchmark/import_time.py. Each check
+runs in a fresh interpreter, since the test process may already have the package loaded.
+'''
+
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+import import_time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+HEAVY_MODULES = ("requests", "aiohttp", "suds", "numpy")
+
+
+def heavy_imports(code: str) -> list:
+    """
+    Run code in a fresh interpreter and return the heavy modules it left in sys.modules.
+    """
+    probe = f"{code}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout.strip()
+    return output.split(",") if output else []
+
+
+@pytest.mark.parametrize("code", [
+    "import agi_geocode",
+    "import agi_geocode; agi_geocode.__all__",
+    "import agi_geocode; dir(agi_geocode)",
+])
+def test_import_pulls_in_no_heavy_dependency(code):
+    assert heavy_imports(code) == []
+
+
+def test_every_export_names_an_existing_module():
+    import agi_geocode
+
+    sources = [os.path.join(ROOT, folder) for folder in ("REST", "SOAP")]
+    for name, (module, _) in agi_geocode._EXPORTS.items():
+        assert any(os.path.isfile(os.path.join(folder, module + ".py")) for folder in sources), name
+
+
+def test_median_import_time_is_within_budget():
+    times, heavy = import_time.measure(import_time.RUNS)
+    median = statistics.median(times)
+    assert heavy == []
+    assert median <= import_time.BUDGET_MS, (
+        f"import agi_geocode: median {median:.2f} ms over {len(times)} runs, budget {import_time.BUDGET_MS} ms")
@@ -0,0 +1,147 @@
+'''
+Service Objects - AGI Rate Limiting Tests
+
+Checks TokenBucket pacing and the AIMD adjustments of AdaptiveConcurrency, and that both
+REST clients cut the limit after a service-error payload from the stub server.
+'''
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from agi_rest_client import AGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from retry_policy import RetryPolicy
+from stub_server import StubAGIServer
+
+PARAMS = {"SingleLine": "17 Battery Pl New York NY", "Country": "USA", "MaxResults": "1",
+          "SearchType": "BestMatch", "LicenseKey": "KEY"}
+
+
+def urls(server) -> tuple:
+    url = f"{server.url}/AGI/api.svc/json/PlaceSearch"
+    return url, url, url
+
+
+def test_token_bucket_allows_the_burst_then_refuses():
+    bucket = TokenBucket(rate_per_s=1, burst=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_token_bucket_paces_acquire_to_the_rate():
+    bucket = TokenBucket(rate_per_s=50, burst=1)
+    started = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.perf_counter() - started >= 5 / 50 * 0.9
+
+
+def test_token_bucket_rejects_a_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_s=0)
+
+
+def test_limit_grows_while_saturated_and_successful():
+    limiter = AdaptiveConcurrency(initial_limit=4)
+    for _ in range(4):
+        limiter.acquire()
+    for _ in range(4):
+        limiter.release(0.01, True)
+
+    # The limit only grows while at least half of it is in use
+    assert limiter.stats()["increases"] == 2
+    assert limiter.limit == 4
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_idle_successes_do_not_inflate_the_limit():
+    limiter = AdaptiveConcurrency(initial_limit=4)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.01, True)
+    assert limiter.stats()["increases"] == 0
+
+
+def test_one_congestion_signal_cuts_the_limit_once_per_round_trip():
+    limiter = AdaptiveConcurrency(initial_limit=10, decrease_factor=0.5)
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(60, False)
+
+    assert limiter.limit == 5
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_latency_spike_counts_as_congestion():
+    limiter = AdaptiveConcurrency(initial_limit=10, decrease_factor=0.5, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(0.01, True)
+    limiter.acquire()
+    limiter.release(0.05, True)
+    assert limiter.limit == 5
+
+
+def test_unclassified_failures_leave_the_limit_alone():
+    limiter = AdaptiveConcurrency(initial_limit=10)
+    limiter.acquire()
+    limiter.release(0.01, None)
+    assert limiter.stats() == {"limit": 10, "in_flight": 0, "baseline_latency_s": None,
+                               "increases": 0, "decreases": 0}
+
+
+def test_sync_client_backs_off_after_an_error_payload():
+    limiter = AdaptiveConcurrency(initial_limit=8)
+    client = AGIRestClient(health=EndpointHealthTracker(), concurrency=limiter,
+                           retry=RetryPolicy(max_attempts=1))
+    with StubAGIServer(error_rate=1.0) as server, client:
+        with pytest.raises(RuntimeError):
+            client.call("PlaceSearch", PARAMS, True, *urls(server))
+
+    # The primary and the backup each answered with an error payload
+    assert limiter.limit <= 8 * 0.7
+    assert limiter.stats()["decreases"] >= 1
+
+
+def test_one_error_payload_cuts_the_limit():
+    limiter = AdaptiveConcurrency(initial_limit=8, decrease_factor=0.5)
+    with StubAGIServer(error_rate=1.0) as server, \
+            AGIRestClient(health=EndpointHealthTracker(), concurrency=limiter) as client:
+        data = client.call("PlaceSearch", PARAMS, False, *urls(server))
+
+    assert data["Error"]["TypeCode"] == "3"
+    assert server.requests == 1
+    assert limiter.limit == 4
+
+
+def test_sync_client_keeps_the_limit_on_success(stub):
+    limiter = AdaptiveConcurrency(initial_limit=8)
+    with AGIRestClient(health=EndpointHealthTracker(), concurrency=limiter) as client:
+        assert "Locations" in client.call("PlaceSearch", PARAMS, True, *urls(stub))
+
+    assert limiter.limit == 8
+    assert limiter.stats()["decreases"] == 0
+
+
+def test_async_client_backs_off_after_an_error_payload():
+    pytest.importorskip("aiohttp")
+    from agi_rest_async import AsyncAGIRestClient
+
+    limiter = AdaptiveConcurrency(initial_limit=8)
+
+    async def main(server):
+        async with AsyncAGIRestClient(health=EndpointHealthTracker(), concurrency=limiter,
+                                      retry=RetryPolicy(max_attempts=1)) as client:
+            await client.call("PlaceSearch", PARAMS, True, *urls(server))
+
+    with StubAGIServer(error_rate=1.0) as server:
+        with pytest.raises(RuntimeError):
+            asyncio.run(main(server))
+
+    # The primary and the backup each answered with an error payload
+    assert limiter.limit <= 8 * 0.7
+    assert limiter.stats()["decreases"] >= 1
@@ -0,0 +1,103 @@
+'''
+Service Objects - AGI Response Cache Tests
+
+Checks the canonical cache key and the memory, SQLite and ResultStore tiers of ResponseCache.
+'''
+
+import pytest
+
+from response_cache import ResponseCache, cache_key
+from result_store import ResultStore
+
+PARAMS = {"SingleLine": "17 Battery Place", "Country": "USA", "MaxResults": 1, "Address1": None,
+          "LicenseKey": "LICENSE-A"}
+RESPONSE = {"Locations": [{"PrecisionLevel": "16", "Latitude": "40.705273", "Longitude": "-74.016979"}]}
+
+
+def test_key_is_canonical():
+    variant = dict(PARAMS, SingleLine="  17   battery PLACE ", MaxResults="1", Address1="")
+    assert cache_key("PlaceSearch", variant, True) == cache_key("PlaceSearch", PARAMS, True)
+
+
+def test_key_separates_operation_parameters_endpoint_and_license():
+    key = cache_key("PlaceSearch", PARAMS, True)
+    assert key.startswith("PlaceSearch:")
+    assert key != cache_key("ReverseSearch", PARAMS, True)
+    assert key != cache_key("PlaceSearch", dict(PARAMS, Country="CAN"), True)
+    assert key != cache_key("PlaceSearch", PARAMS, False)
+    assert key != cache_key("PlaceSearch", dict(PARAMS, LicenseKey="LICENSE-B"), True)
+
+
+def test_key_never_contains_the_license_key():
+    assert "LICENSE-A" not in cache_key("PlaceSearch", PARAMS, True)
+
+
+def test_key_method_matches_cache_key():
+    assert ResponseCache().key("PlaceSearch", PARAMS, False) == cache_key("PlaceSearch", PARAMS, False)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats["evictions"], stats["memory_entries"], stats["misses"]) == (1, 2, 1)
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache(ttl_s=-1)
+    cache.put("a", RESPONSE)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "agi.sqlite")
+    key = cache_key("PlaceSearch", PARAMS, True)
+    first = ResponseCache(sqlite_path=path)
+    first.put(key, RESPONSE)
+    first.close()
+
+    second = ResponseCache(sqlite_path=path)
+    try:
+        assert second.get(key) == RESPONSE
+        assert second.get(key) == RESPONSE
+        stats = second.stats()
+        assert (stats["sqlite_hits"], stats["memory_hits"]) == (1, 1)
+    finally:
+        second.close()
+
+
+def test_store_tier_survives_a_new_instance(tmp_path):
+    key = cache_key("PlaceSearch", PARAMS, True)
+    with ResultStore(str(tmp_path / "store")) as store:
+        ResponseCache(store=store).put(key, RESPONSE)
+    with ResultStore(str(tmp_path / "store"), readonly=True) as store:
+        cache = ResponseCache(store=store)
+        assert cache.get(key) == RESPONSE
+        assert cache.stats()["store_hits"] == 1
+
+
+def test_values_that_are_not_json_stay_in_memory(tmp_path):
+    cache = ResponseCache(sqlite_path=str(tmp_path / "agi.sqlite"))
+    try:
+        value = object()
+        cache.put("suds", value)
+        assert cache.get("suds") is value
+        assert cache._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize("tier", ["memory", "sqlite"])
+def test_clear(tmp_path, tier):
+    cache = ResponseCache(sqlite_path=str(tmp_path / "agi.sqlite") if tier == "sqlite" else None)
+    cache.put("a", RESPONSE)
+    cache.clear()
+    assert cache.get("a") is None
+    cache.close()
@@ -0,0 +1,139 @@
+'''
+Service Objects - AGI Result Store Tests
+
+Checks that values round-trip through a ResultStore, survive reopening, index growth and
+compaction, and that a store recovers from a writer that stopped mid-append.
+'''
+
+import os
+import time
+
+import pytest
+
+from result_store import ResultStore
+
+
+def log_path(store: ResultStore) -> str:
+    return os.path.join(store.path, store._files["log"])
+
+
+def test_round_trip(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        store.put("text", "17 Battery Pl")
+        store.put(b"bytes", b"\x00\x01")
+        store.put("json", {"Locations": [{"PrecisionLevel": "16"}]})
+
+        assert bytes(store.get("text")) == b"17 Battery Pl"
+        assert bytes(store.get(b"bytes")) == b"\x00\x01"
+        assert store.get_json("json") == {"Locations": [{"PrecisionLevel": "16"}]}
+        assert store.get("missing") is None
+        assert "text" in store and "missing" not in store
+        assert len(store) == 3
+
+
+def test_replace_keeps_one_entry(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        store.put("key", "old")
+        store.put("key", "new")
+
+        assert bytes(store.get("key")) == b"new"
+        assert len(store) == 1
+        assert store.stats()["records_appended"] == 2
+
+
+def test_expired_values_are_hidden(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        store.put("gone", "x", expires_at=time.time() - 1)
+        store.put("kept", "y", expires_at=time.time() + 3600)
+
+        assert store.get("gone") is None
+        assert [key for key, _, _ in store.items()] == ["kept"]
+
+
+def test_reopen_and_readonly(tmp_path):
+    path = str(tmp_path / "store")
+    with ResultStore(path) as store:
+        for i in range(100):
+            store.put(f"key{i}", {"i": i})
+
+    with ResultStore(path, readonly=True) as store:
+        assert len(store) == 100
+        assert all(store.get_json(f"key{i}") == {"i": i} for i in range(100))
+        with pytest.raises(PermissionError):
+            store.put("key", "value")
+
+
+def test_index_growth_keeps_every_key(tmp_path):
+    with ResultStore(str(tmp_path / "store"), initial_capacity=16) as store:
+        for i in range(200):
+            store.put(f"key{i}", str(i))
+
+        assert store.stats()["capacity"] >= 256
+        assert all(bytes(store.get(f"key{i}")) == str(i).encode() for i in range(200))
+
+
+def test_compact_keeps_latest_live_records(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        for i in range(10):
+            store.put("key", str(i))
+        store.put("expired", "x", expires_at=time.time() - 1)
+
+        result = store.compact()
+
+        assert result["records"] == 1
+        assert result["bytes_after"] < result["bytes_before"]
+        assert bytes(store.get("key")) == b"9"
+        assert [name for name in os.listdir(store.path) if name.endswith(".log")] == [store._files["log"]]
+
+
+def test_other_instance_follows_a_rebuild(tmp_path):
+    path = str(tmp_path / "store")
+    with ResultStore(path, initial_capacity=16) as writer, ResultStore(path, readonly=True) as reader:
+        writer.put("first", "1")
+        assert bytes(reader.get("first")) == b"1"
+
+        for i in range(100):
+            writer.put(f"key{i}", str(i))
+        writer.compact()
+
+        assert bytes(reader.get("first")) == b"1"
+        assert bytes(reader.get("key99")) == b"99"
+
+
+def test_recovers_from_a_torn_append(tmp_path):
+    path = str(tmp_path / "store")
+    with ResultStore(path) as store:
+        store.put("kept", "value")
+        committed = store.stats()["log_bytes"]
+        # A writer that died mid-append leaves bytes past the committed log length
+        with open(log_path(store), "ab") as f:
+            f.write(b"\xde\xad\xbe\xef" * 8)
+
+    with ResultStore(path) as store:
+        assert store.stats()["log_bytes"] == committed
+        assert bytes(store.get("kept")) == b"value"
+        store.put("next", "after")
+        assert bytes(store.get("next")) == b"after"
+        assert bytes(store.get("kept")) == b"value"
+
+
+def test_corrupt_record_is_detected(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        store.put("key", "value")
+        path = log_path(store)
+
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"X")
+
+    with ResultStore(str(tmp_path / "store")) as store:
+        with pytest.raises(ValueError, match="Corrupt record"):
+            store.get("key")
+
+
+def test_clear(tmp_path):
+    with ResultStore(str(tmp_path / "store")) as store:
+        store.put("key", "value")
+        store.clear()
+        assert store.get("key") is None
+        assert len(store) == 0
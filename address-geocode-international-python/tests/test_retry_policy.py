@@ -0,0 +1,154 @@
+'''
+Service Objects - AGI Retry Policy Tests
+
+Checks RetryPolicy backoff and error classification, and Deadline budgeting.
+'''
+
+import asyncio
+import http.client
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from retry_policy import (AGIResponseError, AGIUnavailableError, Deadline, DeadlineExceeded, RetryPolicy,
+                          http_status, is_network_error, is_soap_fault)
+from soap_fast import SoapFault, SoapHTTPError
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def test_backoff_without_jitter_doubles_up_to_the_cap():
+    policy = RetryPolicy(base_delay_s=0.1, max_delay_s=0.5, jitter=0)
+    assert [policy.backoff(retry) for retry in range(5)] == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+
+
+def test_full_jitter_stays_within_the_backoff():
+    policy = RetryPolicy(base_delay_s=0.1, max_delay_s=2.0, jitter=1.0)
+    for retry in range(6):
+        ceiling = min(2.0, 0.1 * 2 ** retry)
+        delays = [policy.backoff(retry) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_partial_jitter_keeps_the_fixed_part():
+    policy = RetryPolicy(base_delay_s=1.0, max_delay_s=1.0, jitter=0.25)
+    assert all(0.75 <= policy.backoff(0) <= 1.0 for _ in range(200))
+
+
+def test_max_attempts_must_be_positive():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+
+
+def test_retryable_responses():
+    policy = RetryPolicy()
+    assert policy.is_retryable_response({"Error": {"TypeCode": "3"}})
+    assert policy.is_retryable_response(SimpleNamespace(Error=SimpleNamespace(TypeCode=3)))
+    assert not policy.is_retryable_response({"Error": {"TypeCode": "1"}})
+    assert not policy.is_retryable_response({"Locations": []})
+
+
+def test_retryable_exceptions():
+    policy = RetryPolicy()
+    assert policy.is_retryable_exception(StatusError(503))
+    assert not policy.is_retryable_exception(StatusError(404))
+    assert policy.is_retryable_exception(AGIResponseError("fatal", {"TypeCode": "3"}))
+    assert not policy.is_retryable_exception(AGIResponseError("bad input", {"TypeCode": "4"}))
+    assert not policy.is_retryable_exception(DeadlineExceeded("late"))
+    assert policy.is_retryable_exception(ConnectionError("reset"))
+    assert not RetryPolicy(retry_on_network=False).is_retryable_exception(ConnectionError("reset"))
+
+
+def wrapped(cause: BaseException, wrapper=RuntimeError) -> BaseException:
+    """
+    Return wrapper("wrapped") raised from cause, as the clients raise their failures.
+    """
+    try:
+        raise wrapper("wrapped") from cause
+    except wrapper as ex:
+        return ex
+
+
+def test_retryable_exception_follows_the_cause():
+    policy = RetryPolicy()
+    assert not policy.is_retryable_exception(wrapped(StatusError(404)))
+    assert policy.is_retryable_exception(wrapped(StatusError(503)))
+    assert policy.is_retryable_exception(wrapped(socket.timeout("timed out")))
+
+
+def test_network_errors_are_retryable():
+    network = [TimeoutError(), socket.timeout(), ConnectionResetError(), http.client.BadStatusLine("x"),
+               asyncio.TimeoutError()]
+    requests = pytest.importorskip("requests")
+    network += [requests.ConnectionError("refused"), requests.Timeout("slow")]
+
+    assert all(is_network_error(ex) for ex in network)
+    assert all(RetryPolicy().is_retryable_exception(ex) for ex in network)
+    assert not any(RetryPolicy(retry_on_network=False).is_retryable_exception(ex) for ex in network)
+
+
+def test_soap_http_errors_follow_their_status():
+    assert RetryPolicy().is_retryable_exception(SoapHTTPError(503, "Service Unavailable"))
+    assert not RetryPolicy().is_retryable_exception(SoapHTTPError(404, "Not Found"))
+
+
+def test_aiohttp_errors_are_network_errors():
+    aiohttp = pytest.importorskip("aiohttp")
+    assert is_network_error(aiohttp.ClientConnectionError("refused"))
+    assert RetryPolicy().is_retryable_exception(aiohttp.ServerDisconnectedError())
+
+
+def test_soap_faults_are_not_retryable():
+    policy = RetryPolicy()
+    fault = SoapFault("s:Server", "Service Objects Fatal")
+    assert is_soap_fault(fault)
+    assert not policy.is_retryable_exception(fault)
+    assert not policy.is_retryable_exception(wrapped(fault))
+
+    suds = pytest.importorskip("suds")
+    web_fault = suds.WebFault(SimpleNamespace(faultstring="Service Objects Fatal"), None)
+    assert is_soap_fault(web_fault)
+    assert not policy.is_retryable_exception(wrapped(web_fault))
+
+
+def test_unknown_exceptions_are_not_retryable():
+    policy = RetryPolicy()
+    assert not policy.is_retryable_exception(ValueError("bad"))
+    assert not policy.is_retryable_exception(KeyError("Locations"))
+    assert not policy.is_retryable_exception(wrapped(TypeError("bug")))
+
+
+def test_unavailable_is_retryable_unless_its_cause_says_otherwise():
+    policy = RetryPolicy()
+    assert policy.is_retryable_exception(AGIUnavailableError("unreachable on both endpoints"))
+    assert policy.is_retryable_exception(wrapped(ValueError("truncated body"), AGIUnavailableError))
+    assert not policy.is_retryable_exception(wrapped(StatusError(404), AGIUnavailableError))
+    assert not RetryPolicy(retry_on_network=False).is_retryable_exception(AGIUnavailableError("unreachable"))
+
+
+def test_http_status():
+    assert http_status(StatusError(429)) == 429
+    assert http_status(SimpleNamespace(response=SimpleNamespace(status_code=502))) == 502
+    assert http_status(SimpleNamespace(httpcode=500)) == 500
+    assert http_status(ValueError()) is None
+
+
+def test_deadline_caps_the_attempt_timeout():
+    deadline = Deadline(0.5)
+    assert deadline.timeout(10) <= 0.5
+    assert deadline.timeout(0.1) == 0.1
+    assert not deadline.expired()
+
+
+def test_exhausted_deadline_raises():
+    deadline = Deadline(0.0)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(1)
+    assert isinstance(DeadlineExceeded(), TimeoutError)
@@ -0,0 +1,59 @@
+'''
+Service Objects - AGI Benchmark Tests
+
+Checks that the benchmark reports a scenario whose calls fail as failed, instead of as
+an ordinary row, and runs the SOAP parity check against the stub endpoint.
+'''
+
+import pytest
+
+from run_benchmark import check_soap_parity, failed, run_sync
+
+
+def test_failing_scenario_is_reported():
+    def call():
+        raise RuntimeError("Both primary and backup endpoints failed.\nPrimary error: boom")
+
+    row = run_sync(call, 10, 1)
+
+    assert (row["calls"], row["errors"]) == (10, 10)
+    assert row["first_error"] == "RuntimeError: Both primary and backup endpoints failed. Primary error: boom"
+    assert failed(row, 0.0)
+    assert failed(row, 0.5)
+
+
+def test_clean_scenario_passes():
+    row = run_sync(lambda: None, 10, 2)
+
+    assert (row["errors"], row["first_error"]) == (0, None)
+    assert not failed(row, 0.0)
+
+
+def test_error_rate_threshold():
+    calls = iter(range(10))
+
+    def call():
+        if next(calls) < 2:
+            raise ConnectionError("reset")
+
+    row = run_sync(call, 10, 1)
+
+    assert failed(row, 0.1)
+    assert not failed(row, 0.2)
+
+
+@pytest.mark.parametrize("operation", ["place", "reverse"])
+def test_soap_parity(stub, operation):
+    pytest.importorskip("suds")
+    assert check_soap_parity(operation, stub.url)
+
+
+def test_soap_parity_fails_when_the_suds_path_fails(stub, monkeypatch):
+    pytest.importorskip("suds")
+    import soap_client_pool
+
+    def broken(self, wsdl, timeout_s):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(soap_client_pool.SoapClientPool, "client", broken)
+    assert not check_soap_parity("place", stub.url)
@@ -0,0 +1,133 @@
+'''
+Service Objects - AGI Sharded Runner Tests
+
+Runs run_sharded on worker processes against the stub server: shard order and row
+numbers, the shared SQLite cache, retries of a failing shard, recovery from a dead
+worker, and geocode_cli --processes.
+
+The worker processes inherit the stub endpoint URLs patched in this process, so these
+tests need the "fork" start method.
+'''
+
+import functools
+import json
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+if multiprocessing.get_start_method() != "fork":
+    pytest.skip("worker processes must inherit the patched endpoint URLs", allow_module_level=True)
+
+import place_search_rest
+from geocode_cli import jsonl_text, main
+from sharded_runner import run_sharded
+
+RECORDS = [{"single_line": f"{number} Battery Pl New York NY", "country": "US"} for number in range(1, 9)]
+
+
+@pytest.fixture
+def endpoints(stub, monkeypatch):
+    """
+    Point place_search at the stub server.
+    """
+    for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+        monkeypatch.setattr(place_search_rest, name, f"{stub.url}/AGI/api.svc/json/PlaceSearch")
+    return stub
+
+
+def first_time(marker: str) -> bool:
+    """
+    Return True for the first caller, in any process, to claim the marker file.
+    """
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL))
+        return True
+    except FileExistsError:
+        return False
+
+
+def failing_once(results: list, first_row: int, marker: str) -> str:
+    if first_row == 3 and first_time(marker):
+        raise ValueError("formatter failed")
+    return jsonl_text(results, first_row)
+
+
+def failing_always(results: list, first_row: int) -> str:
+    if first_row == 3 and results[0].error is None:
+        raise ValueError("formatter failed")
+    return jsonl_text(results, first_row)
+
+
+def dying_once(results: list, first_row: int, marker: str) -> str:
+    if first_row == 3 and first_time(marker):
+        os._exit(1)
+    return jsonl_text(results, first_row)
+
+
+def run(formatter=jsonl_text, **kwargs) -> list:
+    return list(run_sharded(RECORDS, "place", "KEY", True, formatter, processes=2, workers_per_process=2,
+                            shard_size=3, **kwargs))
+
+
+def rows(shards: list) -> list:
+    return [json.loads(line) for shard in shards for line in shard.output.splitlines()]
+
+
+def test_shards_are_yielded_in_input_order(endpoints):
+    shards = run(start_row=10)
+
+    assert [(shard.index, shard.first_row, shard.rows, shard.failed) for shard in shards] == [
+        (0, 10, 3, 0), (1, 13, 3, 0), (2, 16, 2, 0)]
+    lines = rows(shards)
+    assert [line["index"] for line in lines] == list(range(10, 18))
+    assert [line["input"] for line in lines] == RECORDS
+    assert all("Locations" in line["response"] for line in lines)
+    assert endpoints.requests == len(RECORDS)
+
+
+def test_workers_share_the_sqlite_cache_across_runs(endpoints, tmp_path):
+    cache_path = str(tmp_path / "agi.sqlite")
+    run(cache_path=cache_path)
+    assert endpoints.requests == len(RECORDS)
+
+    assert rows(run(cache_path=cache_path)) == rows(run())
+    assert endpoints.requests == 2 * len(RECORDS)
+
+
+def test_failing_shard_is_retried(endpoints, tmp_path):
+    shards = run(functools.partial(failing_once, marker=str(tmp_path / "failed")))
+
+    assert [shard.failed for shard in shards] == [0, 0, 0]
+    assert [line["index"] for line in rows(shards)] == list(range(len(RECORDS)))
+
+
+def test_shard_failing_every_attempt_marks_its_records_failed(endpoints):
+    shards = run(failing_always, max_retries=1)
+
+    assert [(shard.rows, shard.failed) for shard in shards] == [(3, 0), (3, 3), (2, 0)]
+    failed = [line for line in rows(shards) if line["error"]]
+    assert [line["index"] for line in failed] == [3, 4, 5]
+    assert all(line["error"].startswith("Shard 1 failed after 2 attempts") for line in failed)
+
+
+def test_dead_worker_is_replaced_and_its_shard_retried(endpoints, tmp_path):
+    shards = run(functools.partial(dying_once, marker=str(tmp_path / "died")))
+
+    assert [shard.failed for shard in shards] == [0, 0, 0]
+    assert [line["input"] for line in rows(shards)] == RECORDS
+
+
+def test_cli_processes_match_the_threaded_output(endpoints, tmp_path):
+    source = tmp_path / "addresses.jsonl"
+    source.write_text("".join(json.dumps(record) + "\n" for record in RECORDS), encoding="utf-8")
+
+    outputs = []
+    for options in ([], ["--processes", "2", "--shard-size", "3"]):
+        output = str(tmp_path / f"results{len(outputs)}.jsonl")
+        assert main(["place", str(source), output, "--license-key", "KEY", *options]) == 0
+        with open(output, encoding="utf-8") as f:
+            outputs.append(f.read())
+
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,149 @@
+'''
+Service Objects - AGI Request Coalescing Tests
+
+Checks that SingleFlight and AsyncSingleFlight run one call per key at a time and hand its
+result, or its exception, to every caller that joined it.
+'''
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from retry_policy import Deadline, DeadlineExceeded
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def run_together(flight: SingleFlight, fn, callers: int = 8) -> list:
+    """
+    Call flight.do("key", fn) from several threads, holding fn until all of them have joined,
+    and return their futures.
+    """
+    release = threading.Event()
+
+    def held():
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(callers) as pool:
+        futures = [pool.submit(flight.do, "key", held) for _ in range(callers)]
+        while flight.stats()["shared"] < callers - 1:
+            time.sleep(0.001)
+        release.set()
+    return futures
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    futures = run_together(flight, lambda: calls.append(1) or {"Locations": []})
+
+    assert len(calls) == 1
+    results = [future.result() for future in futures]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "shared": 7, "in_flight": 0}
+
+
+def test_concurrent_callers_share_the_exception():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("unavailable")
+
+    futures = run_together(flight, fail)
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="unavailable"):
+            future.result()
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_completed_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["executed"] == 2
+
+
+def test_follower_waits_no_longer_than_its_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", lambda: release.wait(5) and "done")
+        while flight.stats()["in_flight"] == 0:
+            time.sleep(0.001)
+
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            flight.do("key", lambda: "not called", Deadline(0.1))
+        assert time.monotonic() - started < 1
+        patient = pool.submit(flight.do, "key", lambda: "not called", Deadline(5))
+        while flight.stats()["shared"] < 2:
+            time.sleep(0.001)
+
+        release.set()
+        assert leader.result() == "done"
+    assert patient.result() == "done"
+    assert flight.stats() == {"executed": 1, "shared": 2, "in_flight": 0}
+
+
+def test_async_callers_share_one_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"Locations": []}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(8)),
+                                    flight.do("other", fetch))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results[:8])
+    assert flight.stats() == {"executed": 2, "shared": 7, "in_flight": 0}
+
+
+def test_async_cancelled_caller_does_not_cancel_the_call():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_async_follower_waits_no_longer_than_its_deadline():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.3)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await flight.do("key", fetch, Deadline(0.05))
+        assert await flight.do("key", fetch, Deadline(5)) == "done"
+        return await leader
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == "done"
+    assert time.monotonic() - started < 1
+    assert flight.stats()["executed"] == 1
@@ -0,0 +1,88 @@
+'''
+Service Objects - AGI SOAP Client Pool Tests
+
+Makes real suds calls against the stub endpoint through SoapClientPool, directly and
+through the PlaceSearch / ReverseSearch classes, from one thread and from several.
+'''
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("suds")
+
+from place_search_soap import PlaceSearch
+from reverse_search_soap import ReverseSearch
+from soap_client_pool import SoapClientPool
+from soap_response import response_to_dict
+
+
+def wsdl_of(server) -> str:
+    return server.url + "/AGI/soap.svc?wsdl"
+
+
+def point_at(service, server):
+    service._primary_wsdl = service._backup_wsdl = wsdl_of(server)
+    return service
+
+
+def place(service):
+    return service.place_search("17 Battery Place, New York, NY 10004", "", "", "", "", "", "", "", "",
+                                "USA", 1, "", "", "")
+
+
+def test_pool_client_calls_the_endpoint(stub):
+    client = SoapClientPool(wsdl_cache_dir=None).client(wsdl_of(stub), 5)
+
+    out = response_to_dict(client.service.PlaceSearch(SingleLine="17 Battery Place", LicenseKey="KEY"))
+
+    assert out["SearchInfo"]["Status"] == "OK"
+    assert out["Locations"][0]["AddressComponents"]["PostalCode"] == "10004"
+
+
+def test_each_thread_gets_its_own_client_on_shared_definitions(stub):
+    pool = SoapClientPool(wsdl_cache_dir=None)
+    mine = pool.client(wsdl_of(stub), 5)
+    assert pool.client(wsdl_of(stub), 5) is mine
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.client(wsdl_of(stub), 5)))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not mine
+    assert other[0].wsdl is mine.wsdl
+
+
+def test_definitions_are_stored_on_disk(stub, tmp_path):
+    cache_dir = str(tmp_path / "wsdl")
+    SoapClientPool(wsdl_cache_dir=cache_dir).client(wsdl_of(stub), 5)
+    assert os.listdir(cache_dir)
+
+    client = SoapClientPool(wsdl_cache_dir=cache_dir).client(wsdl_of(stub), 5)
+    assert client.service.PlaceSearch(SingleLine="x", LicenseKey="KEY").Response[0].Key == "SearchInfo"
+
+
+def test_place_search_through_the_pool(stub):
+    service = point_at(PlaceSearch("KEY", True, client_pool=SoapClientPool(wsdl_cache_dir=None)), stub)
+
+    assert response_to_dict(place(service))["Locations"][0]["PrecisionLevel"] == "16"
+
+
+def test_reverse_search_through_the_pool(stub):
+    service = point_at(ReverseSearch("KEY", True, client_pool=SoapClientPool(wsdl_cache_dir=None)), stub)
+
+    response = service.reverse_search("40.705273", "-74.016979", "100", "USA", "1", "")
+
+    assert response_to_dict(response)["Locations"][0]["Latitude"] == "40.705273"
+
+
+def test_threaded_calls_share_one_service(stub):
+    service = point_at(PlaceSearch("KEY", True, client_pool=SoapClientPool(wsdl_cache_dir=None)), stub)
+
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: response_to_dict(place(service)), range(40)))
+
+    assert all(response["SearchInfo"]["Status"] == "OK" for response in responses)
@@ -0,0 +1,107 @@
+'''
+Service Objects - AGI SOAP Engine Tests
+
+Checks parse_response against a recorded PlaceSearch envelope (data/place_search_response.xml),
+fed whole and in small chunks, and against response_to_dict for the same response.
+'''
+
+import os
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+
+import pytest
+
+from soap_fast import STALE_CONNECTION_ERRORS, SoapFault, _local, parse_response
+from soap_response import response_error, response_to_dict
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SOAP_ENV = '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>{}</s:Body></s:Envelope>'
+
+
+@pytest.fixture(scope="module")
+def envelope() -> bytes:
+    with open(os.path.join(DATA, "place_search_response.xml"), "rb") as f:
+        return f.read()
+
+
+def suds_like(body: bytes) -> SimpleNamespace:
+    """
+    Build the object suds returns for an envelope: Response items of Key and Value.Result[].Field[].
+    """
+    result = ET.fromstring(body)[0][0][0]
+    responses = []
+    for item in result:
+        records = [SimpleNamespace(Field=[SimpleNamespace(Key=field[0].text, Value=field[1].text or None)
+                                          for field in record])
+                   for record in item[1]]
+        responses.append(SimpleNamespace(Key=item[0].text, Value=SimpleNamespace(Result=records)))
+    return SimpleNamespace(Response=responses)
+
+
+def test_parse_recorded_envelope(envelope):
+    out = parse_response([envelope])
+
+    assert out["SearchInfo"] == {"Status": "OK", "NumberOfLocations": "2", "Notes": None,
+                                 "NotesDesc": None, "Warnings": "0", "WarningDesc": None}
+    assert [location["PrecisionLevel"] for location in out["Locations"]] == ["16", "12"]
+    best = out["Locations"][0]
+    assert (best["Type"], best["Latitude"], best["Longitude"]) == ("Address", "40.705273", "-74.016979")
+    assert best["AddressComponents"] == {"PremiseNumber": "17", "Thoroughfare": "Battery Pl",
+                                         "Locality": "New York", "AdministrativeArea1": "New York",
+                                         "PostalCode": "10004", "CountryISO3": "USA"}
+    assert out["Locations"][1]["AddressComponents"]["Thoroughfare"] == "Battery Pl & West St"
+    assert response_error(out) is None
+
+
+def test_parse_is_independent_of_chunking(envelope):
+    whole = parse_response([envelope])
+    assert parse_response(envelope[i:i + 7] for i in range(0, len(envelope), 7)) == whole
+
+
+def test_parse_matches_response_to_dict(envelope):
+    assert parse_response([envelope]) == response_to_dict(suds_like(envelope))
+
+
+def test_parse_error_response():
+    error = ("<Type>Service Objects Fatal</Type><TypeCode>3</TypeCode>"
+             "<Desc>Unhandled error.</Desc><DescCode>1</DescCode>")
+    body = SOAP_ENV.format(f"<PlaceSearchResponse><PlaceSearchResult><Error>{error}</Error>"
+                           "</PlaceSearchResult></PlaceSearchResponse>").encode()
+
+    out = parse_response([body])
+
+    assert out == {"Error": {"Type": "Service Objects Fatal", "TypeCode": "3",
+                             "Desc": "Unhandled error.", "DescCode": "1"}}
+    assert response_error(out)["TypeCode"] == "3"
+
+
+def test_parse_nil_result():
+    body = SOAP_ENV.format('<PlaceSearchResponse xmlns:i="http://www.w3.org/2001/XMLSchema-instance">'
+                           '<PlaceSearchResult i:nil="true"/></PlaceSearchResponse>').encode()
+    assert parse_response([body]) is None
+
+
+def test_parse_fault():
+    body = SOAP_ENV.format("<s:Fault><faultcode>s:Client</faultcode><faultstring>Bad request</faultstring>"
+                           "</s:Fault>").encode()
+    with pytest.raises(SoapFault) as info:
+        parse_response([body])
+    assert (info.value.faultcode, info.value.faultstring) == ("s:Client", "Bad request")
+
+
+def test_parse_malformed_body():
+    with pytest.raises(ET.ParseError):
+        parse_response([b"<s:Envelope><s:Body>"])
+
+
+def test_local_name():
+    assert _local("{https://sws.serviceobjects.com/AGI/}PlaceSearchResult") == "PlaceSearchResult"
+    assert _local("Result") == "Result"
+
+
+def test_stale_connection_errors_cover_closed_keep_alive():
+    import http.client
+
+    for error in (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                  http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError):
+        assert issubclass(error, STALE_CONNECTION_ERRORS)
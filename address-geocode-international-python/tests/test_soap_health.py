@@ -0,0 +1,52 @@
+'''
+Service Objects - AGI SOAP Endpoint Health Tests
+
+Checks that PlaceSearch and ReverseSearch use the REST client's process-wide circuit
+breakers by default, and skip a failing primary stub endpoint once its circuit opens.
+'''
+
+import pytest
+
+pytest.importorskip("suds")
+
+import circuit_breaker
+from circuit_breaker import OPEN, EndpointHealthTracker, get_default_tracker
+from place_search_soap import PlaceSearch
+from reverse_search_soap import ReverseSearch
+from stub_server import StubAGIServer
+
+
+def wsdl_of(server) -> str:
+    return server.url + "/AGI/soap.svc?wsdl"
+
+
+@pytest.fixture
+def tracker(monkeypatch) -> EndpointHealthTracker:
+    """
+    Replace the process-wide tracker with a fresh one that opens after two failures.
+    """
+    fresh = EndpointHealthTracker(failure_threshold=2)
+    monkeypatch.setattr(circuit_breaker, "_default_tracker", fresh)
+    return fresh
+
+
+@pytest.mark.parametrize("service_class", [PlaceSearch, ReverseSearch])
+def test_default_health_is_the_shared_tracker(service_class, tracker):
+    assert service_class("KEY", True)._health is tracker is get_default_tracker()
+
+    own = EndpointHealthTracker()
+    assert service_class("KEY", True, health=own)._health is own
+
+
+def test_failing_primary_is_skipped_once_its_circuit_opens(stub, tracker):
+    with StubAGIServer(outage=True) as primary:
+        service = ReverseSearch("KEY", True, timeout_ms=5000)
+        service._primary_wsdl = wsdl_of(primary)
+        service._backup_wsdl = wsdl_of(stub)
+
+        for _ in range(4):
+            service.reverse_search("34.42", "-119.70", "1", "USA", "1", "All")
+
+        assert primary.requests == 2
+        assert stub.requests == 4
+        assert tracker.breaker(wsdl_of(primary)).state == OPEN
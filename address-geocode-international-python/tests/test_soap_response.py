@@ -0,0 +1,66 @@
+'''
+Service Objects - AGI SOAP Response Conversion Tests
+
+Converts real suds responses from the stub server with response_to_dict and
+responses_to_columns, and checks the result against the REST response shape.
+'''
+
+import json
+
+import pytest
+
+pytest.importorskip("suds")
+
+from soap_client_pool import SoapClientPool
+from soap_response import is_fatal_error, response_error, response_to_dict, responses_to_columns
+from stub_server import ADDRESS_COMPONENTS, FATAL_ERROR, REST_BODY, StubAGIServer
+
+
+def place_search(server, single_line: str = "17 Battery Place"):
+    client = SoapClientPool(wsdl_cache_dir=None).client(server.url + "/AGI/soap.svc?wsdl", 5)
+    return client.service.PlaceSearch(SingleLine=single_line, Country="USA", MaxResults=1, LicenseKey="KEY")
+
+
+@pytest.fixture
+def failing():
+    with StubAGIServer(error_rate=1.0) as server:
+        yield server
+
+
+def test_response_to_dict_matches_the_rest_shape(stub):
+    out = response_to_dict(place_search(stub))
+    rest = json.loads(REST_BODY)
+    assert out["Locations"] == rest["Locations"]
+    assert out["Locations"][0]["AddressComponents"] == ADDRESS_COMPONENTS
+    # suds reads empty elements as None where REST has ""
+    assert out["SearchInfo"] == {key: value or None for key, value in rest["SearchInfo"].items()}
+
+
+def test_response_to_dict_keeps_the_error_without_locations(failing):
+    out = response_to_dict(place_search(failing))
+    assert out == {"Error": FATAL_ERROR}
+
+
+def test_fatal_errors_are_recognised_on_suds_objects_and_dicts(stub, failing):
+    ok, error = place_search(stub), place_search(failing)
+    assert response_error(ok) is None and not is_fatal_error(ok)
+    assert is_fatal_error(error)
+    assert is_fatal_error(response_to_dict(error))
+    assert not is_fatal_error({"Error": dict(FATAL_ERROR, TypeCode="1")})
+
+
+def test_responses_to_columns_has_one_entry_per_location(stub, failing):
+    responses = [place_search(stub), None, place_search(failing), place_search(stub, "1 Main St")]
+    columns = responses_to_columns(responses, fields=("PrecisionLevel", "Latitude"), components=("PostalCode",))
+
+    assert columns == {
+        "row": [0, 3],
+        "PrecisionLevel": ["16", "16"],
+        "Latitude": ["40.705273", "40.705273"],
+        "PostalCode": ["10004", "10004"],
+    }
+
+
+def test_responses_to_columns_fills_missing_fields():
+    assert responses_to_columns([], components=("Unknown",)) == {
+        "row": [], "PrecisionLevel": [], "Type": [], "Latitude": [], "Longitude": [], "Unknown": []}
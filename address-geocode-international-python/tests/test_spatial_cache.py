@@ -0,0 +1,86 @@
+'''
+Service Objects - AGI ReverseSearch Spatial Cache Tests
+
+Checks nearest-match lookups, the search option / license key / endpoint match and LRU
+eviction of ReverseSearchGridCache, and reverse_search answering from it against the stub server.
+'''
+
+import pytest
+
+from spatial_cache import ReverseSearchGridCache, haversine_m
+
+OPTIONS = ("1", "USA", "1", "All", "KEY", True)
+
+
+def response(name: str) -> dict:
+    return {"Locations": [{"AddressComponents": {"Locality": name}}]}
+
+
+def test_haversine_m():
+    assert haversine_m(0, 0, 0, 0) == 0
+    assert haversine_m(0, 0, 1, 0) == pytest.approx(111195, rel=1e-3)
+    assert haversine_m(60, 0, 60, 1) == pytest.approx(111195 / 2, rel=1e-2)
+
+
+def test_nearest_result_within_the_distance_is_returned():
+    cache = ReverseSearchGridCache(max_distance_m=25)
+    cache.store(34.4200, -119.7000, *OPTIONS, response("near"))
+    cache.store(34.4202, -119.7000, *OPTIONS, response("far"))
+
+    assert cache.lookup(34.40005, -119.7000, *OPTIONS) is None
+    assert cache.lookup(34.42005, -119.7000, *OPTIONS) == response("near")
+    assert cache.lookup(34.42015, -119.7000, *OPTIONS) == response("far")
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_matches_across_cell_boundaries_and_at_high_latitude():
+    cache = ReverseSearchGridCache(max_distance_m=25)
+    cache.store(69.99999, 25.00000, *OPTIONS, response("arctic"))
+    assert cache.lookup(70.00005, 25.00020, *OPTIONS) == response("arctic")
+
+
+def test_options_license_key_and_endpoint_must_match():
+    cache = ReverseSearchGridCache()
+    cache.store(34.42, -119.70, *OPTIONS, response("cached"))
+
+    assert cache.lookup(34.42, -119.70, " 1", "usa", "1", "ALL", "KEY", True) == response("cached")
+    assert cache.lookup(34.42, -119.70, "5", "USA", "1", "All", "KEY", True) is None
+    assert cache.lookup(34.42, -119.70, "1", "USA", "1", "All", "OTHER", True) is None
+    assert cache.lookup(34.42, -119.70, "1", "USA", "1", "All", "KEY", False) is None
+
+
+def test_least_recently_used_cells_are_evicted():
+    cache = ReverseSearchGridCache(max_distance_m=25, max_entries=2)
+    cache.store(10.0, 10.0, *OPTIONS, response("a"))
+    cache.store(20.0, 20.0, *OPTIONS, response("b"))
+    assert cache.lookup(10.0, 10.0, *OPTIONS) == response("a")
+
+    cache.store(30.0, 30.0, *OPTIONS, response("c"))
+
+    assert cache.lookup(20.0, 20.0, *OPTIONS) is None
+    assert cache.lookup(10.0, 10.0, *OPTIONS) == response("a")
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 2
+
+
+def test_reverse_search_answers_nearby_points_from_the_cache(stub, monkeypatch):
+    pytest.importorskip("requests")
+    import reverse_search_rest
+    from agi_rest_client import AGIRestClient
+    from circuit_breaker import EndpointHealthTracker
+
+    for name in ("PRIMARY_URL", "BACKUP_URL", "TRIAL_URL"):
+        monkeypatch.setattr(reverse_search_rest, name, f"{stub.url}/AGI/api.svc/json/ReverseSearch")
+    cache = ReverseSearchGridCache(max_distance_m=25)
+
+    with AGIRestClient(health=EndpointHealthTracker()) as client:
+        def reverse_search(latitude, license_key="KEY", is_live=True):
+            return reverse_search_rest.reverse_search(latitude, -119.70, "1", "USA", "1", "All", license_key,
+                                                      is_live, client=client, spatial_cache=cache)
+
+        first = reverse_search(34.42000)
+        assert reverse_search(34.42010) is first
+        assert stub.requests == 1
+
+        reverse_search(34.42010, license_key="OTHER")
+        reverse_search(34.42010, is_live=False)
+        assert stub.requests == 3
@@ -0,0 +1,105 @@
+'''
+Service Objects - AGI Trajectory Reverse Geocoding Tests
+
+Runs reverse_geocode_trace against a fake ReverseSearch that places a boundary at a known
+latitude, and checks anchor selection and the bisection of boundary crossings.
+'''
+
+import pytest
+
+pytest.importorskip("requests")
+
+import trajectory
+from trajectory import area_key, reverse_geocode_trace
+
+# About 11 m between points, heading north across a boundary at BOUNDARY_LAT
+STEP = 0.0001
+BOUNDARY_LAT = 0.00505
+
+
+def area(latitude: float) -> str:
+    return "south" if latitude < BOUNDARY_LAT else "north"
+
+
+def response(latitude: float) -> dict:
+    return {"Locations": [{"AddressComponents": {"CountryISO3": "USA", "Locality": area(latitude)}}]}
+
+
+@pytest.fixture
+def lookups(monkeypatch) -> list:
+    """
+    Replace ReverseSearch with a fake and return the list of latitudes it was called with.
+    """
+    calls = []
+
+    def reverse_search(latitude, longitude, *args, **kwargs):
+        calls.append(latitude)
+        return response(latitude)
+
+    monkeypatch.setattr(trajectory, "reverse_search", reverse_search)
+    return calls
+
+
+def trace(points: list, **kwargs) -> list:
+    return list(reverse_geocode_trace(points, 1, "USA", 1, "All", "KEY", True, **kwargs))
+
+
+def test_area_key():
+    assert area_key(response(0)) == ("usa", "", "", "south", "")
+    assert area_key({"Locations": []}) == ()
+    assert area_key(None) == ()
+
+
+def test_every_point_gets_its_own_side_of_a_boundary(lookups):
+    points = [(None, i * STEP, 0.0) for i in range(100)]
+
+    results = trace(points, min_move_m=250, resolution_m=5)
+
+    assert [result.index for result in results] == list(range(100))
+    assert all(area_key(result.response)[3] == area(result.latitude) for result in results)
+    # Five anchors plus a handful of bisection calls, not one call per point
+    assert len(lookups) < 15
+
+
+def test_without_bisection_points_take_the_nearer_anchor(lookups):
+    points = [(None, i * STEP, 0.0) for i in range(100)]
+
+    results = trace(points, min_move_m=250, resolution_m=0)
+
+    assert {result.anchor for result in results} == {0, 23, 46, 69, 92}
+    assert len(lookups) == 5
+    assert all(result.distance_m <= 250 / 2 + 12 for result in results)
+
+
+def test_max_age_starts_a_new_anchor(lookups):
+    points = [(second, 0.0, 0.0) for second in range(0, 100, 10)]
+
+    results = trace(points, max_age_s=25)
+
+    assert [result.anchor for result in results] == [0, 0, 0, 3, 3, 3, 6, 6, 6, 9]
+
+
+def test_max_points_bounds_a_stationary_trace_without_timestamps(lookups):
+    points = [(None, 0.0, 0.0)] * 10
+
+    results = trace(points, max_points=3)
+
+    assert len(lookups) == 3
+    assert [result.anchor for result in results] == [0, 0, 0, 0, 4, 4, 4, 4, 8, 8]
+    with pytest.raises(ValueError):
+        trace(points, max_points=0)
+
+
+def test_failed_lookup_is_reported_and_avoided(monkeypatch):
+    def reverse_search(latitude, longitude, *args, **kwargs):
+        if latitude == 0:
+            raise RuntimeError("unavailable")
+        return response(latitude)
+
+    monkeypatch.setattr(trajectory, "reverse_search", reverse_search)
+    points = [(None, latitude, 0.0) for latitude in (0.0, 0.0010, 0.0011, 0.0012, 0.0013, 0.0024)]
+
+    results = trace(points, min_move_m=250)
+
+    assert isinstance(results[0].error, RuntimeError)
+    assert all(result.error is None and result.anchor == 5 for result in results[1:])
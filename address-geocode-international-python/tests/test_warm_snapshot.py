@@ -0,0 +1,136 @@
+'''
+Service Objects - AGI Warm Snapshot Tests
+
+Checks the snapshot file round trip and header, the IsLive / endpoint / license key
+checks, and snapshot answers and refreshes through AGIRestClient against the stub server.
+'''
+
+import gzip
+import json
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import place_search_rest
+from agi_rest_client import AGIRestClient
+from circuit_breaker import EndpointHealthTracker
+from response_cache import license_hash
+from warm_snapshot import SNAPSHOT_VERSION, WarmSnapshot, build_snapshot
+
+PARAMS = {"SingleLine": "", "PostalCode": "93101", "Country": "US", "MaxResults": "1",
+          "SearchType": "PostalCode", "LicenseKey": "KEY"}
+CACHED = {"Locations": [{"PrecisionLevel": "8"}]}
+
+
+def url(server) -> str:
+    return f"{server.url}/AGI/api.svc/json/PlaceSearch"
+
+
+def snapshot_for(server, **kwargs) -> WarmSnapshot:
+    snapshot = WarmSnapshot(**kwargs)
+    snapshot.bind(url(server), "KEY")
+    snapshot.put("PlaceSearch", PARAMS, True, CACHED)
+    return snapshot
+
+
+def call(client: AGIRestClient, server, params: dict = PARAMS, is_live: bool = True) -> dict:
+    return client.call("PlaceSearch", params, is_live, url(server), url(server), url(server))
+
+
+def test_key_includes_is_live_but_not_the_license_key():
+    snapshot = WarmSnapshot()
+    assert snapshot.key("PlaceSearch", PARAMS, True) != snapshot.key("PlaceSearch", PARAMS, False)
+    assert snapshot.key("PlaceSearch", PARAMS, True) == snapshot.key("PlaceSearch", dict(PARAMS, LicenseKey="X"), True)
+
+
+def test_accepts_only_the_bound_endpoint_and_license_key():
+    snapshot = WarmSnapshot()
+    live = "https://sws.serviceobjects.com/AGI/api.svc/json/PlaceSearch"
+    assert not snapshot.accepts(PARAMS, live)
+
+    snapshot.bind(live, "KEY")
+    assert snapshot.accepts(PARAMS, "https://sws.serviceobjects.com/AGI/api.svc/json/ReverseSearch")
+    assert not snapshot.accepts(dict(PARAMS, LicenseKey="OTHER"), live)
+    assert not snapshot.accepts(PARAMS, "https://trial.serviceobjects.com/AGI/api.svc/json/PlaceSearch")
+    assert snapshot.stats()["mismatches"] == 3
+
+
+def test_save_and_load_keep_the_header_without_the_license_key(tmp_path):
+    path = str(tmp_path / "agi.snapshot")
+    snapshot = WarmSnapshot()
+    snapshot.bind("https://sws.serviceobjects.com/AGI/api.svc/json/PlaceSearch", "KEY")
+    snapshot.put("PlaceSearch", PARAMS, True, CACHED, fetched_at=100.0)
+    snapshot.save(path)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    assert (data["version"], data["endpoint"]) == (SNAPSHOT_VERSION, "sws.serviceobjects.com")
+    assert data["license_key_sha256"] == license_hash("KEY")
+    assert "KEY" not in json.dumps(data["entries"])
+
+    loaded = WarmSnapshot(path)
+    assert (loaded.endpoint, loaded.license_hash) == (snapshot.endpoint, snapshot.license_hash)
+    assert loaded.get(loaded.key("PlaceSearch", PARAMS, True)) == (CACHED, True)
+    assert loaded.get(loaded.key("PlaceSearch", PARAMS, False)) is None
+
+
+def test_older_snapshot_versions_are_rejected(tmp_path):
+    path = str(tmp_path / "agi.snapshot")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"format": "agi-warm-snapshot", "version": 1, "entries": []}, f)
+    with pytest.raises(ValueError, match="version 1"):
+        WarmSnapshot(path)
+
+
+def test_client_answers_from_a_matching_snapshot(stub):
+    snapshot = snapshot_for(stub)
+    with AGIRestClient(health=EndpointHealthTracker(), snapshot=snapshot) as client:
+        assert call(client, stub) == CACHED
+
+    assert stub.requests == 0
+    assert snapshot.stats()["hits"] == 1
+
+
+def test_client_refuses_the_snapshot_for_another_license_key_or_trial(stub):
+    snapshot = snapshot_for(stub)
+    with AGIRestClient(health=EndpointHealthTracker(), snapshot=snapshot) as client:
+        assert call(client, stub, dict(PARAMS, LicenseKey="OTHER")) != CACHED
+        assert call(client, stub, is_live=False) != CACHED
+
+    assert stub.requests == 2
+    stats = snapshot.stats()
+    assert (stats["hits"], stats["mismatches"], stats["misses"]) == (0, 1, 1)
+
+
+def test_stale_entry_is_served_and_refreshed_in_the_background(stub):
+    snapshot = snapshot_for(stub, ttl_s=0)
+    with AGIRestClient(health=EndpointHealthTracker(), snapshot=snapshot) as client:
+        assert call(client, stub) == CACHED
+        for _ in range(200):
+            if snapshot.stats()["refreshes"]:
+                break
+            time.sleep(0.01)
+
+    assert stub.requests == 1
+    assert snapshot.stats()["refreshes"] == 1
+    data, _ = snapshot.get(snapshot.key("PlaceSearch", PARAMS, True))
+    assert data != CACHED and "Locations" in data
+
+
+def test_build_snapshot_records_the_endpoint_and_license_key(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(place_search_rest, "PRIMARY_URL", url(stub))
+    monkeypatch.setattr(place_search_rest, "BACKUP_URL", url(stub))
+    path = str(tmp_path / "agi.snapshot")
+
+    queries = [{"postal_code": "93101", "country": "US"}, {"postal_code": "10004", "country": "US"}]
+    client = AGIRestClient(health=EndpointHealthTracker())
+    counts = build_snapshot(queries, "KEY", True, path, search_type="PostalCode", max_workers=2, client=client)
+    client.close()
+
+    assert counts == {"queries": 2, "entries": 2, "failed": 0}
+    snapshot = WarmSnapshot(path)
+    assert snapshot.endpoint == stub.address
+    assert snapshot.license_hash == license_hash("KEY")
+    assert len(snapshot) == 2